@@ -0,0 +1,88 @@
+from datetime import datetime, tzinfo
+from typing import Self, cast
+
+import pytest
+
+from agent import prompt as module
+from agent.prompt import _base_prompt, get_prompt, system_prompt
+from agent.services.room_catalog import RoomCatalogSnapshot
+from agent.state import State
+from agent.types import InternalRoom
+
+
+def _catalog(version: str, *names: str) -> RoomCatalogSnapshot:
+    rooms = {
+        name.lower(): cast(InternalRoom, {"room_name": name, "room_type": "Villa"})
+        for name in names
+    }
+    return RoomCatalogSnapshot(version=version, rooms=rooms)
+
+
+def _state(summary: str | None = None) -> State:
+    return cast(State, {"messages": [], "conversation_summary": summary})
+
+
+@pytest.fixture
+def today(monkeypatch: pytest.MonkeyPatch) -> list[datetime]:
+    """Controls the date `get_prompt` sees; append to move to another day."""
+    days = [datetime(2026, 5, 1, 9, 0)]
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz: tzinfo | None = None) -> Self:
+            return cls.fromisoformat(days[-1].isoformat())
+
+    monkeypatch.setattr(module, "datetime", FrozenDatetime)
+    _base_prompt.cache_clear()
+    return days
+
+
+class TestGetPrompt:
+    # Scenario 1: The static prefix is byte-identical across turns and catalogs
+    def test_static_prefix_is_stable(self, today):
+        v1, v2 = _catalog("v1", "S1"), _catalog("v2", "S1", "V1")
+
+        prompts = [
+            get_prompt(_state(), v1),
+            get_prompt(_state("Guest asked about May"), v1),
+            get_prompt(_state(), v2),
+        ]
+        today.append(datetime(2026, 5, 2, 9, 0))
+        prompts.append(get_prompt(_state(), v2))
+
+        assert all(p.startswith(system_prompt) for p in prompts)
+
+    # Scenario 2: Same day and catalog version: the cached prompt is reused
+    def test_context_is_cached_per_day_and_version(self, today):
+        v1 = _catalog("v1", "S1")
+
+        first = get_prompt(_state(), v1)
+        second = get_prompt(_state(), _catalog("v1", "S1"))
+
+        assert first is second
+        assert _base_prompt.cache_info().hits == 1
+
+    # Scenario 3: A new day or catalog version produces a new context section
+    def test_new_day_or_catalog_changes_the_context(self, today):
+        v1, v2 = _catalog("v1", "S1"), _catalog("v2", "S1", "V1")
+
+        first = get_prompt(_state(), v1)
+        new_catalog = get_prompt(_state(), v2)
+        today.append(datetime(2026, 5, 2, 9, 0))
+        new_day = get_prompt(_state(), v2)
+
+        assert "Today is 2026-05-01" in first and "'V1'" not in first
+        assert "'V1'" in new_catalog
+        assert "Today is 2026-05-02" in new_day
+        assert len({first, new_catalog, new_day}) == 3
+
+    # Scenario 4: The summary changes every few turns, so it comes last
+    def test_summary_is_appended_last(self, today):
+        v1 = _catalog("v1", "S1")
+        base = get_prompt(_state(), v1)
+
+        prompt = get_prompt(_state("Guest wants S1 for 2 nights"), v1)
+
+        assert prompt.startswith(base)
+        assert prompt.rstrip().endswith("Guest wants S1 for 2 nights")
+        assert prompt.index("## Context") < prompt.index("## Earlier in this")
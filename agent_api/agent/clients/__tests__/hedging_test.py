@@ -0,0 +1,110 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from agent.clients.hedging import LatencyTracker, RequestHedger
+
+
+def _hedger(budget_percent: float = 100, p95: float = 0.01) -> RequestHedger:
+    # Enough history that the latencies recorded by a test barely move the p95
+    tracker = LatencyTracker(window=1000)
+    for _ in range(1000):
+        tracker.record(p95)
+    return RequestHedger(
+        budget_percent=budget_percent, min_delay_seconds=0, tracker=tracker
+    )
+
+
+def _request(
+    *delays: float, fail_first: bool = False
+) -> tuple[Callable[[], Awaitable[int]], list[int]]:
+    """Each call takes the next delay; returns which copy answered."""
+    calls: list[int] = []
+
+    async def request() -> int:
+        n = len(calls)
+        calls.append(n)
+        await asyncio.sleep(delays[n])
+        if fail_first and n == 0:
+            raise RuntimeError("primary failed")
+        return n
+
+    return request, calls
+
+
+class TestLatencyTracker:
+    def test_percentile(self):
+        tracker = LatencyTracker()
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+
+        assert tracker.percentile(95) == 0.095
+        assert LatencyTracker().percentile(95) is None
+
+
+class TestRequestHedger:
+    # Scenario 1: A fast primary never triggers a hedge
+    @pytest.mark.asyncio
+    async def test_fast_request_is_not_hedged(self):
+        hedger = _hedger(p95=0.05)
+        request, calls = _request(0)
+
+        assert await hedger.run(request) == 0
+        assert calls == [0]
+        assert hedger.hedges == 0
+
+    # Scenario 2: A slow primary is raced by a hedge, which wins
+    @pytest.mark.asyncio
+    async def test_slow_request_is_hedged_and_first_answer_wins(self):
+        hedger = _hedger()
+        request, calls = _request(1, 0)
+
+        assert await hedger.run(request) == 1
+        assert calls == [0, 1]
+        assert hedger.hedge_wins == 1
+
+    # Scenario 3: A failing copy leaves the race to the other one
+    @pytest.mark.asyncio
+    async def test_failed_primary_falls_back_to_hedge(self):
+        hedger = _hedger()
+        request, _ = _request(0.05, 0.1, fail_first=True)
+
+        assert await hedger.run(request) == 1
+
+    # Scenario 4: The budget caps hedges at the configured share of requests
+    @pytest.mark.asyncio
+    async def test_budget_caps_hedges(self):
+        hedger = _hedger(budget_percent=10)
+        for _ in range(20):
+            request, _ = _request(0.03, 0)
+            await hedger.run(request)
+
+        assert hedger.requests == 20
+        assert hedger.hedges == 2
+
+    # Scenario 5: A quiet spell banks at most one hedge for the next slow burst
+    @pytest.mark.asyncio
+    async def test_quiet_spell_saves_one_hedge(self):
+        hedger = _hedger(budget_percent=10, p95=0.05)
+        for _ in range(100):
+            request, _ = _request(0)
+            await hedger.run(request)
+        assert hedger.hedges == 0
+
+        for _ in range(5):
+            request, _ = _request(0.1, 0)
+            await hedger.run(request)
+
+        assert hedger.hedges == 1
+
+    # Scenario 6: Without enough samples there is no p95 to hedge on
+    @pytest.mark.asyncio
+    async def test_no_hedge_before_min_samples(self):
+        hedger = RequestHedger(budget_percent=100, min_delay_seconds=0)
+        request, calls = _request(0.02)
+
+        await hedger.run(request)
+
+        assert calls == [0]
+        assert hedger.hedges == 0
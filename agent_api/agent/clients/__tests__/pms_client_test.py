@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import json
+import time
+
+import httpx
+import pytest
+
+from agent.clients.pms_client import PmsClient, WindowValidators, pms_client
+from agent.clients.pms_token import PmsToken
+
+
+def _payload(reservation_room_list: dict | list) -> dict:
+    """Raw /calendar/detail response: one Sea View room (S5) and one Villa (V2)."""
+    return {
+        "startDate": "2026-04-10",
+        "endDate": "2026-04-16",
+        "roomList": [
+            {"id": "r1", "roomNo": "S5", "roomTypeId": "rt1"},
+            {"id": "r2", "roomNo": "V2", "roomTypeId": "rt2"},
+        ],
+        "roomTypeList": [
+            {"id": "rt1", "name": "Sea View Bungalow"},
+            {"id": "rt2", "name": "Villa"},
+        ],
+        "reservationRoomList": reservation_room_list,
+        "version": "1.62",
+    }
+
+
+def _reservation(check_in: str, check_out: str) -> dict:
+    return {"checkIn": check_in, "checkOut": check_out}
+
+
+class TestParseResponse:
+    # Scenario 1: No reservations at all — PMS sends [] instead of {}
+    def test_empty_reservation_list_means_every_night_free(self):
+        parsed = pms_client._parse_response(_payload([]))
+
+        assert parsed["from_date"] == "2026-04-10"
+        assert parsed["to_date"] == "2026-04-16"
+        assert set(parsed["rooms"]) == {"s5", "v2"}
+        assert len(parsed["rooms"]["s5"]["dates"]) == 7
+        assert parsed["rooms"]["v2"]["room_type_name"] == "Villa"
+
+    # Scenario 2: A stay removes its nights but not its checkout day.
+    # The PMS lists the same reservation under every date key it spans.
+    def test_reservation_removes_stay_nights_only(self):
+        stay = _reservation("2026-04-12", "2026-04-14")
+        parsed = pms_client._parse_response(
+            _payload({"rt1": {"r1": {"2026-04-12": [stay], "2026-04-13": [stay]}}})
+        )
+
+        assert parsed["rooms"]["s5"]["dates"].to_date_strings() == {
+            "2026-04-10",
+            "2026-04-11",
+            "2026-04-14",
+            "2026-04-15",
+            "2026-04-16",
+        }
+        # Other rooms are untouched
+        assert len(parsed["rooms"]["v2"]["dates"]) == 7
+
+    # Scenario 3: Stays that start before or end after the window are clipped to it
+    def test_reservations_overlapping_window_edges_are_clipped(self):
+        parsed = pms_client._parse_response(
+            _payload(
+                {
+                    "rt2": {
+                        "r2": {
+                            "2026-04-10": [_reservation("2026-04-05", "2026-04-11")],
+                            "2026-04-16": [_reservation("2026-04-16", "2026-04-30")],
+                        }
+                    }
+                }
+            )
+        )
+
+        assert parsed["rooms"]["v2"]["dates"].to_date_ranges() == [
+            {"start": "2026-04-11", "end": "2026-04-15"}
+        ]
+
+
+# ─── Conditional revalidation ────────────────────────────────────────────────
+# Cached windows are revalidated instead of refetched: the PMS either answers
+# 304, or (if it ignores conditional headers) we compare the body hash.
+
+
+@pytest.fixture
+def client_with_responses():
+    """PmsClient whose HTTP layer replays the given responses and records requests."""
+
+    def make(*responses: httpx.Response) -> tuple[PmsClient, list[httpx.Request]]:
+        client = PmsClient()
+        client.tokens.token = PmsToken("token", time.time() + 3600)
+        requests: list[httpx.Request] = []
+        queue = list(responses)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return queue.pop(0)
+
+        client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client, requests
+
+    return make
+
+
+class TestRevalidateWindow:
+    # Scenario 1: PMS supports ETags and answers 304 — keep the cached copy
+    @pytest.mark.asyncio
+    async def test_not_modified_returns_none(self, client_with_responses):
+        body = json.dumps(_payload([])).encode()
+        client, requests = client_with_responses(
+            httpx.Response(200, content=body, headers={"ETag": '"v1"'}),
+            httpx.Response(304),
+        )
+
+        window = await client.fetch_room_availability_window("2026-04-10")
+        assert window["validators"].etag == '"v1"'
+
+        result = await client.revalidate_room_availability_window(
+            "2026-04-10", window["validators"]
+        )
+
+        assert result is None
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+
+    # Scenario 2: PMS ignores conditional headers but the body is identical
+    @pytest.mark.asyncio
+    async def test_identical_body_returns_none(self, client_with_responses):
+        body = json.dumps(_payload([])).encode()
+        client, _ = client_with_responses(
+            httpx.Response(200, content=body), httpx.Response(200, content=body)
+        )
+
+        window = await client.fetch_room_availability_window("2026-04-10")
+        result = await client.revalidate_room_availability_window(
+            "2026-04-10", window["validators"]
+        )
+
+        assert result is None
+
+    # Scenario 3: A new booking changed the window — it is parsed and returned
+    @pytest.mark.asyncio
+    async def test_changed_body_is_parsed(self, client_with_responses):
+        stay = _reservation("2026-04-12", "2026-04-13")
+        changed = json.dumps(_payload({"rt1": {"r1": {"2026-04-12": [stay]}}}))
+        client, _ = client_with_responses(httpx.Response(200, content=changed.encode()))
+
+        result = await client.revalidate_room_availability_window(
+            "2026-04-10",
+            WindowValidators(etag=None, last_modified=None, content_hash="old"),
+        )
+
+        assert result is not None
+        assert "2026-04-12" not in result["rooms"]["s5"]["dates"]
+        assert result["validators"].content_hash != "old"
+
+    # Scenario 4: Callers holding different copies each get their own answer
+    @pytest.mark.asyncio
+    async def test_concurrent_revalidations_of_different_copies(
+        self, client_with_responses
+    ):
+        body = json.dumps(_payload([])).encode()
+        current = hashlib.blake2b(body, digest_size=16).hexdigest()
+        client, requests = client_with_responses(
+            httpx.Response(200, content=body), httpx.Response(200, content=body)
+        )
+
+        up_to_date, outdated = await asyncio.gather(
+            client.revalidate_room_availability_window(
+                "2026-04-10", WindowValidators(None, None, current)
+            ),
+            client.revalidate_room_availability_window(
+                "2026-04-10", WindowValidators(None, None, "old")
+            ),
+        )
+
+        assert len(requests) == 2
+        assert up_to_date is None
+        assert outdated is not None
+        assert outdated["validators"].content_hash == current
+
+    # Scenario 5: Callers holding the same copy share one request
+    @pytest.mark.asyncio
+    async def test_concurrent_revalidations_of_same_copy(self, client_with_responses):
+        client, requests = client_with_responses(httpx.Response(304))
+        validators = WindowValidators('"v1"', None, "hash")
+
+        results = await asyncio.gather(
+            client.revalidate_room_availability_window("2026-04-10", validators),
+            client.revalidate_room_availability_window("2026-04-10", validators),
+        )
+
+        assert list(results) == [None, None]
+        assert len(requests) == 1
+
+
+class TestLogin:
+    # Scenario 1: The access token is returned as given
+    @pytest.mark.asyncio
+    async def test_returns_access_token(self, client_with_responses):
+        client, requests = client_with_responses(
+            httpx.Response(200, json={"accessToken": "fresh"})
+        )
+
+        assert await client._login() == "fresh"
+        assert requests[0].url.path.endswith("/auth")
+
+    # Scenario 2: A response without a usable token is an error, not a token
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("body", [{}, {"accessToken": None}, {"accessToken": 42}])
+    async def test_missing_token_raises(self, client_with_responses, body):
+        client, _ = client_with_responses(httpx.Response(200, json=body))
+
+        with pytest.raises(Exception, match="no access token"):
+            await client._login()
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import jwt
+import pytest
+
+from agent.clients.pms_token import PmsToken, PmsTokenManager, jwt_expiry
+from core.cache_backend import InProcessCacheBackend
+
+
+def _jwt(exp: float) -> str:
+    return jwt.encode(
+        {"sub": "pms", "exp": int(exp)},
+        "pms-signing-key-we-never-see-0123",
+        algorithm="HS256",
+    )
+
+
+class TestJwtExpiry:
+    def test_reads_exp_without_the_signing_key(self):
+        exp = time.time() + 900
+        assert jwt_expiry(_jwt(exp)) == int(exp)
+
+    def test_opaque_token_has_no_expiry(self):
+        assert jwt_expiry("not-a-jwt") is None
+
+
+class TestPmsTokenManager:
+    # Scenario 1: The JWT exp claim sets the expiry instead of the default TTL
+    @pytest.mark.asyncio
+    async def test_login_uses_jwt_expiry(self):
+        exp = time.time() + 900
+        manager = PmsTokenManager(
+            login=AsyncMock(return_value=_jwt(exp)), cache_key="t"
+        )
+
+        token = await manager.get()
+
+        assert token.expires_at == int(exp)
+
+    # Scenario 2: Opaque tokens fall back to the default TTL, and are reused
+    @pytest.mark.asyncio
+    async def test_opaque_token_uses_default_ttl(self):
+        login = AsyncMock(return_value="opaque")
+        manager = PmsTokenManager(login=login, cache_key="t", default_ttl_seconds=600)
+
+        first = await manager.get()
+        second = await manager.get()
+
+        assert second is first
+        assert 590 < first.expires_in() <= 600
+        assert login.await_count == 1
+
+    # Scenario 3: A cold worker takes the token another worker shared
+    @pytest.mark.asyncio
+    async def test_cold_worker_reuses_shared_token(self):
+        backend = InProcessCacheBackend()
+        warm_login = AsyncMock(return_value="shared")
+        cold_login = AsyncMock(return_value="own")
+        warm = PmsTokenManager(login=warm_login, cache_key="t", backend=backend)
+        cold = PmsTokenManager(login=cold_login, cache_key="t", backend=backend)
+
+        await warm.get()
+        token = await cold.get()
+
+        assert token.value == "shared"
+        cold_login.assert_not_awaited()
+
+    # Scenario 4: A rejected token is replaced even though it hasn't expired
+    @pytest.mark.asyncio
+    async def test_invalidate_logs_in_again(self):
+        backend = InProcessCacheBackend()
+        login = AsyncMock(side_effect=["first", "second"])
+        manager = PmsTokenManager(login=login, cache_key="t", backend=backend)
+        rejected = await manager.get()
+
+        token = await manager.invalidate(rejected)
+
+        assert token.value == "second"
+        assert (await manager.get()).value == "second"
+
+    # Scenario 5: The background task renews a token inside the refresh margin
+    @pytest.mark.asyncio
+    async def test_background_refresh_renews_before_expiry(self):
+        login = AsyncMock(return_value=_jwt(time.time() + 3600))
+        manager = PmsTokenManager(
+            login=login, cache_key="t", refresh_margin_seconds=300
+        )
+        manager.token = PmsToken("old", time.time() + 200)
+
+        async with manager:
+            for _ in range(10):
+                if login.await_count:
+                    break
+                await asyncio.sleep(0)
+
+        assert manager.token.value != "old"
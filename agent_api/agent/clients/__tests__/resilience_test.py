@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import pytest
+
+from agent.clients.resilience import (
+    AdaptiveLimiter,
+    BreakerState,
+    CircuitBreaker,
+    CircuitOpenError,
+    UpstreamGuard,
+    UpstreamUnavailableError,
+)
+
+
+def _guard(
+    failure_threshold: int = 2, reset_timeout_seconds: float = 60
+) -> UpstreamGuard:
+    return UpstreamGuard(
+        CircuitBreaker("PMS", failure_threshold, reset_timeout_seconds),
+        AdaptiveLimiter(
+            initial_limit=4,
+            min_limit=1,
+            max_limit=8,
+            latency_threshold_seconds=1,
+            queue_timeout_seconds=0.05,
+        ),
+    )
+
+
+def _state(guard: UpstreamGuard) -> BreakerState:
+    # Read through a call: an `is` check on the attribute would narrow it for good
+    return guard.breaker.state
+
+
+def _status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://pms/calendar/detail/2026-04-10")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+async def _fail(guard: UpstreamGuard, error: Exception) -> None:
+    with pytest.raises(type(error)):
+        async with guard.attempt():
+            raise error
+
+
+class TestCircuitBreaker:
+    # Scenario 1: Consecutive upstream failures open it; calls then fail fast
+    @pytest.mark.asyncio
+    async def test_opens_after_threshold_and_fails_fast(self):
+        guard = _guard(failure_threshold=2)
+        await _fail(guard, httpx.ConnectTimeout("slow"))
+        await _fail(guard, _status_error(503))
+
+        assert guard.breaker.state is BreakerState.OPEN
+        with pytest.raises(CircuitOpenError):
+            async with guard.attempt():
+                pytest.fail("request sent while the circuit is open")
+
+    # Scenario 2: Client errors (e.g. an expired token) don't count against the PMS
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_open(self):
+        guard = _guard(failure_threshold=2)
+        for _ in range(3):
+            await _fail(guard, _status_error(401))
+
+        assert guard.breaker.state is BreakerState.CLOSED
+
+    # Scenario 3: After the reset timeout one probe goes through; success closes it
+    @pytest.mark.asyncio
+    async def test_half_open_probe_closes_on_success(self):
+        guard = _guard(failure_threshold=1, reset_timeout_seconds=0)
+        await _fail(guard, httpx.ConnectError("down"))
+
+        async with guard.attempt():
+            # Only the probe is let through while half-open
+            assert _state(guard) is BreakerState.HALF_OPEN
+            with pytest.raises(CircuitOpenError):
+                guard.breaker.before_call()
+
+        assert _state(guard) is BreakerState.CLOSED
+        assert guard.metrics()["times_opened"] == 1
+
+
+class TestAdaptiveLimiter:
+    # Scenario 1: Fast successes raise the limit additively, failures halve it
+    def test_additive_increase_multiplicative_decrease(self):
+        limiter = AdaptiveLimiter(4, 1, 8, 1, 1, backoff_interval_seconds=0)
+        for _ in range(4):
+            limiter.in_flight += 1
+            limiter.release(0.1, True)
+        assert limiter.limit == pytest.approx(5, abs=0.2)
+
+        limiter.in_flight += 1
+        limiter.release(0.1, False)
+        assert limiter.limit == pytest.approx(2.5, abs=0.1)
+
+        # Slow answers back off like failures
+        limiter.in_flight += 1
+        limiter.release(5, True)
+        assert limiter.limit == pytest.approx(1.25, abs=0.1)
+
+    # Scenario 2: Callers beyond the limit queue, then give up fast
+    @pytest.mark.asyncio
+    async def test_saturated_limiter_refuses_after_queue_timeout(self):
+        guard = _guard()
+        guard.limiter.limit = 1
+        held = asyncio.Event()
+        done = asyncio.Event()
+
+        async def hold() -> None:
+            async with guard.attempt():
+                held.set()
+                await done.wait()
+
+        holder = asyncio.create_task(hold())
+        await held.wait()
+        with pytest.raises(UpstreamUnavailableError):
+            async with guard.attempt():
+                pass
+
+        done.set()
+        await holder
+        assert guard.limiter.in_flight == 0
+
+    # Scenario 3: A released slot is handed to the next waiter
+    @pytest.mark.asyncio
+    async def test_waiter_gets_released_slot(self):
+        limiter = AdaptiveLimiter(1, 1, 1, 1, queue_timeout_seconds=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        limiter.release(0.1, True)
+        await waiter
+
+        assert limiter.in_flight == 1
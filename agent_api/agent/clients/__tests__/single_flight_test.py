@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from agent.clients.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    # Scenario 1: Several threads ask for the same window at once — one request is made
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_for_same_key_share_one_request(self):
+        flights: SingleFlight[str, dict] = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def fetch() -> dict:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"from_date": "2026-04-10"}
+
+        waiters = [
+            asyncio.create_task(flights.do("2026-04-10", fetch)) for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert calls == 1
+        assert all(r is results[0] for r in results)
+        assert len(flights) == 0
+
+    # Scenario 2: Different windows are fetched independently
+    @pytest.mark.asyncio
+    async def test_different_keys_do_not_coalesce(self):
+        flights: SingleFlight[str, str] = SingleFlight()
+
+        async def fetch_a() -> str:
+            return "a"
+
+        async def fetch_b() -> str:
+            return "b"
+
+        results = await asyncio.gather(
+            flights.do("2026-04-10", fetch_a), flights.do("2026-04-24", fetch_b)
+        )
+
+        assert list(results) == ["a", "b"]
+
+    # Scenario 3: The shared request fails — every waiter sees the error, next call retries
+    @pytest.mark.asyncio
+    async def test_error_is_shared_and_not_remembered(self):
+        flights: SingleFlight[str, str] = SingleFlight()
+        release = asyncio.Event()
+
+        async def failing() -> str:
+            await release.wait()
+            raise RuntimeError("PMS timeout")
+
+        waiters = [
+            asyncio.create_task(flights.do("2026-04-10", failing)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def ok() -> str:
+            return "fresh"
+
+        assert await flights.do("2026-04-10", ok) == "fresh"
+
+    # Scenario 4: One caller gives up — the others still get the result
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_request(self):
+        flights: SingleFlight[str, str] = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch() -> str:
+            await release.wait()
+            return "window"
+
+        impatient = asyncio.create_task(flights.do("2026-04-10", fetch))
+        patient = asyncio.create_task(flights.do("2026-04-10", fetch))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        release.set()
+
+        assert await patient == "window"
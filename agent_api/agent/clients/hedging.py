@@ -0,0 +1,120 @@
+"""Hedged requests: a second copy of a slow request, capped by a traffic budget."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class LatencyTracker:
+    """Latencies of the last `window` successful requests, for percentiles."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(math.ceil(q / 100 * len(ordered)) - 1, len(ordered) - 1)]
+
+
+class RequestHedger:
+    """Sends a backup request when the first is slower than the tracked p95.
+
+    Whichever copy answers first wins and the other is cancelled; a copy that
+    fails leaves the race to the other. Hedges draw on a budget refilled by
+    `budget_percent` of a hedge per request, so they never add more than that
+    share of traffic even when the upstream is slow across the board, and at
+    most one unspent hedge carries over from a quiet spell. Until
+    `min_samples` latencies are known, nothing is hedged.
+    """
+
+    def __init__(
+        self,
+        budget_percent: float,
+        min_delay_seconds: float,
+        percentile: float = 95,
+        min_samples: int = 20,
+        tracker: LatencyTracker | None = None,
+    ) -> None:
+        self.budget_percent = budget_percent
+        self.min_delay_seconds = min_delay_seconds
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.tracker = LatencyTracker() if tracker is None else tracker
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # In percent of a hedge, so whole-number budgets add up exactly
+        self._budget = 0.0
+        # At most one hedge is saved up, so a quiet spell can't fund a burst
+        self._max_budget = 100.0
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait before hedging, or None while there is too little data."""
+        if len(self.tracker) < self.min_samples:
+            return None
+        p = self.tracker.percentile(self.percentile)
+        assert p is not None
+        return max(p, self.min_delay_seconds)
+
+    async def run[T](self, request: Callable[[], Awaitable[T]]) -> T:
+        self.requests += 1
+        self._budget = min(self._budget + self.budget_percent, self._max_budget)
+
+        primary = asyncio.ensure_future(self._timed(request))
+        delay = self.hedge_delay()
+        pending: set[asyncio.Future[T]] = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self._budget >= 100:
+                    self._budget -= 100
+                    self.hedges += 1
+                    pending.add(asyncio.ensure_future(self._timed(request)))
+
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Prefer a success; only fail once every copy has failed
+                succeeded = [f for f in done if f.exception() is None]
+                if succeeded:
+                    winner = succeeded[0]
+                    if winner is not primary:
+                        self.hedge_wins += 1
+                    return winner.result()
+                if not pending:
+                    return next(iter(done)).result()
+        finally:
+            for future in pending:
+                future.cancel()
+            for future in pending:
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await future
+
+    async def _timed[T](self, request: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        result = await request()
+        self.tracker.record(time.monotonic() - started)
+        return result
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_seconds": self.hedge_delay(),
+        }
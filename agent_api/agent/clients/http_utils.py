@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import functools
 import logging
 import random
@@ -7,6 +8,11 @@ from typing import Any, ParamSpec, TypeVar, cast
 
 import httpx
 
+from core.tracing import tracer
+
+from .hedging import RequestHedger
+from .resilience import UpstreamGuard
+
 logger = logging.getLogger(__name__)
 
 P = ParamSpec("P")
@@ -70,26 +76,49 @@ def retry_with_jitter(
     return decorator
 
 
-async def make_request(
+async def send_request(
     client: httpx.AsyncClient,
     method: str,
     url: str,
     login_cb: Callable[[], Awaitable[dict[str, str]]] | None = None,
     timeout: int = 15,
+    guard: UpstreamGuard | None = None,
+    hedger: RequestHedger | None = None,
     **kwargs: Any,
-) -> dict[str, Any]:
-    """Functional helper to make async HTTP requests with retry logic and auto-auth."""
+) -> httpx.Response:
+    """Send an async HTTP request with retry logic and auto-auth, returning the raw response.
+
+    A 304 Not Modified is returned as-is rather than raised, so callers can use
+    conditional requests (If-None-Match / If-Modified-Since).
+    With a `guard`, every attempt goes through its circuit breaker and
+    concurrency limiter; once it refuses, the `UpstreamUnavailableError` is
+    raised straight away instead of being retried.
+    With a `hedger`, a slow attempt is raced against a second copy, so only
+    pass one for idempotent requests.
+    """
+
+    async def _attempt() -> httpx.Response:
+        with tracer.span(
+            "http.request", **{"http.method": method, "http.url": url}
+        ) as s:
+            async with guard.attempt() if guard else contextlib.nullcontext():
+                response = await client.request(method=method, url=url, **kwargs)
+                if s is not None:
+                    s.set("http.status_code", response.status_code)
+                if response.status_code != 304:
+                    response.raise_for_status()
+        return response
 
     @retry_with_jitter(max_tries=3)
     async def _do_execute_request() -> httpx.Response:
         if "timeout" not in kwargs:
             kwargs["timeout"] = timeout
-        response = await client.request(method=method, url=url, **kwargs)
-        response.raise_for_status()
-        return response
+        if hedger is None:
+            return await _attempt()
+        return await hedger.run(_attempt)
 
     try:
-        response = await _do_execute_request()
+        return await _do_execute_request()
     except httpx.HTTPStatusError as e:
         # Handle Auth error
         if e.response.status_code in [401, 403] and login_cb:
@@ -103,11 +132,25 @@ async def make_request(
                 kwargs.setdefault("headers", {}).update(new_headers)
 
             # Retry once after login
-            response = await _do_execute_request()
+            return await _do_execute_request()
         else:
             raise e
 
-    if response.status_code == 204:
+
+async def make_request(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    login_cb: Callable[[], Awaitable[dict[str, str]]] | None = None,
+    timeout: int = 15,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Functional helper to make async HTTP requests with retry logic and auto-auth."""
+    response = await send_request(
+        client, method, url, login_cb=login_cb, timeout=timeout, **kwargs
+    )
+
+    if response.status_code in [204, 304]:
         return {}
 
     return cast(dict[str, Any], response.json())
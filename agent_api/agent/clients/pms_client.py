@@ -1,14 +1,19 @@
-import asyncio
+import hashlib
 import logging
-import time
-from datetime import datetime, timedelta
+from dataclasses import dataclass
 from typing import Any, NotRequired, TypedDict
 
 import httpx
 
+from agent.utils.availability_mask import AvailabilityMask, to_ordinal
+from core.cache_backend import cache_backend
 from core.config import settings
 
-from .http_utils import make_request
+from .hedging import RequestHedger
+from .http_utils import send_request
+from .pms_token import PmsToken, PmsTokenManager
+from .resilience import AdaptiveLimiter, CircuitBreaker, UpstreamGuard
+from .single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -51,16 +56,28 @@ class _PmsRawResponse(TypedDict):
 
 # ── Internal Parsing Type ─────────────────────────────────────────────────────
 class _PmsRoomAvailabilityInternal(TypedDict):
-    """Internal representation during parsing — dates as a set for O(1) discard."""
+    """Internal representation during parsing — reservations are subtracted from the mask."""
 
     room_id: str
     room_no: str
     room_type_id: str
     room_type_name: str
-    dates: set[str]
+    dates: AvailabilityMask
+
+
+@dataclass(frozen=True)
+class WindowValidators:
+    """What we need to ask the PMS whether a window changed since we fetched it."""
+
+    etag: str | None  # ETag header, sent back as If-None-Match
+    last_modified: str | None  # Last-Modified header, sent back as If-Modified-Since
+    content_hash: str  # Hash of the raw body, for when the PMS ignores both
 
 
 EXPECTED_PMS_VERSION = "1.62"
+# Days covered by one GET /calendar/detail/{date} response
+PMS_WINDOW_DAYS = 14
+PMS_MAX_CONNECTIONS = 20
 
 
 class PmsClient:
@@ -69,10 +86,15 @@ class PmsClient:
     async def aclose(self) -> None:
         await self.http_client.aclose()
 
+    def metrics(self) -> dict[str, Any]:
+        return {**self.guard.metrics(), "hedging": self.hedger.metrics()}
+
     async def __aenter__(self) -> PmsClient:
+        await self.tokens.__aenter__()
         return self
 
     async def __aexit__(self, *exc: object) -> None:
+        await self.tokens.__aexit__(*exc)
         await self.aclose()
 
     def __init__(self) -> None:
@@ -80,146 +102,224 @@ class PmsClient:
         self.http_client = httpx.AsyncClient(
             base_url=self.base_url,
             timeout=15,
-            limits=httpx.Limits(max_connections=20, max_keepalive_connections=5),
+            limits=httpx.Limits(
+                max_connections=PMS_MAX_CONNECTIONS, max_keepalive_connections=5
+            ),
+        )
+        # Shared by every request to the PMS, so an outage is noticed once
+        self.guard = UpstreamGuard(
+            CircuitBreaker(
+                "PMS",
+                failure_threshold=settings.pms_breaker_failure_threshold,
+                reset_timeout_seconds=settings.pms_breaker_reset_seconds,
+            ),
+            AdaptiveLimiter(
+                initial_limit=settings.pms_concurrency_initial_limit,
+                min_limit=1,
+                max_limit=PMS_MAX_CONNECTIONS,
+                latency_threshold_seconds=settings.pms_concurrency_latency_threshold_seconds,
+                queue_timeout_seconds=settings.pms_concurrency_queue_timeout_seconds,
+            ),
+        )
+        # Backup requests for slow window fetches (GETs, so safe to send twice)
+        self.hedger = RequestHedger(
+            budget_percent=settings.pms_hedge_budget_percent,
+            min_delay_seconds=settings.pms_hedge_min_delay_seconds,
         )
         self.hotel_code: str = settings.pms_hotel_code
         self.username: str = settings.pms_username
         self.password: str = settings.pms_password
-        self.token: str | None = None
-        self.token_expiry: float = 0
-        self._lock = asyncio.Lock()
+        self.tokens = PmsTokenManager(
+            login=self._login,
+            cache_key=f"pms:token:{self.hotel_code}:{self.username}",
+            backend=cache_backend,
+            default_ttl_seconds=settings.pms_token_default_ttl_seconds,
+            refresh_margin_seconds=settings.pms_token_refresh_margin_seconds,
+        )
+        # Concurrent fetches of the same window share one PMS request
+        self._window_flights: SingleFlight[str, dict[str, Any]] = SingleFlight()
+        # Keyed by the copy being revalidated too: "unchanged" only holds for it
+        self._revalidate_flights: SingleFlight[
+            tuple[str, str | None, str], dict[str, Any] | None
+        ] = SingleFlight()
 
     async def fetch_room_availability_window(self, start_date: str) -> dict[str, Any]:
-        """Fetch a single 14-day window of room availability from the PMS."""
+        """Fetch a single 14-day window of room availability from the PMS.
+
+        Concurrent callers asking for the same `start_date` await one in-flight
+        request and share its parsed result, which must be treated as read-only.
+        """
+        return await self._window_flights.do(
+            start_date, lambda: self._fetch_window(start_date)
+        )
+
+    async def revalidate_room_availability_window(
+        self, start_date: str, validators: WindowValidators
+    ) -> dict[str, Any] | None:
+        """Conditionally refetch a window previously returned by this client.
+
+        Returns None if the PMS reports the window unchanged (304, or an identical
+        body when it ignores conditional headers), so the caller can keep its copy
+        without re-parsing. Otherwise returns the freshly parsed window.
+        Concurrent callers share a request only if they hold the same copy.
+        """
+        key = (start_date, validators.etag, validators.content_hash)
+        return await self._revalidate_flights.do(
+            key, lambda: self._revalidate_window(start_date, validators)
+        )
+
+    async def _fetch_window(self, start_date: str) -> dict[str, Any]:
+        response = await self._request_window(start_date)
+        return self._window_from(response)
+
+    async def _revalidate_window(
+        self, start_date: str, validators: WindowValidators
+    ) -> dict[str, Any] | None:
+        response = await self._request_window(start_date, validators)
+        if response.status_code == 304:
+            return None
+        if _content_hash(response) == validators.content_hash:
+            return None
+        return self._window_from(response)
+
+    async def _request_window(
+        self, start_date: str, validators: WindowValidators | None = None
+    ) -> httpx.Response:
+        """GET one window, conditional on `validators` when given."""
         try:
             url = f"{self.base_url}/calendar/detail/{start_date}"
 
-            headers = {}
-            if self.token:
-                headers = {
-                    "Authorization": f"Bearer {self.token}",
-                    "Access-Token": self.token,
-                }
+            token = await self.tokens.get()
+            headers = token.headers
+            if validators is not None:
+                if validators.etag:
+                    headers["If-None-Match"] = validators.etag
+                if validators.last_modified:
+                    headers["If-Modified-Since"] = validators.last_modified
 
-            api_response = await make_request(
+            return await send_request(
                 client=self.http_client,
                 method="GET",
                 url=url,
                 headers=headers,
-                login_cb=self._login,
+                login_cb=lambda: self._relogin(token),
+                guard=self.guard,
+                hedger=self.hedger if settings.pms_hedge_enabled else None,
             )
-            return self._parse_response(api_response)
         except Exception as e:
             logger.error(f"Unexpected error during room availability search: {e}")
             raise
 
-    async def _login(self) -> dict[str, str]:
-        """Authenticate with the PMS"""
-        if self.token and time.time() < self.token_expiry - 60:
-            return {"Authorization": f"Bearer {self.token}", "Access-Token": self.token}
-
-        async with self._lock:
-            if self.token and time.time() < self.token_expiry - 60:
-                return {
-                    "Authorization": f"Bearer {self.token}",
-                    "Access-Token": self.token,
-                }
-
-            logger.info("PMS: Logging in to get new access token...")
-
-            auth_data = {
-                "hotelCode": self.hotel_code,
-                "otp": "",
-                "password": self.password,
-                "userName": self.username,
-            }
-
+    def _window_from(self, response: httpx.Response) -> dict[str, Any]:
+        """Parse a window response and attach the validators to revalidate it."""
+        try:
+            window = self._parse_response(response.json())
+        except Exception as e:
+            logger.error(f"Unexpected error during room availability search: {e}")
+            raise
+        window["validators"] = WindowValidators(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_hash=_content_hash(response),
+        )
+        return window
+
+    async def _login(self) -> str:
+        """Authenticate with the PMS and return a new access token"""
+        auth_data = {
+            "hotelCode": self.hotel_code,
+            "otp": "",
+            "password": self.password,
+            "userName": self.username,
+        }
+
+        async with self.guard.attempt():
             response = await self.http_client.post(
                 f"{self.base_url}/auth", json=auth_data, timeout=15
             )
             response.raise_for_status()
-            data = response.json()
-
-            self.token = data.get("accessToken")
-            self.token_expiry = time.time() + 3600
+        token = response.json().get("accessToken")
+        if not isinstance(token, str) or not token:
+            raise Exception("PMS login response has no access token")
+        return token
 
-            return {"Authorization": f"Bearer {self.token}", "Access-Token": self.token}
+    async def _relogin(self, rejected: PmsToken) -> dict[str, str]:
+        """Auth headers to retry with after the PMS refused `rejected`"""
+        token = await self.tokens.invalidate(rejected)
+        return token.headers
 
     def _parse_response(self, response: dict[str, Any]) -> dict[str, Any]:
+        """Turn a /calendar/detail response into free-night masks per room.
+
+        Dates are handled as integer day offsets from the window start, and each
+        room's reservations are OR-ed into a single int bitmask, so a busy
+        calendar costs one `date.fromisoformat` per distinct date string rather
+        than a `strptime`/`strftime` per reserved night.
+        """
         received_version = response.get("version", "1.0")
         try:
-            start_dt = datetime.strptime(response["startDate"], "%Y-%m-%d")
-            end_dt = datetime.strptime(response["endDate"], "%Y-%m-%d")
-
-            # Generate all dates in range
-            all_dates = []
-            current_date = start_dt
-            while current_date <= end_dt:
-                all_dates.append(current_date.strftime("%Y-%m-%d"))
-                current_date += timedelta(days=1)
-
-            # Build room ID to room number mapping
-            room_id_to_number = {}
-            for room in response.get("roomList", []):
-                room_id_to_number[room["id"]] = room["roomNo"]
-
-            # Initialize rooms availability
-            rooms_availability = {}
+            window_start = to_ordinal(response["startDate"])
+            # Every night in the window, [startDate, endDate]
+            window_days = to_ordinal(response["endDate"]) - window_start + 1
+            all_nights = (1 << window_days) - 1 if window_days > 0 else 0
+
+            # Single pass over rooms, grouped by type
             room_list = response.get("roomList", [])
-            for room_type in response.get("roomTypeList", []):
-                rooms = [
-                    room for room in room_list if room["roomTypeId"] == room_type["id"]
-                ]
-                for room in rooms:
-                    room_number = room_id_to_number.get(room["id"])
-                    if room_number is None:
-                        continue
-                    room_no = room_number.lower()
-                    rooms_availability[room_no] = {
-                        "room_id": room["id"],
-                        "room_no": room_no,
-                        "room_type_id": room["roomTypeId"],
-                        "room_type_name": room_type["name"],
-                        "dates": set(all_dates),
-                    }
+            room_id_to_number: dict[str, str] = {}
+            rooms_by_type: dict[str, list[_PmsRawRoom]] = {}
+            for room in room_list:
+                room_id_to_number[room["id"]] = room["roomNo"].lower()
+                rooms_by_type.setdefault(room["roomTypeId"], []).append(room)
 
-            # Traverse reservationRoomList to collect reserved dates
+            # Traverse reservationRoomList to build one reserved-nights bitmask per room
             # Note: PMS returns [] (empty list) instead of {} when there are no reservations
             reservation_room_list = response.get("reservationRoomList", {})
             if not isinstance(reservation_room_list, dict):
                 reservation_room_list = {}
-            for room_type_id, rooms_dict in reservation_room_list.items():
+
+            offsets: dict[str, int] = {}  # date string → day offset from window start
+
+            def day_offset(day: str) -> int:
+                offset = offsets.get(day)
+                if offset is None:
+                    offset = offsets[day] = to_ordinal(day) - window_start
+                return offset
+
+            reserved_by_room: dict[str, int] = {}
+            for rooms_dict in reservation_room_list.values():
                 if not isinstance(rooms_dict, dict):
                     continue
                 for room_id, dates_dict in rooms_dict.items():
-                    room_number = room_id_to_number.get(room_id)
-                    if room_number:
-                        room_number = room_number.lower()
-                        for date_key, reservations in dates_dict.items():
-                            for reservation in reservations:
-                                check_in = datetime.strptime(
-                                    reservation["checkIn"], "%Y-%m-%d"
-                                )
-                                check_out = datetime.strptime(
-                                    reservation["checkOut"], "%Y-%m-%d"
-                                )
-                                current = check_in
-                                while current < check_out:
-                                    reserved_date_str = current.strftime("%Y-%m-%d")
-                                    if (
-                                        reserved_date_str
-                                        in rooms_availability[room_number]["dates"]
-                                    ):
-                                        rooms_availability[room_number][
-                                            "dates"
-                                        ].discard(reserved_date_str)
-                                    current += timedelta(days=1)
-
-            # Standardize output for single window
-            for room_number in rooms_availability:
-                rooms_availability[room_number]["dates"] = sorted(
-                    list(rooms_availability[room_number]["dates"])
-                )
+                    room_no = room_id_to_number.get(room_id)
+                    if not room_no:
+                        continue
+                    reserved = reserved_by_room.get(room_no, 0)
+                    # The same reservation is repeated under every date key it spans
+                    seen: set[tuple[str, str]] = set()
+                    for reservations in dates_dict.values():
+                        for reservation in reservations:
+                            stay = (reservation["checkIn"], reservation["checkOut"])
+                            if stay in seen:
+                                continue
+                            seen.add(stay)
+                            first = max(day_offset(stay[0]), 0)
+                            last = min(day_offset(stay[1]), window_days)
+                            if last > first:
+                                reserved |= ((1 << (last - first)) - 1) << first
+                    reserved_by_room[room_no] = reserved
+
+            rooms_availability: dict[str, _PmsRoomAvailabilityInternal] = {}
+            for room_type in response.get("roomTypeList", []):
+                for room in rooms_by_type.get(room_type["id"], []):
+                    room_no = room_id_to_number[room["id"]]
+                    free_nights = all_nights & ~reserved_by_room.get(room_no, 0)
+                    rooms_availability[room_no] = {
+                        "room_id": room["id"],
+                        "room_no": room_no,
+                        "room_type_id": room["roomTypeId"],
+                        "room_type_name": room_type["name"],
+                        "dates": AvailabilityMask.from_bits(window_start, free_nights),
+                    }
 
             return {
                 "from_date": response.get("startDate"),
@@ -237,3 +337,8 @@ class PmsClient:
 
 # Create the singleton instance
 pms_client = PmsClient()
+
+
+def _content_hash(response: httpx.Response) -> str:
+    """Hash of the raw body, for PMS responses that ignore conditional headers."""
+    return hashlib.blake2b(response.content, digest_size=16).hexdigest()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import jwt
+
+from core.cache_backend import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PmsToken:
+    value: str
+    expires_at: float  # Unix timestamp
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.value}", "Access-Token": self.value}
+
+    def expires_in(self, now: float | None = None) -> float:
+        return self.expires_at - (time.time() if now is None else now)
+
+
+def jwt_expiry(token: str) -> float | None:
+    """The `exp` claim of `token` if it is a JWT that has one, else None.
+
+    The signature is not verified: we only use the claim to schedule a
+    refresh, and the PMS still checks the token on every request.
+    """
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return None
+    exp = claims.get("exp")
+    return float(exp) if isinstance(exp, int | float) else None
+
+
+class PmsTokenManager:
+    """Holds the PMS access token and renews it before it expires.
+
+    The expiry is read from the token's JWT `exp` claim, falling back to
+    `default_ttl_seconds` for opaque tokens. A background task renews the
+    token up to `refresh_margin_seconds` before it expires, so requests only
+    block on a login when that renewal failed. Tokens are shared through the
+    cache backend: a worker that starts cold, or whose token is about to
+    expire, first takes a newer one another worker got.
+
+    Used as an async context manager, entered by `PmsClient`.
+    """
+
+    MIN_VALIDITY_SECONDS = 60  # A token closer to expiry than this is not handed out
+    RETRY_SECONDS = 30  # Wait before retrying a failed background renewal
+
+    def __init__(
+        self,
+        login: Callable[[], Awaitable[str]],
+        cache_key: str,
+        backend: CacheBackend | None = None,
+        default_ttl_seconds: float = 3600,
+        refresh_margin_seconds: float = 300,
+    ) -> None:
+        self.login = login
+        self.cache_key = cache_key
+        self.backend = backend
+        self.default_ttl_seconds = default_ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.token: PmsToken | None = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> PmsTokenManager:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="pms-token-refresh")
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def get(self) -> PmsToken:
+        """A token valid for at least `MIN_VALIDITY_SECONDS`, logging in if needed."""
+        token = self.token
+        if token is not None and self._usable(token):
+            return token
+        return await self._renew(self._usable)
+
+    async def invalidate(self, rejected: PmsToken) -> PmsToken:
+        """Replace a token the PMS refused, unless another caller already did."""
+
+        def accept(token: PmsToken) -> bool:
+            return token.value != rejected.value and self._usable(token)
+
+        if self.backend is not None and self.token == rejected:
+            try:
+                await self.backend.delete(self.cache_key)
+            except Exception as e:
+                logger.warning("PMS: could not drop shared token: %s", e)
+        return await self._renew(accept)
+
+    async def _renew(self, accept: Callable[[PmsToken], bool]) -> PmsToken:
+        async with self._lock:
+            # Another caller, or another worker, may have renewed it meanwhile
+            if self.token is not None and accept(self.token):
+                return self.token
+            shared = await self._load_shared()
+            if shared is not None and accept(shared):
+                self.token = shared
+                return shared
+
+            logger.info("PMS: Logging in to get new access token...")
+            value = await self.login()
+            expires_at = jwt_expiry(value) or time.time() + self.default_ttl_seconds
+            self.token = PmsToken(value, expires_at)
+            await self._save_shared(self.token)
+            return self.token
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._renew(self._fresh)
+                delay = self._next_refresh_delay()
+            except Exception as e:
+                logger.warning("PMS: background token refresh failed: %s", e)
+                delay = self.RETRY_SECONDS
+            await asyncio.sleep(delay)
+
+    def _next_refresh_delay(self) -> float:
+        assert self.token is not None
+        # Jitter spreads the renewals of workers holding the same shared token, so
+        # the first one logs in and the rest pick its token up from the backend
+        margin = self.refresh_margin_seconds * random.uniform(0.5, 1)
+        return max(self.token.expires_in() - margin, self.MIN_VALIDITY_SECONDS / 2)
+
+    def _usable(self, token: PmsToken) -> bool:
+        return token.expires_in() > self.MIN_VALIDITY_SECONDS
+
+    def _fresh(self, token: PmsToken) -> bool:
+        return token.expires_in() > self.refresh_margin_seconds
+
+    async def _load_shared(self) -> PmsToken | None:
+        if self.backend is None:
+            return None
+        try:
+            raw = await self.backend.get(self.cache_key)
+            return PmsToken(**json.loads(raw)) if raw is not None else None
+        except Exception as e:
+            logger.warning("PMS: could not read shared token: %s", e)
+            return None
+
+    async def _save_shared(self, token: PmsToken) -> None:
+        ttl = token.expires_in() - self.MIN_VALIDITY_SECONDS
+        if self.backend is None or ttl <= 0:
+            return
+        try:
+            payload = {"value": token.value, "expires_at": token.expires_at}
+            await self.backend.set(self.cache_key, json.dumps(payload).encode(), ttl)
+        except Exception as e:
+            logger.warning("PMS: could not share token: %s", e)
@@ -0,0 +1,206 @@
+"""Load shedding for an upstream API: adaptive concurrency plus a circuit breaker."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from enum import StrEnum
+from typing import Any
+
+import httpx
+
+
+class UpstreamUnavailableError(Exception):
+    """A request was refused locally, without being sent to the upstream."""
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Raised instead of calling an upstream that the breaker considers down."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"{name} circuit is open, retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class AdaptiveLimiter:
+    """AIMD cap on concurrent requests, tracking what the upstream can take.
+
+    The limit grows by ~1 per limit's worth of fast successes (additive
+    increase) and halves on a failure or a response slower than
+    `latency_threshold_seconds` (multiplicative decrease), at most once per
+    `backoff_interval_seconds` so one burst of timeouts doesn't floor it.
+    Callers wait up to `queue_timeout_seconds` for a slot, then fail.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_threshold_seconds: float,
+        queue_timeout_seconds: float,
+        backoff_interval_seconds: float = 1.0,
+    ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold_seconds = latency_threshold_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.backoff_interval_seconds = backoff_interval_seconds
+        self.in_flight = 0
+        self._last_backoff = 0.0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    async def acquire(self) -> None:
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands the slot over by resolving the future
+            await asyncio.wait_for(waiter, self.queue_timeout_seconds)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release(0, None)  # Handed a slot just as we gave up
+            else:
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: float, ok: bool | None) -> None:
+        """Free a slot; `ok=None` (e.g. cancelled) leaves the limit as it is."""
+        self.in_flight -= 1
+        if ok and latency <= self.latency_threshold_seconds:
+            self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+        elif ok is not None:
+            now = time.monotonic()
+            if now - self._last_backoff >= self.backoff_interval_seconds:
+                self._last_backoff = now
+                self.limit = max(self.limit / 2, self.min_limit)
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class BreakerState(StrEnum):
+    CLOSED = "closed"  # Requests flow
+    OPEN = "open"  # Requests fail fast until the reset timeout
+    HALF_OPEN = "half_open"  # One probe request decides whether to close
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures.
+
+    While open, `before_call` raises `CircuitOpenError` without touching the
+    network. After `reset_timeout_seconds` one probe is let through: success
+    closes the breaker, failure opens it for another timeout.
+    """
+
+    def __init__(
+        self, name: str, failure_threshold: int, reset_timeout_seconds: float
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.times_opened = 0
+        self._probing = False
+
+    def before_call(self) -> None:
+        if self.state is BreakerState.OPEN:
+            assert self.opened_at is not None
+            retry_in = self.opened_at + self.reset_timeout_seconds - time.monotonic()
+            if retry_in > 0:
+                raise CircuitOpenError(self.name, retry_in)
+            self.state = BreakerState.HALF_OPEN
+        if self.state is BreakerState.HALF_OPEN:
+            if self._probing:
+                raise CircuitOpenError(self.name, 0)
+            self._probing = True
+
+    def record_success(self) -> None:
+        self._probing = False
+        self.consecutive_failures = 0
+        self.state = BreakerState.CLOSED
+        self.opened_at = None
+
+    def cancel_probe(self) -> None:
+        """Let another request probe, this one ended without an answer."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.consecutive_failures += 1
+        if (
+            self.state is BreakerState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state is not BreakerState.OPEN:
+                self.times_opened += 1
+            self.state = BreakerState.OPEN
+            self.opened_at = time.monotonic()
+
+
+class UpstreamGuard:
+    """Breaker plus limiter around every attempt sent to one upstream.
+
+    Only upstream trouble counts as a failure: timeouts, transport errors and
+    5xx/429 responses. Other 4xx (e.g. an expired token) say nothing about
+    its health, and a 304 is a success.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, limiter: AdaptiveLimiter) -> None:
+        self.breaker = breaker
+        self.limiter = limiter
+
+    @contextlib.asynccontextmanager
+    async def attempt(self) -> AsyncIterator[None]:
+        self.breaker.before_call()
+        try:
+            await self.limiter.acquire()
+        except TimeoutError:
+            self.breaker.cancel_probe()
+            raise UpstreamUnavailableError(
+                f"{self.breaker.name} is saturated: no request slot freed up in "
+                f"{self.limiter.queue_timeout_seconds:.0f}s"
+            ) from None
+        started = time.monotonic()
+        ok: bool | None = None  # None: cancelled, says nothing about the upstream
+        try:
+            yield
+            ok = True
+        except httpx.HTTPStatusError as e:
+            ok = not _is_upstream_failure(e.response.status_code)
+            raise
+        except Exception:
+            ok = False
+            raise
+        finally:
+            if ok is None:
+                self.breaker.cancel_probe()
+            elif ok:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            self.limiter.release(time.monotonic() - started, ok)
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "breaker_state": str(self.breaker.state),
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "times_opened": self.breaker.times_opened,
+            "concurrency_limit": int(self.limiter.limit),
+            "in_flight": self.limiter.in_flight,
+        }
+
+
+def _is_upstream_failure(status_code: int) -> bool:
+    return status_code >= 500 or status_code == 429
@@ -0,0 +1,34 @@
+import asyncio
+from collections.abc import Callable, Coroutine, Hashable
+from typing import Any
+
+
+class SingleFlight[K: Hashable, T]:
+    """Coalesce concurrent calls for the same key into a single in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and share its result (or exception).
+    Once the task finishes the key is forgotten, so the next call starts fresh.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[K, asyncio.Task[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: K, fn: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # Shield so one caller being cancelled doesn't cancel the request for everyone else
+        return await asyncio.shield(task)
+
+    def _forget(self, key: K, task: asyncio.Task[T]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -4,7 +4,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from agent.clients.pms_client import PmsClient, pms_client
 from agent.services.room_availability_service import RoomAvailabilityService
+from agent.services.room_catalog import (
+    RoomCatalog,
+    RoomCatalogSnapshot,
+    room_catalog,
+)
 from agent.services.room_service import RoomService
+from agent.types import InternalRoom
 from db.database import AsyncSessionLocal
 
 
@@ -19,6 +25,7 @@ class AgentServiceProvider:
 
     # ── Singletons ──
     pms: PmsClient = pms_client
+    room_catalog: RoomCatalog = room_catalog
 
     # ── Scoped Services ──
     db_session: AsyncSession = field(default_factory=AsyncSessionLocal)
@@ -27,5 +34,20 @@ class AgentServiceProvider:
     )
     room_service: RoomService = field(init=False)
 
+    # ── Per-run snapshot, pinned by context_node ──
+    catalog: RoomCatalogSnapshot | None = None
+
     def __post_init__(self) -> None:
         self.room_service = RoomService(db=self.db_session)
+
+    @property
+    def loaded_catalog(self) -> RoomCatalogSnapshot:
+        if self.catalog is None:
+            raise RuntimeError("Room catalog not loaded; context_node must run first")
+        return self.catalog
+
+    @property
+    def rooms(self) -> dict[str, InternalRoom]:
+        """Room catalog for this run, keyed by lowercase room name. Read-only:
+        the same dict is shared by every run until the catalog is invalidated."""
+        return self.loaded_catalog.rooms
@@ -1,9 +1,15 @@
+from collections.abc import Awaitable, Callable
 from typing import Any
 
+from langchain_core.messages import ToolMessage
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.prebuilt import ToolNode
+from langgraph.prebuilt.tool_node import ToolCallRequest
+from langgraph.types import Command
 
 from agent.tools.exceptions import ToolValidationError
 from agent.tools.search_available_rooms import search_available_rooms
+from core.tracing import tracer
 
 
 def tool_error_handler(error: Exception) -> str:
@@ -14,13 +20,29 @@ def tool_error_handler(error: Exception) -> str:
             return f"Unexpected system error: {error}"
 
 
+async def trace_tool_call(
+    request: ToolCallRequest,
+    execute: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command[Any]]],
+) -> ToolMessage | Command[Any]:
+    with tracer.span(f"tool.{request.tool_call['name']}") as span:
+        result = await execute(request)
+        # handle_tool_errors turns failures into messages, so flag them here
+        if span is not None and isinstance(result, ToolMessage):
+            if result.status == "error":
+                span.error = str(result.content)
+        return result
+
+
 tools = [search_available_rooms]
-tool_node = ToolNode(tools, handle_tool_errors=tool_error_handler).with_retry(
+tool_node = ToolNode(
+    tools, handle_tool_errors=tool_error_handler, awrap_tool_call=trace_tool_call
+).with_retry(
     stop_after_attempt=3,
     wait_exponential_jitter=True,
 )
 
 _model_with_tools: Any = None
+_summary_model: Any = None
 
 
 def get_model_with_tools() -> Any:
@@ -39,3 +61,24 @@ def get_model_with_tools() -> Any:
         )
         _model_with_tools = model.bind_tools(tools)
     return _model_with_tools
+
+
+def get_summary_model() -> Any:
+    """Tool-less model for folding old turns into the rolling summary.
+
+    Tagged `nostream` so its tokens never reach the guest's message stream.
+    """
+    global _summary_model
+    if _summary_model is None:
+        from langchain_openai import ChatOpenAI
+
+        from core.config import settings
+
+        model = ChatOpenAI(
+            model="openai/gpt-5.1-instant",
+            temperature=0,
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+        )
+        _summary_model = model.with_config(tags=[TAG_NOSTREAM])
+    return _summary_model
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+from typing import Any, cast
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langgraph.runtime import Runtime
+
+from agent.context.agent_service_provider import AgentServiceProvider
+from agent.nodes.context import context_node
+from agent.services.room_catalog import RoomCatalogSnapshot
+from agent.state import State
+from agent.types import InternalRoom
+
+
+def _provider(snapshot: RoomCatalogSnapshot) -> AgentServiceProvider:
+    provider = AgentServiceProvider(db_session=MagicMock())
+    catalog = SimpleNamespace(get=AsyncMock(return_value=snapshot))
+    provider.room_catalog = cast(Any, catalog)
+    return provider
+
+
+def _snapshot(version: str) -> RoomCatalogSnapshot:
+    room = cast(InternalRoom, {"room_name": "S1", "room_type": "Villa"})
+    return RoomCatalogSnapshot(version=version, rooms={"s1": room})
+
+
+class TestContextNode:
+    # Scenario 1: Rooms are pinned on the run context; state only gets the version
+    @pytest.mark.asyncio
+    async def test_writes_only_the_version(self):
+        snapshot = _snapshot("v1")
+        provider = _provider(snapshot)
+
+        update = await context_node(
+            cast(State, {"messages": []}), Runtime(context=provider)
+        )
+
+        assert update == {"rooms_version": "v1"}
+        assert provider.catalog is snapshot
+        assert provider.rooms == snapshot.rooms
+
+    # Scenario 2: An unchanged catalog writes nothing to state
+    @pytest.mark.asyncio
+    async def test_unchanged_version_writes_nothing(self):
+        snapshot = _snapshot("v1")
+        provider = _provider(snapshot)
+
+        update = await context_node(
+            cast(State, {"messages": [], "rooms_version": "v1"}),
+            Runtime(context=provider),
+        )
+
+        assert update == {}
+        assert provider.catalog is snapshot
+
+    # Scenario 3: A new catalog version replaces the one in state
+    @pytest.mark.asyncio
+    async def test_new_version_is_written(self):
+        provider = _provider(_snapshot("v2"))
+
+        update = await context_node(
+            cast(State, {"messages": [], "rooms_version": "v1"}),
+            Runtime(context=provider),
+        )
+
+        assert update == {"rooms_version": "v2"}
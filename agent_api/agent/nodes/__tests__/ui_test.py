@@ -0,0 +1,90 @@
+from typing import Any, cast
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.runtime import Runtime
+
+from agent.context.agent_service_provider import AgentServiceProvider
+from agent.nodes import ui
+from agent.services.room_catalog import RoomCatalogSnapshot
+from agent.state import State
+from agent.types import InternalRoom
+
+
+def _room(room_id: int, room_name: str) -> InternalRoom:
+    return {
+        "id": room_id,
+        "room_name": room_name,
+        "room_type": "Villa",
+        "summary": "Sea view villa",
+        "bed_queen": 1,
+        "bed_single": 0,
+        "baths": 1,
+        "size": 40.0,
+        "price_weekdays": 3000.0,
+        "price_weekends_holidays": 3500.0,
+        "price_ny_songkran": 4500.0,
+        "max_guests": 2,
+        "steps_to_beach": 10,
+        "sea_view": 5,
+        "privacy": 4,
+        "steps_to_restaurant": 20,
+        "room_design": 4,
+        "room_newness": 3,
+        "tags": ["quiet"],
+        "thumbnail_url": f"/static/photos/{room_name}.jpg",
+        "photos": [],
+    }
+
+
+@pytest.fixture
+def pushed(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    # push_ui_message needs a running graph to write to; capture what it's given
+    push = MagicMock()
+    monkeypatch.setattr(ui, "push_ui_message", push)
+    return push
+
+
+def _runtime(rooms: dict[str, InternalRoom]) -> Runtime[AgentServiceProvider]:
+    provider = AgentServiceProvider(db_session=MagicMock())
+    provider.catalog = RoomCatalogSnapshot(version="v1", rooms=rooms)
+    return Runtime(context=provider)
+
+
+class TestPushPendingSearchResultsUi:
+    # Scenario 1: Cards come from the run's pinned catalog, dates merged per room
+    def test_builds_cards_from_runtime_rooms(self, pushed):
+        runtime = _runtime({"s1": _room(18, "S1"), "s2": _room(19, "S2")})
+        state = cast(
+            State,
+            {
+                "messages": [AIMessage("Here you go")],
+                "pending_render_search_results": [
+                    {"s1": [{"start": "2026-04-10", "end": "2026-04-11"}]},
+                    {"s1": [{"start": "2026-04-12", "end": "2026-04-12"}]},
+                ],
+                "pending_search_range": {"start": "2026-04-10", "end": "2026-04-13"},
+            },
+        )
+
+        update = ui.push_pending_search_results_ui_node(state, runtime)
+
+        assert update == {
+            "pending_render_search_results": "clear",
+            "pending_search_range": None,
+        }
+        props: dict[str, Any] = pushed.call_args.kwargs["props"]
+        [card] = props["rooms"]
+        assert card["id"] == 18
+        assert card["room_name"] == "S1"
+        assert card["thumbnail_url"] == "/static/photos/S1.jpg"
+        assert card["date_ranges"] == [{"start": "2026-04-10", "end": "2026-04-12"}]
+        assert props["search_range"] == {"start": "2026-04-10", "end": "2026-04-13"}
+
+    # Scenario 2: Nothing pending, nothing pushed
+    def test_no_pending_results(self, pushed):
+        state = cast(State, {"messages": [], "pending_render_search_results": []})
+
+        assert ui.push_pending_search_results_ui_node(state, _runtime({})) is None
+        pushed.assert_not_called()
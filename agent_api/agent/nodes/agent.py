@@ -1,15 +1,24 @@
 from typing import Any
 
 from langchain_core.messages import SystemMessage
+from langgraph.runtime import Runtime
 
+from agent.context.agent_service_provider import AgentServiceProvider
 from agent.model import get_model_with_tools
 from agent.prompt import get_prompt
 from agent.state import State
+from agent.utils.history import unsummarized_messages
+from core.tracing import traced
 
 
-async def agent_node(state: State) -> dict[str, Any]:
-    prompt = get_prompt(state)
+@traced("node.agent")
+async def agent_node(
+    state: State, runtime: Runtime[AgentServiceProvider]
+) -> dict[str, Any]:
+    prompt = get_prompt(state, runtime.context.loaded_catalog)
+    # Turns folded into the summary are only sent through the prompt
+    history = unsummarized_messages(state["messages"], state.get("summarized_until"))
     response = await get_model_with_tools().ainvoke(
-        [SystemMessage(content=prompt)] + state["messages"]
+        [SystemMessage(content=prompt)] + history
     )
     return {"messages": [response]}
@@ -1,31 +1,35 @@
 import uuid
-from datetime import date, timedelta
 from typing import Any
 
 from langgraph.graph.ui import push_ui_message
+from langgraph.runtime import Runtime
 
+from agent.context.agent_service_provider import AgentServiceProvider
 from agent.state import State
 from agent.types import MAP_SRC, ROOM_PIN_POSITIONS, RoomCard
+from agent.utils.availability_mask import EMPTY_MASK, AvailabilityMask
+from core.tracing import traced
 
 
-def push_pending_search_results_ui_node(state: State) -> dict[str, Any] | None:
+@traced("node.push_pending_search_results_ui")
+def push_pending_search_results_ui_node(
+    state: State, runtime: Runtime[AgentServiceProvider]
+) -> dict[str, Any] | None:
     pending_search_results = state["pending_render_search_results"]
     if not pending_search_results:
         return None
 
     # merge rooms
-    merged = {}
+    merged: dict[str, AvailabilityMask] = {}
     for result_dict in pending_search_results:
-        for room_name, dates in result_dict.items():
-            if room_name not in merged:
-                merged[room_name] = set(dates)
-            else:
-                merged[room_name].update(set(dates))
+        for room_name, date_ranges in result_dict.items():
+            dates = AvailabilityMask.from_date_ranges(date_ranges)
+            merged[room_name] = merged.get(room_name, EMPTY_MASK) | dates
 
     # populate room cards
     room_cards: list[RoomCard] = []
     for room_name, dates in merged.items():
-        room = state["rooms"][room_name]
+        room = runtime.context.rooms[room_name]
         room_cards.append(
             {
                 "id": room["id"],
@@ -49,7 +53,7 @@ def push_pending_search_results_ui_node(state: State) -> dict[str, Any] | None:
                 "tags": room["tags"],
                 "thumbnail_url": room["thumbnail_url"],
                 "photos": room["photos"],
-                "date_ranges": dates_to_ranges(dates),
+                "date_ranges": dates.to_date_ranges(),
             }
         )
 
@@ -72,20 +76,3 @@ def push_pending_search_results_ui_node(state: State) -> dict[str, Any] | None:
         "pending_render_search_results": "clear",
         "pending_search_range": None,
     }
-
-
-def dates_to_ranges(dates: set[str]) -> list[dict[str, str]]:
-    if not dates:
-        return []
-    sorted_dates = sorted(dates)
-    ranges: list[dict[str, str]] = []
-    start = end = sorted_dates[0]
-    for d in sorted_dates[1:]:
-        end_next = date.fromisoformat(end) + timedelta(days=1)
-        if date.fromisoformat(d) == end_next:
-            end = d
-        else:
-            ranges.append({"start": start, "end": end})
-            start = end = d
-    ranges.append({"start": start, "end": end})
-    return ranges
@@ -1,16 +1,16 @@
+from collections.abc import Sequence
 from datetime import datetime
+from functools import lru_cache
 
+from langchain_core.messages import AnyMessage, get_buffer_string
+
+from agent.services.room_catalog import RoomCatalogSnapshot
 from agent.state import State
 
 system_prompt = """
     You are Cooper (คูเปอร์), the hotel AI assistant for Tatoh Resort (ตาโต๊ะรีสอร์ท), Koh Tao.
     Always reply in the same language the user has been speaking. Address the user kindly as "คุณลูกค้า" when speaking Thai.
 
-    ## Context
-    Today is {today}
-    Available room names: {rooms}
-    Available room types: {room_types}
-
     ## Knowledge Rules
     - Hotel questions (rooms, availability, pricing, bookings, resort facilities): Use tools only. If no tool can answer it, say "I don't have that information — please contact us directly."
     - Koh Tao questions (island, activities, diving, transport, local tips): Use tools first. If no tool applies, you may draw on general knowledge.
@@ -27,12 +27,50 @@ system_prompt = """
     - When asking for missing info, ask naturally in one sentence. Don't narrate internal actions.
 """
 
+# Kept after the static prompt above so its prefix is byte-identical on every
+# call and can be served from the provider's prompt cache
+context_section = """
+    ## Context
+    Today is {today}
+    Available room names: {rooms}
+    Available room types: {room_types}
+"""
+
+summary_section = """
+    ## Earlier in this conversation
+    {summary}
+"""
+
+summary_prompt = """
+    You keep a running summary of a chat between a hotel guest and Cooper, the Tatoh Resort assistant.
+    Merge the existing summary and the new messages into one updated summary.
+    Keep what is needed to continue helping the guest: dates, number of guests, rooms or room types discussed, availability found, selections, preferences and open questions.
+    Drop greetings and small talk. Write in English, at most 200 words. Output only the summary.
+"""
+
+
+def get_prompt(state: State, catalog: RoomCatalogSnapshot) -> str:
+    prompt = _base_prompt(datetime.now().strftime("%Y-%m-%d"), catalog)
+    if summary := state.get("conversation_summary"):
+        prompt += summary_section.format(summary=summary)
+    return prompt
+
+
+@lru_cache(maxsize=8)
+def _base_prompt(today: str, catalog: RoomCatalogSnapshot) -> str:
+    """Static prompt + context; snapshots hash by version, so this is keyed by (date, version)."""
+    room_names = [room["room_name"] for room in catalog.rooms.values()]
+    room_types = [room["room_type"] for room in catalog.rooms.values()]
+    return system_prompt + context_section.format(
+        today=today, rooms=room_names, room_types=room_types
+    )
+
 
-def get_prompt(state: State) -> str:
-    room_names = [room["room_name"] for room in state["rooms"].values()]
-    room_types = [room["room_type"] for room in state["rooms"].values()]
-    return system_prompt.format(
-        today=datetime.now().strftime("%Y-%m-%d"),
-        rooms=room_names,
-        room_types=room_types,
+def get_summary_input(
+    previous_summary: str | None, messages: Sequence[AnyMessage]
+) -> str:
+    transcript = get_buffer_string(messages, human_prefix="Guest", ai_prefix="Cooper")
+    return (
+        f"Existing summary:\n{previous_summary or '(none)'}\n\n"
+        f"New messages:\n{transcript}"
     )
@@ -0,0 +1,139 @@
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from agent.clients.pms_client import WindowValidators
+from agent.clients.resilience import CircuitOpenError
+from agent.services.availability_cache import (
+    AvailabilityCache,
+    decode_window,
+    encode_window,
+)
+from agent.utils.availability_mask import AvailabilityMask
+from core.cache_backend import InProcessCacheBackend
+
+
+def _window(from_date: str, to_date: str) -> dict:
+    return {"from_date": from_date, "to_date": to_date, "rooms": {}, "version": "1.62"}
+
+
+class TestAvailabilityCache:
+    def test_get_returns_fresh_window_by_start_date(self):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        cache.put(_window("2026-04-10", "2026-04-23"))
+
+        window = cache.get("2026-04-10")
+
+        assert window is not None
+        assert window.end_date == "2026-04-23"
+
+    def test_find_covering_matches_any_day_inside_window(self):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        cache.put(_window("2026-04-10", "2026-04-23"))
+
+        assert cache.find_covering("2026-04-23") is not None
+        assert cache.find_covering("2026-04-24") is None
+
+    def test_entry_older_than_ttl_is_a_miss(self):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        cache.put(_window("2026-04-10", "2026-04-23"), fetched_at=time.time() - 61)
+
+        assert cache.get("2026-04-10") is None
+
+    def test_max_staleness_tightens_ttl_per_call(self):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        cache.put(_window("2026-04-10", "2026-04-23"), fetched_at=time.time() - 10)
+
+        assert cache.find_covering("2026-04-12") is not None
+        assert cache.find_covering("2026-04-12", max_staleness=5) is None
+        # 0 always misses so callers can force a PMS call
+        assert cache.find_covering("2026-04-12", max_staleness=0) is None
+
+    def test_least_recently_used_window_is_evicted(self):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=2)
+        cache.put(_window("2026-04-10", "2026-04-23"))
+        cache.put(_window("2026-04-24", "2026-05-07"))
+        # Touch the first window so the second becomes least recently used
+        cache.get("2026-04-10")
+        cache.put(_window("2026-05-08", "2026-05-21"))
+
+        assert len(cache) == 2
+        assert cache.get("2026-04-10") is not None
+        assert cache.get("2026-04-24") is None
+
+
+def _room_window(from_date: str, to_date: str) -> dict:
+    window = _window(from_date, to_date)
+    window["rooms"] = {
+        "v1": {
+            "room_id": "r1",
+            "room_no": "v1",
+            "room_type_id": "t1",
+            "room_type_name": "Villa",
+            "dates": AvailabilityMask.from_range("2026-04-12", "2026-04-15"),
+        }
+    }
+    window["validators"] = WindowValidators('"abc"', None, "hash")
+    return window
+
+
+class TestSharedAvailabilityCache:
+    def test_window_round_trips_through_bytes(self):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        window = cache.put(_room_window("2026-04-10", "2026-04-23"), fetched_at=123.5)
+
+        decoded = decode_window(encode_window(window))
+
+        assert decoded == window
+
+    @pytest.mark.asyncio
+    async def test_refresh_reuses_window_fetched_by_another_worker(self):
+        backend = InProcessCacheBackend()
+        other_worker = AvailabilityCache(ttl_seconds=60, max_entries=4, backend=backend)
+        this_worker = AvailabilityCache(ttl_seconds=60, max_entries=4, backend=backend)
+        client = AsyncMock()
+        client.fetch_room_availability_window.return_value = _room_window(
+            "2026-04-10", "2026-04-23"
+        )
+
+        fetched = await other_worker.refresh(client, "2026-04-10")
+        reused = await this_worker.refresh(client, "2026-04-10")
+
+        assert client.fetch_room_availability_window.await_count == 1
+        assert reused.fetched_at == fetched.fetched_at
+        assert this_worker.get("2026-04-10") is not None
+
+    @pytest.mark.asyncio
+    async def test_stale_shared_window_is_revalidated_not_refetched(self):
+        backend = InProcessCacheBackend()
+        other_worker = AvailabilityCache(ttl_seconds=60, max_entries=4, backend=backend)
+        this_worker = AvailabilityCache(ttl_seconds=60, max_entries=4, backend=backend)
+        client = AsyncMock()
+        client.fetch_room_availability_window.return_value = _room_window(
+            "2026-04-10", "2026-04-23"
+        )
+        client.revalidate_room_availability_window.return_value = None
+        await other_worker.refresh(client, "2026-04-10")
+
+        # max_staleness=0 rejects the shared copy as-is but keeps its validators
+        window = await this_worker.refresh(client, "2026-04-10", max_staleness=0)
+
+        assert client.fetch_room_availability_window.await_count == 1
+        client.revalidate_room_availability_window.assert_awaited_once()
+        assert len(window.data["rooms"]["v1"]["dates"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_expired_window_served_while_circuit_is_open(self):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        stale = cache.put(
+            _room_window("2026-04-10", "2026-04-23"), fetched_at=time.time() - 600
+        )
+        client = AsyncMock()
+        client.revalidate_room_availability_window.side_effect = CircuitOpenError(
+            "PMS", 30
+        )
+
+        assert await cache.refresh(client, "2026-04-12", serve_stale=True) is stale
+        with pytest.raises(CircuitOpenError):
+            await cache.refresh(client, "2026-04-12")
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from agent.services.availability_cache import AvailabilityCache
+from agent.services.availability_prefetcher import AvailabilityPrefetcher
+
+
+def _window_for(start_date: str) -> dict:
+    end = date.fromisoformat(start_date) + timedelta(days=13)
+    return {
+        "from_date": start_date,
+        "to_date": end.isoformat(),
+        "rooms": {},
+        "version": "1.62",
+    }
+
+
+@pytest.fixture
+def prefetcher():
+    p = AvailabilityPrefetcher(
+        enabled=True,
+        windows=3,
+        interval_seconds=60,
+        jitter_seconds=0,
+        max_backoff_seconds=300,
+        cache=AvailabilityCache(ttl_seconds=120, max_entries=16),
+    )
+    p.pms_client = AsyncMock()
+    p.pms_client.fetch_room_availability_window.side_effect = _window_for
+    return p
+
+
+class TestAvailabilityPrefetcher:
+    # Scenario 1: One refresh warms the next 3 windows starting today
+    @pytest.mark.asyncio
+    async def test_refresh_warms_upcoming_windows(self, prefetcher):
+        await prefetcher.refresh_once()
+
+        today = date.today()
+        assert prefetcher.pms_client.fetch_room_availability_window.call_count == 3
+        assert prefetcher.cache.find_covering(today.isoformat()) is not None
+        assert (
+            prefetcher.cache.find_covering((today + timedelta(days=41)).isoformat())
+            is not None
+        )
+
+    # Scenario 2: PMS keeps failing — wait doubles each time, capped at max backoff
+    def test_backoff_grows_and_is_capped(self, prefetcher):
+        assert prefetcher.next_delay(0) == 60
+        assert prefetcher.next_delay(1) == 120
+        assert prefetcher.next_delay(2) == 240
+        assert prefetcher.next_delay(5) == 300
+
+    # Scenario 3: Disabled prefetcher never starts a task
+    @pytest.mark.asyncio
+    async def test_disabled_prefetcher_does_nothing(self, prefetcher):
+        prefetcher.enabled = False
+
+        async with prefetcher:
+            assert prefetcher._task is None
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from agent.services.availability_cache import AvailabilityCache
+from agent.services.availability_snapshot import AvailabilitySnapshotter
+from agent.utils.availability_mask import AvailabilityMask
+
+
+def _window(from_date: str, to_date: str) -> dict:
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "rooms": {
+            "s5": {
+                "room_id": "r1",
+                "room_no": "s5",
+                "room_type_id": "rt1",
+                "room_type_name": "Sea View Bungalow",
+                "dates": AvailabilityMask.from_range(from_date, to_date),
+            }
+        },
+        "version": "1.62",
+    }
+
+
+class TestAvailabilitySnapshot:
+    # Scenario 1: Windows survive a restart with their original fetch times
+    def test_round_trip_keeps_fetch_times_and_lru_order(self):
+        before = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        before.put(_window("2026-04-10", "2026-04-23"), fetched_at=time.time() - 30)
+        before.put(_window("2026-04-24", "2026-05-07"), fetched_at=time.time() - 90)
+
+        after = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        restored = after.load_snapshot(before.dump_snapshot(), max_age_seconds=3600)
+
+        assert restored == 2
+        assert after.get("2026-04-10") == before.get("2026-04-10")
+        # Still expired: TTLs run from the original fetch, not the restart
+        assert after.get("2026-04-24") is None
+        assert after.latest_covering("2026-04-25") is not None
+
+    # Scenario 2: Windows too old to be worth revalidating are dropped
+    def test_drops_windows_past_max_age(self):
+        before = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        before.put(_window("2026-04-10", "2026-04-23"), fetched_at=time.time() - 7200)
+
+        after = AvailabilityCache(ttl_seconds=60, max_entries=4)
+
+        assert after.load_snapshot(before.dump_snapshot(), max_age_seconds=3600) == 0
+        assert len(after) == 0
+
+    # Scenario 3: Saved on shutdown, loaded on the next startup
+    @pytest.mark.asyncio
+    async def test_snapshotter_saves_on_exit_and_loads_on_enter(self, tmp_path):
+        path = tmp_path / "cache" / "availability.snapshot"
+        before = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        async with AvailabilitySnapshotter(path, interval_seconds=60, cache=before):
+            before.put(_window("2026-04-10", "2026-04-23"))
+
+        after = AvailabilityCache(ttl_seconds=60, max_entries=4)
+        async with AvailabilitySnapshotter(path, interval_seconds=60, cache=after):
+            assert after.get("2026-04-10") is not None
+
+    # Scenario 4: A corrupt snapshot is ignored rather than failing startup
+    @pytest.mark.asyncio
+    async def test_unreadable_snapshot_is_ignored(self, tmp_path):
+        path = tmp_path / "availability.snapshot"
+        path.write_bytes(b"garbage")
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=4)
+
+        assert await AvailabilitySnapshotter(path, 60, cache=cache).load() == 0
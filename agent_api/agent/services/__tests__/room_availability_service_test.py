@@ -1,9 +1,14 @@
+import asyncio
+import time
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock
 
 import pytest
 
+from agent.clients.pms_client import WindowValidators
+from agent.services.availability_cache import AvailabilityCache
 from agent.services.room_availability_service import RoomAvailabilityService
+from agent.utils.availability_mask import AvailabilityMask
 
 
 def _make_pms_response(from_date: str, to_date: str, rooms: dict) -> dict:
@@ -25,7 +30,7 @@ def _make_room(
         "room_no": room_no,
         "room_type_id": room_type_id,
         "room_type_name": room_type_name,
-        "dates": dates,
+        "dates": AvailabilityMask.from_dates(dates),
     }
 
 
@@ -44,8 +49,14 @@ def mock_pms_client():
 
 
 @pytest.fixture
-def service(mock_pms_client):
-    svc = RoomAvailabilityService()
+def shared_cache():
+    # Fresh cache per test so the process-wide singleton never leaks between tests
+    return AvailabilityCache(ttl_seconds=60, max_entries=16)
+
+
+@pytest.fixture
+def service(mock_pms_client, shared_cache):
+    svc = RoomAvailabilityService(cache=shared_cache)
     svc.pms_client = mock_pms_client
     return svc
 
@@ -89,8 +100,16 @@ class TestGetAvailability:
         assert "s5" in result
         assert "v2" in result
         # Dates should be clipped to only the 3 we asked for, not the full 14-day window
-        assert result["s5"]["dates"] == {"2026-04-10", "2026-04-11", "2026-04-12"}
-        assert result["v2"]["dates"] == {"2026-04-10", "2026-04-11", "2026-04-12"}
+        assert result["s5"]["dates"].to_date_strings() == {
+            "2026-04-10",
+            "2026-04-11",
+            "2026-04-12",
+        }
+        assert result["v2"]["dates"].to_date_strings() == {
+            "2026-04-10",
+            "2026-04-11",
+            "2026-04-12",
+        }
         # Should only call PMS once since the whole range fits in one window
         mock_pms_client.fetch_room_availability_window.assert_called_once()
 
@@ -121,7 +140,7 @@ class TestGetAvailability:
         result = await service.get_availability("2026-04-09", "2026-04-11")
 
         # Should only contain Apr 9 and Apr 10, even though PMS gave us 14 days
-        assert result["s5"]["dates"] == {"2026-04-09", "2026-04-10"}
+        assert result["s5"]["dates"].to_date_strings() == {"2026-04-09", "2026-04-10"}
 
     # Scenario 3: Room has some nights booked — only free dates appear
     # Room S5 has reservations on Apr 10 and Apr 12 (PMS already excluded them).
@@ -150,7 +169,7 @@ class TestGetAvailability:
         result = await service.get_availability("2026-04-09", "2026-04-13")
 
         # Only 2 of the 4 requested dates are free — the booked ones should not appear
-        assert result["s5"]["dates"] == {"2026-04-09", "2026-04-11"}
+        assert result["s5"]["dates"].to_date_strings() == {"2026-04-09", "2026-04-11"}
 
     # Scenario 4: Long search that spans 2 PMS windows
     # Guest searches Apr 20-26, but one PMS window only covers 14 days (Apr 9-22).
@@ -190,7 +209,7 @@ class TestGetAvailability:
         result = await service.get_availability("2026-04-20", "2026-04-26")
 
         # Should have all 6 dates merged from both windows
-        assert result["s5"]["dates"] == {
+        assert result["s5"]["dates"].to_date_strings() == {
             "2026-04-20",
             "2026-04-21",
             "2026-04-22",
@@ -201,6 +220,46 @@ class TestGetAvailability:
         # Confirm it took 2 PMS calls to cover the full range
         assert mock_pms_client.fetch_room_availability_window.call_count == 2
 
+    # Scenario 4b: Long search — all windows are fetched concurrently, not one by one
+    # Guest searches a full month (Apr 10 - May 11). That needs 3 PMS windows, which
+    # should all be in flight at the same time rather than awaited back to back.
+    @pytest.mark.asyncio
+    async def test_long_search_fetches_windows_concurrently(
+        self, service, mock_pms_client
+    ):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fetch_window(start_date: str) -> dict:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+            end = (start_dt + timedelta(days=13)).strftime("%Y-%m-%d")
+            return _make_pms_response(
+                start_date,
+                end,
+                {
+                    "s5": _make_room(
+                        "r1",
+                        "s5",
+                        "rt1",
+                        "Sea View Bungalow",
+                        _dates_range(start_date, 14),
+                    )
+                },
+            )
+
+        mock_pms_client.fetch_room_availability_window.side_effect = fetch_window
+
+        result = await service.get_availability("2026-04-10", "2026-05-11")
+
+        assert len(result["s5"]["dates"]) == 31
+        assert mock_pms_client.fetch_room_availability_window.call_count == 3
+        assert max_in_flight == 3
+
     # Scenario 5: Second search overlaps first — should use cache, no extra API call
     # First search fetches Apr 9-22 from PMS. Second search asks for Apr 11-14
     # which is already covered by the cached window. PMS should not be called again.
@@ -251,11 +310,179 @@ class TestGetAvailability:
         assert result == {}
 
 
+# ─── Shared cache across turns ───────────────────────────────────────────────
+# Each turn builds its own RoomAvailabilityService, but PMS windows are kept in a
+# process-wide cache so other turns/threads searching the same dates reuse them.
+
+
+class TestSharedAvailabilityCache:
+    # Scenario 1: Two turns search the same dates — only the first hits PMS
+    @pytest.mark.asyncio
+    async def test_next_turn_reuses_window_from_shared_cache(
+        self, service, mock_pms_client, shared_cache
+    ):
+        mock_pms_client.fetch_room_availability_window.return_value = (
+            _make_pms_response(
+                "2026-04-10",
+                "2026-04-23",
+                {
+                    "s5": _make_room(
+                        "r1",
+                        "s5",
+                        "rt1",
+                        "Sea View Bungalow",
+                        _dates_range("2026-04-10", 14),
+                    )
+                },
+            )
+        )
+        await service.get_availability("2026-04-10", "2026-04-13")
+
+        # A new turn gets a brand-new service, but the same shared cache
+        next_turn = RoomAvailabilityService(cache=shared_cache)
+        next_turn.pms_client = mock_pms_client
+        result = await next_turn.get_availability("2026-04-11", "2026-04-14")
+
+        assert result["s5"]["dates"].to_date_strings() == {
+            "2026-04-11",
+            "2026-04-12",
+            "2026-04-13",
+        }
+        mock_pms_client.fetch_room_availability_window.assert_called_once()
+
+    # Scenario 2: Cached window is older than the TTL — PMS is called again
+    @pytest.mark.asyncio
+    async def test_expired_window_is_refetched(
+        self, service, mock_pms_client, shared_cache
+    ):
+        pms_response = _make_pms_response(
+            "2026-04-10",
+            "2026-04-23",
+            {"s5": _make_room("r1", "s5", "rt1", "Sea View Bungalow", [])},
+        )
+        mock_pms_client.fetch_room_availability_window.return_value = pms_response
+        # Window fetched well beyond the 60s TTL
+        shared_cache.put(pms_response, fetched_at=0)
+
+        await service.get_availability("2026-04-10", "2026-04-13")
+
+        mock_pms_client.fetch_room_availability_window.assert_called_once()
+
+    # Scenario 3: Expired window is revalidated — PMS says unchanged, nothing is re-downloaded
+    @pytest.mark.asyncio
+    async def test_expired_window_unchanged_is_revalidated_not_refetched(
+        self, service, mock_pms_client, shared_cache
+    ):
+        pms_response = _make_pms_response(
+            "2026-04-10",
+            "2026-04-23",
+            {
+                "s5": _make_room(
+                    "r1",
+                    "s5",
+                    "rt1",
+                    "Sea View Bungalow",
+                    _dates_range("2026-04-10", 14),
+                )
+            },
+        )
+        pms_response["validators"] = WindowValidators(
+            etag='"v1"', last_modified=None, content_hash="abc"
+        )
+        shared_cache.put(pms_response, fetched_at=0)
+        # Mock: PMS answers 304 Not Modified
+        mock_pms_client.revalidate_room_availability_window.return_value = None
+
+        result = await service.get_availability("2026-04-10", "2026-04-13")
+
+        assert result["s5"]["dates"].to_date_strings() == {
+            "2026-04-10",
+            "2026-04-11",
+            "2026-04-12",
+        }
+        mock_pms_client.revalidate_room_availability_window.assert_called_once_with(
+            "2026-04-10", pms_response["validators"]
+        )
+        mock_pms_client.fetch_room_availability_window.assert_not_called()
+        # TTL restarted — the window is fresh again
+        assert shared_cache.get("2026-04-10") is not None
+
+    # Scenario 4: Past the soft TTL but within the hard TTL — served at once,
+    # refreshed in the background once however many searches hit it
+    @pytest.mark.asyncio
+    async def test_stale_window_served_while_revalidated(self, mock_pms_client):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=16, stale_ttl_seconds=600)
+        stale = _make_pms_response(
+            "2026-04-10",
+            "2026-04-23",
+            {"s5": _make_room("r1", "s5", "rt1", "Sea View Bungalow", [])},
+        )
+        cache.put(stale, fetched_at=time.time() - 120)
+        refetch = asyncio.Event()
+
+        async def fetch(start_date: str) -> dict:
+            await refetch.wait()
+            return _make_pms_response(
+                "2026-04-10",
+                "2026-04-23",
+                {
+                    "s5": _make_room(
+                        "r1",
+                        "s5",
+                        "rt1",
+                        "Sea View Bungalow",
+                        _dates_range("2026-04-10", 14),
+                    )
+                },
+            )
+
+        mock_pms_client.fetch_room_availability_window.side_effect = fetch
+        searches = []
+        for _ in range(2):
+            turn = RoomAvailabilityService(cache=cache)
+            turn.pms_client = mock_pms_client
+            searches.append(await turn.get_availability("2026-04-10", "2026-04-13"))
+
+        # Both searches answered from the stale window without waiting on the PMS
+        assert all(len(result["s5"]["dates"]) == 0 for result in searches)
+        # The second search found the refresh underway and started none
+        assert len(cache._background_refreshes) == 1
+
+        refetch.set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        mock_pms_client.fetch_room_availability_window.assert_called_once()
+        refreshed = cache.get("2026-04-10")
+        assert refreshed is not None
+        assert len(refreshed.data["rooms"]["s5"]["dates"]) == 14
+        assert cache._background_refreshes == {}
+
+    # Scenario 5: Past the hard TTL — the search waits for the PMS as before
+    @pytest.mark.asyncio
+    async def test_window_past_hard_ttl_is_refetched(self, mock_pms_client):
+        cache = AvailabilityCache(ttl_seconds=60, max_entries=16, stale_ttl_seconds=600)
+        pms_response = _make_pms_response(
+            "2026-04-10",
+            "2026-04-23",
+            {"s5": _make_room("r1", "s5", "rt1", "Sea View Bungalow", [])},
+        )
+        cache.put(pms_response, fetched_at=time.time() - 601)
+        mock_pms_client.fetch_room_availability_window.return_value = pms_response
+        turn = RoomAvailabilityService(cache=cache)
+        turn.pms_client = mock_pms_client
+
+        await turn.get_availability("2026-04-10", "2026-04-13")
+
+        assert cache.get("2026-04-10") is not None
+
+
 # ─── is_room_available ───────────────────────────────────────────────────────
 # This function is used by the select tool. After the guest picks a room from
 # search results, we call this to double-check with PMS that the room is still
-# free RIGHT NOW. It always makes a fresh PMS call (no caching) because someone
-# else could have booked the room between the search and the selection.
+# free RIGHT NOW. Someone else could have booked the room between the search and
+# the selection, so it only trusts windows fetched in the last few seconds
+# (`recheck_max_staleness`) and otherwise goes back to the PMS.
 
 
 class TestIsRoomAvailable:
@@ -509,13 +736,11 @@ class TestIsRoomAvailable:
         # Room exists but has zero free dates — not available
         assert result is False
 
-    # Scenario 9: Must not reuse cache from get_availability
-    # get_availability already fetched and cached this date range, but is_room_available
-    # must call PMS again to get real-time data. This is critical — a room could get
-    # booked between the search and the selection.
+    # Scenario 9: Select right after search reuses the window the search just fetched
+    # get_availability fetched this date range a moment ago. That is well within the
+    # recheck bound, so is_room_available should not pay for a second identical PMS call.
     @pytest.mark.asyncio
-    async def test_always_calls_pms_fresh_ignores_cache(self, service, mock_pms_client):
-        # Mock: PMS returns the same response for both calls
+    async def test_reuses_window_fetched_seconds_ago(self, service, mock_pms_client):
         pms_response = _make_pms_response(
             "2026-04-10",
             "2026-04-23",
@@ -531,11 +756,57 @@ class TestIsRoomAvailable:
         )
         mock_pms_client.fetch_room_availability_window.return_value = pms_response
 
-        # First: get_availability caches this range (1 PMS call)
+        # First: get_availability fetches this range (1 PMS call)
         await service.get_availability("2026-04-10", "2026-04-13")
         assert mock_pms_client.fetch_room_availability_window.call_count == 1
 
-        # Second: is_room_available should call PMS again, NOT reuse cache
-        await service.is_room_available("s5", "2026-04-10", "2026-04-13")
-        # Total should be 2 — proving is_room_available made its own fresh call
-        assert mock_pms_client.fetch_room_availability_window.call_count == 2
+        # Second: is_room_available trusts the window fetched moments ago
+        assert await service.is_room_available("s5", "2026-04-10", "2026-04-13")
+        assert mock_pms_client.fetch_room_availability_window.call_count == 1
+
+    # Scenario 10: Window older than the recheck bound — must call PMS again
+    # Search data is still within the cache TTL, but too old to confirm a selection.
+    # A room could have been booked since, so is_room_available asks the PMS.
+    @pytest.mark.asyncio
+    async def test_window_older_than_recheck_bound_calls_pms(
+        self, service, mock_pms_client, shared_cache
+    ):
+        # Search saw S5 free 30s ago (within the 60s TTL, beyond the recheck bound)
+        shared_cache.put(
+            _make_pms_response(
+                "2026-04-10",
+                "2026-04-23",
+                {
+                    "s5": _make_room(
+                        "r1",
+                        "s5",
+                        "rt1",
+                        "Sea View Bungalow",
+                        _dates_range("2026-04-10", 14),
+                    )
+                },
+            ),
+            fetched_at=time.time() - 30,
+        )
+        # Mock: since then, Apr 11 got booked
+        mock_pms_client.fetch_room_availability_window.return_value = (
+            _make_pms_response(
+                "2026-04-10",
+                "2026-04-23",
+                {
+                    "s5": _make_room(
+                        "r1",
+                        "s5",
+                        "rt1",
+                        "Sea View Bungalow",
+                        ["2026-04-10", "2026-04-12"],
+                    )
+                },
+            )
+        )
+
+        service.recheck_max_staleness = 5
+        result = await service.is_room_available("s5", "2026-04-10", "2026-04-13")
+
+        assert result is False
+        mock_pms_client.fetch_room_availability_window.assert_called_once()
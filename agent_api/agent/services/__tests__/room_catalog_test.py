@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from agent.services.room_catalog import RoomCatalog
+from core.cache_backend import InProcessCacheBackend
+
+
+def _room(
+    room_id: int, room_name: str, summary: str = "Sea view villa"
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=room_id,
+        room_name=room_name,
+        room_type="Villa",
+        summary=summary,
+        bed_queen=1,
+        bed_single=0,
+        baths=1,
+        size=40.0,
+        price_weekdays=3000.0,
+        price_weekends_holidays=3500.0,
+        price_ny_songkran=4500.0,
+        max_guests=2,
+        steps_to_beach=10,
+        sea_view=5,
+        privacy=4,
+        steps_to_restaurant=20,
+        room_design=4,
+        room_newness=3,
+        tags="quiet,beachfront",
+    )
+
+
+@pytest.fixture
+def room_service():
+    service = AsyncMock()
+    service.get_all_rooms.return_value = [_room(1, "V1"), _room(2, "S1")]
+    service.get_all_photos_for_rooms.return_value = {
+        1: [{"url": "/v1.jpg", "thumbnails": {240: "/v1_240.jpg"}}],
+        2: [],
+    }
+    return service
+
+
+class TestRoomCatalog:
+    # Scenario 1: First call loads rooms + photos and builds InternalRoom entries
+    @pytest.mark.asyncio
+    async def test_loads_catalog(self, room_service):
+        catalog = RoomCatalog(ttl_seconds=300)
+        snapshot = await catalog.get(room_service)
+
+        assert set(snapshot.rooms) == {"v1", "s1"}
+        assert snapshot.rooms["v1"]["thumbnail_url"] == "/v1_240.jpg"
+        assert snapshot.rooms["s1"]["thumbnail_url"] == ""
+        assert snapshot.rooms["v1"]["tags"] == ["quiet", "beachfront"]
+
+    # Scenario 2: Later turns reuse the snapshot without touching the DB
+    @pytest.mark.asyncio
+    async def test_reuses_snapshot(self, room_service):
+        catalog = RoomCatalog(ttl_seconds=300)
+        first = await catalog.get(room_service)
+        second = await catalog.get(room_service)
+
+        assert second is first
+        assert room_service.get_all_rooms.call_count == 1
+        assert room_service.get_all_photos_for_rooms.call_count == 1
+
+    # Scenario 3: Admin edit invalidates — reload picks up the change with a new version
+    @pytest.mark.asyncio
+    async def test_invalidate_reloads_with_new_version(self, room_service):
+        catalog = RoomCatalog(ttl_seconds=300)
+        first = await catalog.get(room_service)
+
+        room_service.get_all_rooms.return_value = [
+            _room(1, "V1", summary="Renovated villa"),
+            _room(2, "S1"),
+        ]
+        catalog.invalidate()
+        second = await catalog.get(room_service)
+
+        assert room_service.get_all_rooms.call_count == 2
+        assert second.rooms["v1"]["summary"] == "Renovated villa"
+        assert second.version != first.version
+
+    # Scenario 4: Reloading identical data yields the same version (no state rewrite needed)
+    @pytest.mark.asyncio
+    async def test_version_is_stable_for_identical_data(self, room_service):
+        first = await RoomCatalog(ttl_seconds=300).get(room_service)
+        second = await RoomCatalog(ttl_seconds=300).get(room_service)
+
+        assert second is not first
+        assert second.version == first.version
+
+    # Scenario 5: Expired snapshot (e.g. edited via another worker) is reloaded
+    @pytest.mark.asyncio
+    async def test_expired_snapshot_reloads(self, room_service):
+        catalog = RoomCatalog(ttl_seconds=0)
+        await catalog.get(room_service)
+        await catalog.get(room_service)
+
+        assert room_service.get_all_rooms.call_count == 2
+
+    # Scenario 6: An invalidation announced by another worker drops our snapshot
+    @pytest.mark.asyncio
+    async def test_invalidate_everywhere_reaches_other_workers(self, room_service):
+        backend = InProcessCacheBackend()
+        this_worker = RoomCatalog(ttl_seconds=300, backend=backend)
+        other_worker = RoomCatalog(ttl_seconds=300, backend=backend)
+        await this_worker.get(room_service)
+
+        await other_worker.invalidate_everywhere()
+        await this_worker.get(room_service)
+
+        assert room_service.get_all_rooms.call_count == 2
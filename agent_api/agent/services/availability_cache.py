@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import astuple, dataclass
+from typing import TYPE_CHECKING, Any
+
+from agent.clients.pms_client import WindowValidators
+from agent.clients.resilience import UpstreamUnavailableError
+from agent.utils.availability_mask import AvailabilityMask
+from core.cache_backend import CacheBackend, cache_backend
+from core.config import settings
+
+if TYPE_CHECKING:
+    from agent.clients.pms_client import PmsClient
+
+logger = logging.getLogger(__name__)
+
+# Expired windows stay in the shared backend this long so any worker can revalidate them
+SHARED_RETENTION_SECONDS = 24 * 3600
+# Header of `dump_snapshot` blobs; bump the trailing version if the layout changes
+SNAPSHOT_MAGIC = b"TAVS\x01"
+
+
+@dataclass(frozen=True)
+class CachedWindow:
+    """A parsed PMS availability window plus the time it was fetched."""
+
+    start_date: str  # Window start as returned by the PMS, YYYY-MM-DD
+    end_date: str  # Window end (inclusive), YYYY-MM-DD
+    data: dict[str, Any]  # Output of PmsClient.fetch_room_availability_window
+    fetched_at: float  # Unix timestamp of the PMS response
+
+    def age(self, now: float | None = None) -> float:
+        return (time.time() if now is None else now) - self.fetched_at
+
+    def covers(self, day: str) -> bool:
+        # ISO dates compare correctly as strings
+        return self.start_date <= day <= self.end_date
+
+
+class AvailabilityCache:
+    """Process-wide cache of PMS availability windows, keyed by window start.
+
+    Unlike `RoomAvailabilityService`, which lives for a single turn, one
+    instance of this cache is shared by every thread in the process so that
+    guests searching the same dates reuse a recently fetched window.
+
+    - `ttl_seconds` bounds how old a window may be before it is refetched.
+    - `max_entries` caps memory; the least recently used window is evicted.
+    - Lookups accept `max_staleness` to demand fresher data than the TTL
+      (e.g. `0` always misses, forcing a PMS call).
+
+    Expired windows are not dropped until evicted: `refresh` uses them to ask
+    the PMS whether anything changed, and an unchanged window just has its
+    TTL extended instead of being downloaded and parsed again.
+
+    With a `backend`, `refresh` first looks for the window in it, so a window
+    fetched by another worker is reused rather than fetched again, and every
+    window it gets from the PMS is written back there.
+
+    `ttl_seconds` is a soft TTL for callers that accept stale-while-revalidate:
+    a window older than it but younger than `stale_ttl_seconds` is served by
+    `find_stale` while `refresh_in_background` brings it up to date.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        backend: CacheBackend | None = None,
+        stale_ttl_seconds: float | None = None,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.backend = backend
+        self.stale_ttl_seconds = (
+            ttl_seconds if stale_ttl_seconds is None else stale_ttl_seconds
+        )
+        self._windows: OrderedDict[str, CachedWindow] = OrderedDict()
+        # One background refresh per window start, however many searches hit it
+        self._background_refreshes: dict[str, asyncio.Task[None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def get(
+        self, start_date: str, max_staleness: float | None = None
+    ) -> CachedWindow | None:
+        """Return the window starting at `start_date` if it is fresh enough."""
+        window = self._windows.get(start_date)
+        if window is None or not self._is_fresh(window, max_staleness):
+            return None
+        self._windows.move_to_end(start_date)
+        return window
+
+    def find_covering(
+        self, day: str, max_staleness: float | None = None
+    ) -> CachedWindow | None:
+        """Return the most recently fetched fresh window that contains `day`."""
+        best: CachedWindow | None = None
+        for window in self._windows.values():
+            if not window.covers(day) or not self._is_fresh(window, max_staleness):
+                continue
+            if best is None or window.fetched_at > best.fetched_at:
+                best = window
+        if best is not None:
+            self._windows.move_to_end(best.start_date)
+        return best
+
+    def latest_covering(self, day: str) -> CachedWindow | None:
+        """Return the most recently fetched window containing `day`, however old."""
+        best: CachedWindow | None = None
+        for window in self._windows.values():
+            if window.covers(day) and (
+                best is None or window.fetched_at > best.fetched_at
+            ):
+                best = window
+        return best
+
+    def find_stale(self, day: str) -> CachedWindow | None:
+        """Return the newest window containing `day` that is within the hard TTL."""
+        window = self.latest_covering(day)
+        if window is None or window.age() >= self.stale_ttl_seconds:
+            return None
+        self._windows.move_to_end(window.start_date)
+        return window
+
+    def refresh_in_background(self, client: PmsClient, window: CachedWindow) -> None:
+        """Start refreshing `window` without waiting for it, unless already underway."""
+        start_date = window.start_date
+        if start_date in self._background_refreshes:
+            return
+        task = asyncio.create_task(self._refresh_in_background(client, window))
+        self._background_refreshes[start_date] = task
+        task.add_done_callback(lambda _: self._background_refreshes.pop(start_date))
+
+    async def _refresh_in_background(
+        self, client: PmsClient, window: CachedWindow
+    ) -> None:
+        try:
+            await self.refresh(client, window.start_date, exact_start=True)
+        except Exception as e:
+            logger.warning(
+                "Background refresh of window %s failed: %s", window.start_date, e
+            )
+
+    async def refresh(
+        self,
+        client: PmsClient,
+        start_date: str,
+        exact_start: bool = False,
+        max_staleness: float | None = None,
+        serve_stale: bool = False,
+    ) -> CachedWindow:
+        """Get an up-to-date window containing `start_date` and store it.
+
+        A window in the shared backend that is fresh enough for `max_staleness`
+        is used as is. Otherwise, if a (possibly expired) window is cached here
+        or in the backend, it is revalidated with a conditional request and only
+        re-parsed when the PMS reports a change.
+        With `exact_start`, only a window starting exactly at `start_date` is
+        revalidated, so callers that own a fixed set of window starts keep them.
+        With `serve_stale`, that expired window is returned unchanged when the
+        PMS client refuses the request (circuit open or saturated).
+        """
+        if exact_start:
+            previous = self._windows.get(start_date)
+        else:
+            previous = self.latest_covering(start_date)
+
+        shared = await self._load_shared(start_date)
+        if shared is not None and (previous is None or shared.age() < previous.age()):
+            if self._is_fresh(shared, max_staleness):
+                return self.put(shared.data, fetched_at=shared.fetched_at)
+            previous = shared
+        validators = previous.data.get("validators") if previous else None
+
+        try:
+            if previous is not None and validators is not None:
+                pms_data = await client.revalidate_room_availability_window(
+                    previous.start_date, validators
+                )
+                if pms_data is None:
+                    # Unchanged: keep the parsed data, restart its TTL
+                    pms_data = previous.data
+            else:
+                pms_data = await client.fetch_room_availability_window(start_date)
+        except UpstreamUnavailableError as e:
+            if not serve_stale or previous is None:
+                raise
+            logger.warning(
+                "Serving %.0fs old window %s: %s",
+                previous.age(),
+                previous.start_date,
+                e,
+            )
+            return previous
+        window = self.put(pms_data)
+        await self._save_shared(window)
+        return window
+
+    def put(
+        self, data: dict[str, Any], fetched_at: float | None = None
+    ) -> CachedWindow:
+        """Store a parsed PMS window, evicting the least recently used if full."""
+        window = CachedWindow(
+            start_date=data["from_date"],
+            end_date=data["to_date"],
+            data=data,
+            fetched_at=time.time() if fetched_at is None else fetched_at,
+        )
+        self._windows[window.start_date] = window
+        self._windows.move_to_end(window.start_date)
+        while len(self._windows) > self.max_entries:
+            self._windows.popitem(last=False)
+        return window
+
+    def invalidate(self, start_date: str) -> None:
+        self._windows.pop(start_date, None)
+
+    def clear(self) -> None:
+        self._windows.clear()
+
+    def dump_snapshot(self) -> bytes:
+        """Every window, least recently used first, as a compact binary blob."""
+        windows = [_window_to_json(w) for w in self._windows.values()]
+        encoded = json.dumps(windows, separators=(",", ":")).encode()
+        return SNAPSHOT_MAGIC + zlib.compress(encoded)
+
+    def load_snapshot(self, raw: bytes, max_age_seconds: float) -> int:
+        """Restore windows from `dump_snapshot` with their original fetch times.
+
+        TTLs keep running from those times, so a restored window is only fresh
+        if it would have been without the restart. Windows older than
+        `max_age_seconds` are dropped. Returns how many were restored.
+        """
+        if not raw.startswith(SNAPSHOT_MAGIC):
+            raise ValueError("Not an availability cache snapshot")
+        windows = json.loads(zlib.decompress(raw[len(SNAPSHOT_MAGIC) :]))
+        restored = 0
+        for payload in windows:
+            window = _window_from_json(payload)
+            if window.age() < max_age_seconds:
+                self.put(window.data, fetched_at=window.fetched_at)
+                restored += 1
+        return restored
+
+    def _is_fresh(self, window: CachedWindow, max_staleness: float | None) -> bool:
+        limit = self.ttl_seconds
+        if max_staleness is not None:
+            limit = min(limit, max_staleness)
+        return window.age() < limit
+
+    async def _load_shared(self, start_date: str) -> CachedWindow | None:
+        if self.backend is None:
+            return None
+        try:
+            raw = await self.backend.get(_shared_key(start_date))
+            return decode_window(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning("Shared availability cache read failed: %s", e)
+            return None
+
+    async def _save_shared(self, window: CachedWindow) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(
+                _shared_key(window.start_date),
+                encode_window(window),
+                SHARED_RETENTION_SECONDS,
+            )
+        except Exception as e:
+            logger.warning("Shared availability cache write failed: %s", e)
+
+
+def _shared_key(start_date: str) -> str:
+    return f"pms:window:{start_date}"
+
+
+def encode_window(window: CachedWindow) -> bytes:
+    """Serialise a window for the shared backend; masks travel as [base, bits]."""
+    return json.dumps(_window_to_json(window), separators=(",", ":")).encode()
+
+
+def decode_window(raw: bytes) -> CachedWindow:
+    return _window_from_json(json.loads(raw))
+
+
+def _window_to_json(window: CachedWindow) -> dict[str, Any]:
+    data = {
+        **window.data,
+        "rooms": {
+            room_no: {**room, "dates": [room["dates"].base, room["dates"].bits]}
+            for room_no, room in window.data["rooms"].items()
+        },
+    }
+    if data.get("validators") is not None:
+        data["validators"] = astuple(data["validators"])
+    return {"fetched_at": window.fetched_at, "data": data}
+
+
+def _window_from_json(payload: dict[str, Any]) -> CachedWindow:
+    data = payload["data"]
+    for room in data["rooms"].values():
+        room["dates"] = AvailabilityMask(*room["dates"])
+    if data.get("validators") is not None:
+        data["validators"] = WindowValidators(*data["validators"])
+    return CachedWindow(
+        start_date=data["from_date"],
+        end_date=data["to_date"],
+        data=data,
+        fetched_at=payload["fetched_at"],
+    )
+
+
+# Create the singleton instance
+availability_cache = AvailabilityCache(
+    ttl_seconds=settings.pms_availability_cache_ttl_seconds,
+    max_entries=settings.pms_availability_cache_max_entries,
+    backend=cache_backend,
+    stale_ttl_seconds=settings.pms_availability_cache_stale_ttl_seconds,
+)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+from datetime import date, timedelta
+
+from agent.clients.pms_client import PMS_WINDOW_DAYS, pms_client
+from agent.services.availability_cache import AvailabilityCache, availability_cache
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AvailabilityPrefetcher:
+    """Background task that keeps the upcoming booking horizon warm in the shared cache.
+
+    Every `interval_seconds` (plus up to `jitter_seconds` so several workers don't
+    hit the PMS in lockstep) it fetches the next `windows` 14-day windows starting
+    today and stores them in the `AvailabilityCache`. When the PMS errors, the wait
+    doubles per consecutive failure up to `max_backoff_seconds`.
+
+    Used as an async context manager from the FastAPI lifespan; does nothing
+    unless `enabled`.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        windows: int,
+        interval_seconds: float,
+        jitter_seconds: float,
+        max_backoff_seconds: float,
+        cache: AvailabilityCache | None = None,
+    ) -> None:
+        self.enabled = enabled
+        self.windows = windows
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.pms_client = pms_client
+        self.cache = availability_cache if cache is None else cache
+        self._task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> AvailabilityPrefetcher:
+        if self.enabled:
+            self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="availability-prefetch")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def refresh_once(self) -> None:
+        """Fetch every window in the horizon and store it in the shared cache."""
+        today = date.today()
+        semaphore = asyncio.Semaphore(settings.pms_max_concurrent_fetches)
+
+        async def refresh(start: date) -> None:
+            async with semaphore:
+                await self.cache.refresh(
+                    self.pms_client, start.isoformat(), exact_start=True
+                )
+
+        await asyncio.gather(
+            *(
+                refresh(today + timedelta(days=PMS_WINDOW_DAYS * i))
+                for i in range(self.windows)
+            )
+        )
+
+    def next_delay(self, consecutive_failures: int) -> float:
+        """Seconds to wait before the next refresh, with backoff and jitter."""
+        delay = self.interval_seconds
+        if consecutive_failures:
+            delay = min(
+                self.interval_seconds * 2**consecutive_failures,
+                self.max_backoff_seconds,
+            )
+        return delay + random.uniform(0, self.jitter_seconds)
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                await self.refresh_once()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                logger.warning(
+                    "Availability prefetch failed (%d in a row): %s", failures, e
+                )
+            await asyncio.sleep(self.next_delay(failures))
+
+
+# Create the singleton instance
+availability_prefetcher = AvailabilityPrefetcher(
+    enabled=settings.pms_prefetch_enabled,
+    windows=settings.pms_prefetch_windows,
+    interval_seconds=settings.pms_prefetch_interval_seconds,
+    jitter_seconds=settings.pms_prefetch_jitter_seconds,
+    max_backoff_seconds=settings.pms_prefetch_max_backoff_seconds,
+)
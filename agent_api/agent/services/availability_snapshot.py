@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+from pathlib import Path
+
+from agent.services.availability_cache import (
+    SHARED_RETENTION_SECONDS,
+    AvailabilityCache,
+    availability_cache,
+)
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AvailabilitySnapshotter:
+    """Persists the availability cache to disk so a restarted worker starts warm.
+
+    The snapshot is loaded on startup with the windows' original fetch times,
+    then saved every `interval_seconds` and on shutdown. Writes go to a temp
+    file renamed into place, so a crash mid-write never leaves a torn file and
+    several workers sharing one path simply take turns being the latest.
+
+    Used as an async context manager from the FastAPI lifespan; does nothing
+    unless `path` is set.
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        interval_seconds: float,
+        cache: AvailabilityCache | None = None,
+    ) -> None:
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.cache = availability_cache if cache is None else cache
+        self._task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> AvailabilitySnapshotter:
+        if self.path is None:
+            return self
+        await self.load()
+        self._task = asyncio.create_task(self._run(), name="availability-snapshot")
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.path is not None:
+            await self.save()
+
+    async def load(self) -> int:
+        assert self.path is not None
+        try:
+            raw = await asyncio.to_thread(self.path.read_bytes)
+            restored = self.cache.load_snapshot(raw, SHARED_RETENTION_SECONDS)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning("Ignoring unreadable availability snapshot: %s", e)
+            return 0
+        logger.info("Restored %d availability windows from %s", restored, self.path)
+        return restored
+
+    async def save(self) -> None:
+        assert self.path is not None
+        if not len(self.cache):
+            return
+        try:
+            await asyncio.to_thread(
+                _write_atomic, self.path, self.cache.dump_snapshot()
+            )
+        except Exception as e:
+            logger.warning("Could not save availability snapshot: %s", e)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.save()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+# Create the singleton instance
+availability_snapshotter = AvailabilitySnapshotter(
+    path=settings.pms_availability_snapshot_path,
+    interval_seconds=settings.pms_availability_snapshot_interval_seconds,
+)
@@ -1,19 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta
-from typing import TypedDict
+from typing import Any, TypedDict
 
-from agent.clients.pms_client import pms_client
+from agent.clients.pms_client import PMS_WINDOW_DAYS, pms_client
+from agent.services.availability_cache import (
+    AvailabilityCache,
+    CachedWindow,
+    availability_cache,
+)
+from agent.utils.availability_mask import EMPTY_MASK, AvailabilityMask
+from core.config import settings
 
 
 class InternalRoomAvailabilityData(TypedDict):
-    """Internal cache representation — dates kept as a set for efficient merge/discard."""
+    """Internal cache representation — dates kept as a bitmask for cheap merge/clip."""
 
     room_id: str  # PMS internal room ID
     room_no: str  # Room number, lowercased (e.g. "s5")
     room_type_id: str  # PMS internal room type ID
     room_type_name: str  # Human-readable room type (e.g. "Sea View Bungalow")
-    dates: set[str]  # Available dates as YYYY-MM-DD strings (mutable set for merging)
+    dates: AvailabilityMask  # Available nights; merged with `|`, clipped with `.clip()`
 
 
 class RoomAvailabilityService:
@@ -23,13 +31,30 @@ class RoomAvailabilityService:
     `rooms_availability`). This cache is only valid within a single graph
     invocation (one user turn) — PMS availability is live data, so instances
     must NOT be shared across turns or requests.
+
+    Windows are read through the process-wide `AvailabilityCache`, so a
+    window recently fetched by another turn or thread is reused within its
+    TTL instead of hitting the PMS again.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        cache: AvailabilityCache | None = None,
+        recheck_max_staleness: float | None = None,
+    ) -> None:
         self.pms_client = pms_client
+        self.cache = availability_cache if cache is None else cache
+        # How old a window may be for is_room_available to trust it without asking the PMS
+        self.recheck_max_staleness = (
+            settings.pms_availability_recheck_seconds
+            if recheck_max_staleness is None
+            else recheck_max_staleness
+        )
         # List of [start, end) tuples covering what we have fetched from PMS
         self.covered_ranges: list[tuple[datetime, datetime]] = []
         self.rooms_availability: dict[str, InternalRoomAvailabilityData] = {}
+        # Every window read during this turn, so re-checks don't depend on the shared cache
+        self.turn_windows: list[CachedWindow] = []
 
     async def get_availability(
         self, search_start: str, search_end: str
@@ -41,60 +66,35 @@ class RoomAvailabilityService:
         search_start_dt = datetime.strptime(search_start, "%Y-%m-%d")
         search_end_dt = datetime.strptime(search_end, "%Y-%m-%d")
 
-        current_date = search_start_dt
-        while current_date < search_end_dt:
-            # Check if current_date is in any covered_range
-            covered = False
-            for c_start, c_end in self.covered_ranges:
-                if c_start <= current_date < c_end:
-                    covered = True
-                    current_date = c_end
-                    break
-
-            if not covered:
-                # Fetch a 14-day window from PMS starting from current_date
-                pms_data = await self.pms_client.fetch_room_availability_window(
-                    current_date.strftime("%Y-%m-%d")
-                )
-                pms_start = datetime.strptime(pms_data["from_date"], "%Y-%m-%d")
-                pms_end = datetime.strptime(
-                    pms_data["to_date"], "%Y-%m-%d"
-                ) + timedelta(days=1)
-
-                # Merge fetched dates into our state
-                for room_no, room_info in pms_data["rooms"].items():
-                    if room_no not in self.rooms_availability:
-                        self.rooms_availability[room_no] = {
-                            "room_id": room_info["room_id"],
-                            "room_no": room_info["room_no"],
-                            "room_type_id": room_info["room_type_id"],
-                            "room_type_name": room_info["room_type_name"],
-                            "dates": set(room_info["dates"]),
-                        }
-                    else:
-                        self.rooms_availability[room_no]["dates"].update(
-                            room_info["dates"]
-                        )
-
-                self.covered_ranges.append((pms_start, pms_end))
-                # Sort ranges to ensure we jump optimally during coverage checks
-                self.covered_ranges.sort(key=lambda x: x[0])
-                current_date = pms_end
+        windows = await self._fetch_missing_windows(
+            search_start_dt, search_end_dt, self.covered_ranges
+        )
+
+        # Merge fetched dates into our state
+        for pms_data in windows:
+            for room_no, room_info in pms_data["rooms"].items():
+                if room_no not in self.rooms_availability:
+                    self.rooms_availability[room_no] = {
+                        "room_id": room_info["room_id"],
+                        "room_no": room_info["room_no"],
+                        "room_type_id": room_info["room_type_id"],
+                        "room_type_name": room_info["room_type_name"],
+                        "dates": room_info["dates"],
+                    }
+                else:
+                    self.rooms_availability[room_no]["dates"] |= room_info["dates"]
 
         # Now clip the merged data strictly to the requested [search_start_dt, search_end_dt)
-        valid_dates = {
-            (search_start_dt + timedelta(days=i)).strftime("%Y-%m-%d")
-            for i in range((search_end_dt - search_start_dt).days)
-        }
+        valid_dates = AvailabilityMask.from_range(search_start_dt, search_end_dt)
         result_rooms: dict[str, InternalRoomAvailabilityData] = {}
         for room_no, room_info in self.rooms_availability.items():
-            filtered_dates = room_info["dates"].intersection(valid_dates)
+            filtered_dates = room_info["dates"] & valid_dates
             result_rooms[room_no] = {
                 "room_id": room_info["room_id"],
                 "room_no": room_info["room_no"],
                 "room_type_id": room_info["room_type_id"],
                 "room_type_name": room_info["room_type_name"],
-                "dates": set(filtered_dates),
+                "dates": filtered_dates,
             }
 
         return result_rooms
@@ -102,32 +102,132 @@ class RoomAvailabilityService:
     async def is_room_available(
         self, room_no: str, check_in: str, check_out: str
     ) -> bool:
-        """Check if a room is available for [check_in, check_out) by making a fresh PMS call (no caching)."""
+        """Check if a room is available for [check_in, check_out) against near-live PMS data.
+
+        Only the windows covering the stay are read. A window fetched within the last
+        `recheck_max_staleness` seconds (by this turn, e.g. the search right before, or
+        by anyone via the shared cache) is trusted; anything older is rechecked with the PMS.
+        """
         check_in_dt = datetime.strptime(check_in, "%Y-%m-%d")
         check_out_dt = datetime.strptime(check_out, "%Y-%m-%d")
 
-        # Build the set of required dates: [check_in, check_out)
-        required_dates: set[str] = {
-            (check_in_dt + timedelta(days=i)).strftime("%Y-%m-%d")
-            for i in range((check_out_dt - check_in_dt).days)
-        }
-
-        # Fetch fresh PMS data in 14-day windows to cover the full stay
-        available_dates: set[str] = set()
-        cursor = check_in_dt
-        while cursor < check_out_dt:
-            pms_data = await self.pms_client.fetch_room_availability_window(
-                cursor.strftime("%Y-%m-%d")
-            )
-            room_key = room_no.lower()
+        # Near-live PMS data in 14-day windows to cover the full stay
+        windows = await self._fetch_missing_windows(
+            check_in_dt,
+            check_out_dt,
+            covered_ranges=[],
+            max_staleness=self.recheck_max_staleness,
+        )
+
+        available_dates = EMPTY_MASK
+        room_key = room_no.lower()
+        for pms_data in windows:
             room_info = pms_data["rooms"].get(room_key)
             if room_info:
-                available_dates.update(room_info["dates"])
+                available_dates |= room_info["dates"]
+
+        # Every night in [check_in, check_out) must be free
+        return available_dates.covers(check_in_dt.date(), check_out_dt.date())
+
+    async def _fetch_missing_windows(
+        self,
+        start_dt: datetime,
+        end_dt: datetime,
+        covered_ranges: list[tuple[datetime, datetime]],
+        max_staleness: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Fetch every window needed to cover [start_dt, end_dt) that `covered_ranges` lacks.
+
+        Missing window starts are planned up front and fetched concurrently (bounded by
+        `PMS_MAX_CONCURRENT_FETCHES`). PMS windows don't always start where we asked, so
+        any gap left after a round is planned and fetched in a further round.
+        `covered_ranges` is updated in place with what was fetched.
+        """
+        fetched: list[dict[str, Any]] = []
+        while missing_starts := _plan_missing_windows(start_dt, end_dt, covered_ranges):
+            semaphore = asyncio.Semaphore(settings.pms_max_concurrent_fetches)
 
-            # Advance cursor past this window
-            pms_end = datetime.strptime(pms_data["to_date"], "%Y-%m-%d") + timedelta(
-                days=1
-            )
-            cursor = pms_end
+            async def fetch(start: datetime) -> dict[str, Any]:
+                async with semaphore:
+                    return await self._get_window(
+                        start.strftime("%Y-%m-%d"), max_staleness
+                    )
 
-        return required_dates.issubset(available_dates)
+            windows = await asyncio.gather(*(fetch(s) for s in missing_starts))
+
+            for requested_start, pms_data in zip(missing_starts, windows):
+                pms_start = datetime.strptime(pms_data["from_date"], "%Y-%m-%d")
+                pms_end = datetime.strptime(
+                    pms_data["to_date"], "%Y-%m-%d"
+                ) + timedelta(days=1)
+                # Always make progress past the requested start, even if PMS returned an odd window
+                covered_ranges.append(
+                    (
+                        min(pms_start, requested_start),
+                        max(pms_end, requested_start + timedelta(days=1)),
+                    )
+                )
+            # Sort ranges to ensure we jump optimally during coverage checks
+            covered_ranges.sort(key=lambda x: x[0])
+            fetched.extend(windows)
+
+        return fetched
+
+    async def _get_window(
+        self, start_date: str, max_staleness: float | None = None
+    ) -> dict[str, Any]:
+        """Return a PMS window containing `start_date`, from the shared cache if fresh enough.
+
+        `max_staleness` (seconds) tightens the cache TTL for this call; `0` always asks the PMS,
+        though an unchanged window is revalidated rather than downloaded again.
+        Without it (searches), a window past the TTL but within the cache's hard TTL is
+        returned straight away and refreshed in the background.
+        """
+        cached = self._find_turn_window(start_date, max_staleness)
+        if cached is None:
+            cached = self.cache.find_covering(start_date, max_staleness)
+        if cached is None and max_staleness is None:
+            cached = self.cache.find_stale(start_date)
+            if cached is not None:
+                self.cache.refresh_in_background(self.pms_client, cached)
+        if cached is None:
+            # Searches may fall back to an expired window while the PMS is
+            # unavailable; callers demanding fresh data (select_rooms) may not
+            cached = await self.cache.refresh(
+                self.pms_client,
+                start_date,
+                max_staleness=max_staleness,
+                serve_stale=max_staleness is None,
+            )
+        self.turn_windows.append(cached)
+        return cached.data
+
+    def _find_turn_window(
+        self, start_date: str, max_staleness: float | None
+    ) -> CachedWindow | None:
+        """Newest window read this turn that contains `start_date` and is fresh enough."""
+        limit = self.cache.ttl_seconds if max_staleness is None else max_staleness
+        for window in reversed(self.turn_windows):
+            if window.covers(start_date) and window.age() < limit:
+                return window
+        return None
+
+
+def _plan_missing_windows(
+    start_dt: datetime,
+    end_dt: datetime,
+    covered_ranges: list[tuple[datetime, datetime]],
+) -> list[datetime]:
+    """Return the start dates of the PMS windows needed to cover the gaps in [start_dt, end_dt)."""
+    starts: list[datetime] = []
+    current_date = start_dt
+    while current_date < end_dt:
+        # Check if current_date is in any covered_range
+        for c_start, c_end in covered_ranges:
+            if c_start <= current_date < c_end:
+                current_date = c_end
+                break
+        else:
+            starts.append(current_date)
+            current_date += timedelta(days=PMS_WINDOW_DAYS)
+    return starts
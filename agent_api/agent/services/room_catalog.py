@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+
+from agent.services.room_service import RoomService
+from agent.types import InternalRoom
+from core.cache_backend import CacheBackend, cache_backend
+from core.config import settings
+
+# Invalidation key announced to every worker when an admin edits rooms or photos
+ROOM_CATALOG_KEY = "room_catalog"
+
+
+@dataclass(frozen=True)
+class RoomCatalogSnapshot:
+    """Immutable view of every room as the agent sees it.
+
+    Equality and hashing use `version` only, so snapshots can key caches.
+    """
+
+    version: str  # Content hash, equal across processes for identical catalogs
+    rooms: dict[str, InternalRoom] = field(compare=False)  # Keyed by lowercase name
+    loaded_at: float = field(default_factory=time.time, compare=False)
+
+
+class RoomCatalog:
+    """Process-wide cache of the room catalog used by the graph.
+
+    Rooms and photos change rarely, so they are loaded once and shared by every
+    turn until an admin write calls `invalidate()`. `context_node` pins one
+    snapshot on the run context; only its `version`, a hash of the content,
+    goes into graph state. With a `backend`, `invalidate_everywhere()` reaches the
+    catalog in every worker; `ttl_seconds` bounds staleness should that
+    announcement be missed.
+    """
+
+    def __init__(self, ttl_seconds: float, backend: CacheBackend | None = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._snapshot: RoomCatalogSnapshot | None = None
+        self._generation = 0  # Bumped by invalidate() to discard in-flight loads
+        self._lock = asyncio.Lock()
+        if backend is not None:
+            backend.subscribe(ROOM_CATALOG_KEY, lambda _key: self.invalidate())
+
+    async def get(self, room_service: RoomService) -> RoomCatalogSnapshot:
+        """Return the cached snapshot, loading it from the database if needed."""
+        snapshot = self._snapshot
+        if snapshot is not None and self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            # Another turn may have loaded it while we waited for the lock
+            snapshot = self._snapshot
+            if snapshot is not None and self._is_fresh(snapshot):
+                return snapshot
+
+            generation = self._generation
+            snapshot = await load_room_catalog(room_service)
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the cached snapshot; the next `get` reloads from the database."""
+        self._generation += 1
+        self._snapshot = None
+
+    async def invalidate_everywhere(self) -> None:
+        """Drop the snapshot here and in every other worker sharing the backend."""
+        self.invalidate()
+        if self.backend is not None:
+            await self.backend.invalidate(ROOM_CATALOG_KEY)
+
+    def _is_fresh(self, snapshot: RoomCatalogSnapshot) -> bool:
+        return time.time() - snapshot.loaded_at < self.ttl_seconds
+
+
+async def load_room_catalog(room_service: RoomService) -> RoomCatalogSnapshot:
+    """Build a snapshot from Postgres: all rooms plus their photos."""
+    rooms = await room_service.get_all_rooms()
+    room_ids = [room.id for room in rooms]
+    all_photos = await room_service.get_all_photos_for_rooms(room_ids=room_ids)
+
+    internal_room_dict: dict[str, InternalRoom] = {}
+    for room in rooms:
+        photos = all_photos.get(room.id, [])
+        thumbnail_url = photos[0]["thumbnails"][240] if photos else ""
+        internal_room_dict[room.room_name.lower()] = InternalRoom(
+            id=room.id,
+            room_name=room.room_name,
+            room_type=room.room_type,
+            summary=room.summary,
+            bed_queen=room.bed_queen,
+            bed_single=room.bed_single,
+            baths=room.baths,
+            size=room.size,
+            price_weekdays=room.price_weekdays,
+            price_weekends_holidays=room.price_weekends_holidays,
+            price_ny_songkran=room.price_ny_songkran,
+            max_guests=room.max_guests,
+            steps_to_beach=room.steps_to_beach,
+            sea_view=room.sea_view,
+            privacy=room.privacy,
+            steps_to_restaurant=room.steps_to_restaurant,
+            room_design=room.room_design,
+            room_newness=room.room_newness,
+            tags=room.tags.split(",") if room.tags else [],
+            thumbnail_url=thumbnail_url,
+            photos=photos,
+        )
+    return RoomCatalogSnapshot(
+        version=_catalog_version(internal_room_dict), rooms=internal_room_dict
+    )
+
+
+def _catalog_version(rooms: dict[str, InternalRoom]) -> str:
+    encoded = json.dumps(rooms, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+# Create the singleton instance
+room_catalog = RoomCatalog(
+    ttl_seconds=settings.room_catalog_ttl_seconds, backend=cache_backend
+)
@@ -6,7 +6,6 @@ from langgraph.graph.message import add_messages
 from langgraph.graph.ui import AnyUIMessage, ui_message_reducer
 
 from agent.tools.search_available_rooms import RoomAvailabilityResult
-from agent.types import InternalRoom
 
 
 def list_reducer(existing: list[str], update: dict[str, Any]) -> list[str]:
@@ -33,4 +32,10 @@ class State(TypedDict):
     pending_render_search_results: Annotated[list[RoomAvailabilityResult], list_reducer]
     pending_search_range: dict[str, str] | None  # {"start": ..., "end": ...}
     ui: Annotated[Sequence[AnyUIMessage], ui_message_reducer]
-    rooms: dict[str, InternalRoom]  # no reducer, always replace
+    # Catalog version seen by the last turn; the rooms themselves live in
+    # AgentServiceProvider.rooms so they are not copied into every checkpoint
+    rooms_version: str | None
+    # Rolling summary of turns no longer sent to the model verbatim, and the id
+    # of the last message it covers
+    conversation_summary: str | None
+    summarized_until: str | None
@@ -0,0 +1,152 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import Any, cast
+from unittest.mock import AsyncMock
+
+import pytest
+from langchain_core.tools import StructuredTool
+from langgraph.types import Command
+
+from agent.services.room_availability_service import InternalRoomAvailabilityData
+from agent.tools.search_available_rooms import search_available_rooms
+from agent.types import InternalRoom
+from agent.utils.availability_mask import AvailabilityMask
+
+# Far enough ahead that the widest (±7 day) window never hits the today clamp
+START = date.today() + timedelta(days=30)
+END = START + timedelta(days=2)
+
+
+def _day(offset: int) -> str:
+    """START shifted by `offset` days, as YYYY-MM-DD."""
+    return (START + timedelta(days=offset)).isoformat()
+
+
+def _availability(
+    room_no: str, free: list[str], room_type: str = "Bungalow"
+) -> InternalRoomAvailabilityData:
+    return {
+        "room_id": f"id-{room_no}",
+        "room_no": room_no,
+        "room_type_id": "type-1",
+        "room_type_name": room_type,
+        "dates": AvailabilityMask.from_dates(free),
+    }
+
+
+def _runtime(availability: dict[str, InternalRoomAvailabilityData]) -> Any:
+    rooms = {
+        room_no: cast(InternalRoom, {"room_name": room_no, "room_type": "Bungalow"})
+        for room_no in availability
+    }
+    room_availability = SimpleNamespace(
+        get_availability=AsyncMock(return_value=availability)
+    )
+    context = SimpleNamespace(rooms=rooms, room_availability=room_availability)
+    return SimpleNamespace(context=context, tool_call_id="call-1")
+
+
+async def _search(runtime: Any, start: str, end: str) -> Command[Any] | str:
+    # Call the coroutine directly: invoking the tool would need a full ToolRuntime
+    coroutine = cast(StructuredTool, search_available_rooms).coroutine
+    assert coroutine is not None
+    result: Command[Any] | str = await coroutine(
+        runtime=runtime, start_date=start, end_date=end
+    )
+    return result
+
+
+def _found(result: Command[Any] | str) -> tuple[dict[str, Any], dict[str, str]]:
+    """The rooms and search range a successful search renders."""
+    assert isinstance(result, Command)
+    update = cast(dict[str, Any], result.update)
+    return update["pending_render_search_results"]["append"][0], update[
+        "pending_search_range"
+    ]
+
+
+class TestSearchAvailableRooms:
+    # Scenario 1: A single PMS call covers the widest expansion window
+    @pytest.mark.asyncio
+    async def test_fetches_the_widest_window_once(self):
+        runtime = _runtime({"s1": _availability("s1", [_day(-7)])})
+
+        await _search(runtime, START.isoformat(), END.isoformat())
+
+        runtime.context.room_availability.get_availability.assert_awaited_once_with(
+            _day(-7), _day(2 + 7)
+        )
+
+    # Scenario 2: Rooms free within the requested range are found without expanding
+    @pytest.mark.asyncio
+    async def test_exact_range(self):
+        runtime = _runtime(
+            {
+                "s1": _availability("s1", [_day(0), _day(1)]),
+                "s2": _availability("s2", [_day(2)]),  # Checkout night: outside
+            }
+        )
+
+        rooms, search_range = _found(
+            await _search(runtime, START.isoformat(), END.isoformat())
+        )
+
+        assert rooms == {"s1": [{"start": _day(0), "end": _day(1)}]}
+        assert search_range == {"start": _day(0), "end": _day(2)}
+
+    # Scenario 3: Each expansion step finds rooms up to both of its edges only
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("free_night", "expansion"),
+        [
+            (-3, 3),  # First night of the ±3 window
+            (4, 3),  # Last night of the ±3 window
+            (-4, 5),  # Just before the ±3 window
+            (5, 5),  # Just after the ±3 window
+            (-7, 7),  # First night of the widest window
+            (8, 7),  # Last night of the widest window
+        ],
+    )
+    async def test_expansion_steps(self, free_night, expansion):
+        runtime = _runtime({"s1": _availability("s1", [_day(free_night)])})
+
+        rooms, search_range = _found(
+            await _search(runtime, START.isoformat(), END.isoformat())
+        )
+
+        assert rooms == {"s1": [{"start": _day(free_night), "end": _day(free_night)}]}
+        assert search_range == {
+            "start": _day(-expansion),
+            "end": _day(2 + expansion),
+        }
+        runtime.context.room_availability.get_availability.assert_awaited_once()
+
+    # Scenario 4: Nights beyond the widest window never match
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("free_night", [-8, 9])
+    async def test_beyond_widest_window(self, free_night):
+        runtime = _runtime({"s1": _availability("s1", [_day(free_night)])})
+
+        result = await _search(runtime, START.isoformat(), END.isoformat())
+
+        assert result == f"No rooms found between {_day(0)} and {_day(2)}"
+
+    # Scenario 5: Expanding never starts before today
+    @pytest.mark.asyncio
+    async def test_expansion_is_clamped_to_today(self):
+        today = date.today()
+        start, end = today + timedelta(days=2), today + timedelta(days=3)
+        runtime = _runtime({"s1": _availability("s1", [today.isoformat()])})
+
+        rooms, search_range = _found(
+            await _search(runtime, start.isoformat(), end.isoformat())
+        )
+
+        runtime.context.room_availability.get_availability.assert_awaited_once_with(
+            today.isoformat(), (end + timedelta(days=7)).isoformat()
+        )
+        assert rooms == {"s1": [{"start": today.isoformat(), "end": today.isoformat()}]}
+        assert search_range == {
+            "start": today.isoformat(),
+            "end": (end + timedelta(days=3)).isoformat(),
+        }
@@ -22,7 +22,7 @@ async def deselect_rooms(
         Message indicating which rooms were deselected.
     """
 
-    internal_room_dict = runtime.state["rooms"]
+    internal_room_dict = runtime.context.rooms
 
     # Validate args
     validate_room_names(internal_room_dict, [room_name])
@@ -7,14 +7,17 @@ from langchain_core.tools import tool
 from langgraph.types import Command
 
 from agent.context.agent_service_provider import AgentServiceProvider
-from agent.services.room_availability_service import RoomAvailabilityService
+from agent.services.room_availability_service import InternalRoomAvailabilityData
 from agent.tools.common_validators import validate_dates, validate_room_names
 from agent.tools.exceptions import ToolValidationError
 from agent.types import InternalRoom
+from agent.utils.availability_mask import DateRange
 
 EXPANSION_STEPS = [0, 3, 5, 7]
 
-type RoomAvailabilityResult = dict[str, set[str]]
+# Room name → free nights as inclusive date ranges. Kept as plain strings because it
+# is checkpointed in graph state and rendered by the UI node.
+type RoomAvailabilityResult = dict[str, list[DateRange]]
 
 
 @tool
@@ -37,7 +40,7 @@ async def search_available_rooms(
     # Prepare services
     room_availability_svc = runtime.context.room_availability
 
-    internal_room_dict: dict[str, InternalRoom] = runtime.state["rooms"]
+    internal_room_dict: dict[str, InternalRoom] = runtime.context.rooms
 
     # Validate args
     validate_dates(start_date, end_date)
@@ -53,27 +56,24 @@ async def search_available_rooms(
     _validate_room_types(internal_room_dict, requested_room_types)
 
     ### Searching process ###
-    for expansion in EXPANSION_STEPS:
-        if expansion > 0:
-            today = date.today()
-            expanded_start = datetime.strptime(
-                start_date, "%Y-%m-%d"
-            ).date() - timedelta(days=expansion)
-            effective_start = max(expanded_start, today).strftime("%Y-%m-%d")
-            effective_end = (
-                datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=expansion)
-            ).strftime("%Y-%m-%d")
-        else:
-            effective_start = start_date
-            effective_end = end_date
-
-        search_result = await _search_rooms(
+    # Fetch the widest expansion window once, then evaluate every step in memory
+    search_steps = [
+        (expansion, *_expand_range(start_date, end_date, expansion))
+        for expansion in EXPANSION_STEPS
+    ]
+    room_availability = await room_availability_svc.get_availability(
+        min(step_start for _, step_start, _ in search_steps),
+        max(step_end for _, _, step_end in search_steps),
+    )
+
+    for expansion, effective_start, effective_end in search_steps:
+        search_result = _search_rooms(
             effective_start,
             effective_end,
             requested_rooms,
             requested_room_types,
             internal_room_dict,
-            room_availability_svc,
+            room_availability,
         )
 
         if search_result:
@@ -129,21 +129,35 @@ def _validate_room_types(
 ######################## Helpers ################################
 
 
-async def _search_rooms(
+def _expand_range(start_date: str, end_date: str, expansion: int) -> tuple[str, str]:
+    """Widen [start_date, end_date) by `expansion` days each side, never starting before today."""
+    if expansion == 0:
+        return start_date, end_date
+    today = date.today()
+    expanded_start = datetime.strptime(start_date, "%Y-%m-%d").date() - timedelta(
+        days=expansion
+    )
+    effective_start = max(expanded_start, today).strftime("%Y-%m-%d")
+    effective_end = (
+        datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=expansion)
+    ).strftime("%Y-%m-%d")
+    return effective_start, effective_end
+
+
+def _search_rooms(
     start_date: str,
     end_date: str,
     requested_rooms: list[str] | None,
     requested_room_types: list[str] | None,
     internal_room_dict: dict[str, InternalRoom],
-    availability_svc: RoomAvailabilityService,
+    room_availability: dict[str, InternalRoomAvailabilityData],
 ) -> RoomAvailabilityResult:
-    """Search rooms from PMS. Returns raw room names + available dates."""
-    room_availability = await availability_svc.get_availability(start_date, end_date)
-
+    """Filter already-fetched PMS availability to [start_date, end_date). Returns raw room names + available dates."""
     # Filter rooms that exist internally and match requested rooms/room types
     qualified_rooms: RoomAvailabilityResult = {}
     for room_no, room_data in room_availability.items():
-        if not room_data["dates"]:
+        dates = room_data["dates"].clip(start_date, end_date)
+        if not dates:
             continue
 
         room_no_lower = room_no.lower()
@@ -160,6 +174,6 @@ async def _search_rooms(
             continue
 
         # add room to qualified rooms
-        qualified_rooms[room_no_lower] = room_data["dates"]
+        qualified_rooms[room_no_lower] = dates.to_date_ranges()
 
     return qualified_rooms
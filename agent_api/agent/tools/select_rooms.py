@@ -29,7 +29,7 @@ async def select_rooms(
     """
 
     room_availability_svc = runtime.context.room_availability
-    internal_room_dict = runtime.state["rooms"]
+    internal_room_dict = runtime.context.rooms
 
     # Validate args
     validate_dates(check_in_date, check_out_date)
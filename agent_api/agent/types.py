@@ -1,5 +1,6 @@
 from typing import TypedDict
 
+from agent.utils.availability_mask import DateRange
 from core.photo_helpers import EmbeddedPhoto
 
 
@@ -49,7 +50,7 @@ class RoomCard(TypedDict):
     tags: list[str]
     thumbnail_url: str
     photos: list[EmbeddedPhoto]
-    date_ranges: list[dict[str, str]]
+    date_ranges: list[DateRange]
 
 
 MAP_SRC = "/static/photos/maps/resort_map.jpeg"
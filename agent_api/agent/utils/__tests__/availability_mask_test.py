@@ -0,0 +1,95 @@
+from datetime import date
+
+from agent.utils.availability_mask import EMPTY_MASK, AvailabilityMask, DateRange
+
+
+class TestAvailabilityMask:
+    def test_from_range_excludes_end_date(self):
+        mask = AvailabilityMask.from_range("2026-04-10", "2026-04-13")
+
+        assert mask.to_date_strings() == {"2026-04-10", "2026-04-11", "2026-04-12"}
+        assert len(mask) == 3
+
+    def test_equal_sets_compare_equal_regardless_of_construction(self):
+        by_range = AvailabilityMask.from_range("2026-04-10", "2026-04-12")
+        by_dates = AvailabilityMask.from_dates(["2026-04-11", "2026-04-10"])
+
+        assert by_range == by_dates
+
+    def test_union_and_intersection_across_windows(self):
+        first = AvailabilityMask.from_range("2026-04-09", "2026-04-23")
+        second = AvailabilityMask.from_range("2026-04-23", "2026-05-07")
+
+        merged = first | second
+
+        assert len(merged) == 28
+        assert merged & AvailabilityMask.from_range(
+            "2026-04-20", "2026-04-26"
+        ) == AvailabilityMask.from_range("2026-04-20", "2026-04-26")
+        assert first & second == EMPTY_MASK
+
+    def test_subtracting_a_reservation(self):
+        window = AvailabilityMask.from_range("2026-04-10", "2026-04-17")
+
+        free = window - AvailabilityMask.from_range("2026-04-12", "2026-04-14")
+
+        assert "2026-04-11" in free
+        assert "2026-04-12" not in free
+        assert "2026-04-13" not in free
+        assert "2026-04-14" in free
+
+    def test_clip_keeps_only_requested_nights(self):
+        window = AvailabilityMask.from_range("2026-04-09", "2026-04-23")
+
+        clipped = window.clip("2026-04-09", "2026-04-11")
+
+        assert clipped.to_date_strings() == {"2026-04-09", "2026-04-10"}
+
+    def test_covers_requires_every_night(self):
+        free = AvailabilityMask.from_dates(["2026-04-10", "2026-04-12"])
+
+        assert free.covers("2026-04-10", "2026-04-11")
+        assert not free.covers("2026-04-10", "2026-04-13")
+        # Checkout night is never required
+        assert AvailabilityMask.from_range("2026-04-13", "2026-04-15").covers(
+            date(2026, 4, 13), date(2026, 4, 15)
+        )
+
+    def test_consecutive_nights(self):
+        # Free Apr 10-12 and Apr 15-16
+        free = AvailabilityMask.from_range(
+            "2026-04-10", "2026-04-13"
+        ) | AvailabilityMask.from_range("2026-04-15", "2026-04-17")
+
+        # 3-night stays can only start on Apr 10
+        assert free.consecutive(3).to_date_strings() == {"2026-04-10"}
+        # 2-night stays can start Apr 10, 11 or 15
+        assert free.consecutive(2).to_date_strings() == {
+            "2026-04-10",
+            "2026-04-11",
+            "2026-04-15",
+        }
+        assert not free.consecutive(4)
+
+    def test_date_ranges_round_trip(self):
+        ranges: list[DateRange] = [
+            {"start": "2026-04-10", "end": "2026-04-12"},
+            {"start": "2026-04-15", "end": "2026-04-15"},
+        ]
+
+        mask = AvailabilityMask.from_date_ranges(ranges)
+
+        assert mask.to_date_ranges() == ranges
+        assert list(mask) == [
+            date(2026, 4, 10),
+            date(2026, 4, 11),
+            date(2026, 4, 12),
+            date(2026, 4, 15),
+        ]
+
+    def test_empty_mask(self):
+        assert not EMPTY_MASK
+        assert EMPTY_MASK.to_date_ranges() == []
+        assert EMPTY_MASK | AvailabilityMask.from_dates(["2026-04-10"]) == (
+            AvailabilityMask.from_dates(["2026-04-10"])
+        )
@@ -0,0 +1,59 @@
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+
+from agent.utils.history import (
+    split_turns,
+    turns_to_summarize,
+    unsummarized_messages,
+)
+
+
+def _turn(n: int, with_tool: bool = False) -> list[AnyMessage]:
+    messages: list[AnyMessage] = [HumanMessage(content=f"question {n}", id=f"h{n}")]
+    if with_tool:
+        messages += [
+            AIMessage(
+                content="",
+                id=f"c{n}",
+                tool_calls=[{"name": "search", "args": {}, "id": f"call{n}"}],
+            ),
+            ToolMessage(content="2 rooms", tool_call_id=f"call{n}", id=f"t{n}"),
+        ]
+    messages.append(AIMessage(content=f"answer {n}", id=f"a{n}"))
+    return messages
+
+
+class TestHistory:
+    def test_tool_call_and_result_stay_in_the_same_turn(self):
+        turns = split_turns(_turn(1) + _turn(2, with_tool=True))
+
+        assert [len(t) for t in turns] == [2, 4]
+        assert isinstance(turns[1][1], AIMessage) and turns[1][1].tool_calls
+        assert isinstance(turns[1][2], ToolMessage)
+
+    def test_nothing_to_summarize_until_a_full_batch_falls_out_of_the_window(self):
+        turns = split_turns([m for n in range(5) for m in _turn(n)])
+
+        assert turns_to_summarize(turns, keep_turns=2, batch_turns=4) == []
+        assert [
+            m.id for m in turns_to_summarize(turns, keep_turns=2, batch_turns=3)
+        ] == [
+            "h0",
+            "a0",
+            "h1",
+            "a1",
+            "h2",
+            "a2",
+        ]
+
+    def test_unsummarized_messages_start_after_the_marker(self):
+        messages = _turn(1) + _turn(2, with_tool=True)
+
+        assert [m.id for m in unsummarized_messages(messages, "a1")] == [
+            "h2",
+            "c2",
+            "t2",
+            "a2",
+        ]
+        assert unsummarized_messages(messages, None) == messages
+        # Marker no longer present (e.g. messages were removed): send everything
+        assert unsummarized_messages(messages, "gone") == messages
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date
+from typing import TypedDict
+
+
+class DateRange(TypedDict):
+    """Inclusive run of dates as sent to the UI, e.g. {"start": "2026-04-10", "end": "2026-04-12"}."""
+
+    start: str
+    end: str
+
+
+def to_ordinal(day: date | str) -> int:
+    """Day offset used as the bit index (proleptic Gregorian ordinal)."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
+
+
+@dataclass(frozen=True, slots=True)
+class AvailabilityMask:
+    """Immutable set of dates stored as bits of an int.
+
+    Bit `i` set means the night of `date.fromordinal(base + i)` is free. The
+    mask is normalised so bit 0 is always the earliest free night, which keeps
+    a 14-day window at a couple of machine words and makes equal sets compare
+    equal. Union, intersection and clipping are single big-int operations;
+    date strings are only produced at the UI/LLM boundary.
+    """
+
+    base: int = 0  # Ordinal of bit 0
+    bits: int = 0
+
+    # ── Construction ──────────────────────────────────────────────────────────
+    @classmethod
+    def from_range(cls, start: date | str, end: date | str) -> AvailabilityMask:
+        """All nights in [start, end)."""
+        start_ord, end_ord = to_ordinal(start), to_ordinal(end)
+        if end_ord <= start_ord:
+            return EMPTY_MASK
+        return cls(start_ord, (1 << (end_ord - start_ord)) - 1)
+
+    @classmethod
+    def from_bits(cls, base: int, bits: int) -> AvailabilityMask:
+        """Wrap raw bits where bit `i` is the night `date.fromordinal(base + i)`."""
+        return _normalised(base, bits)
+
+    @classmethod
+    def from_dates(cls, dates: Iterable[date | str]) -> AvailabilityMask:
+        ordinals = [to_ordinal(d) for d in dates]
+        if not ordinals:
+            return EMPTY_MASK
+        base = min(ordinals)
+        bits = 0
+        for ordinal in ordinals:
+            bits |= 1 << (ordinal - base)
+        return cls(base, bits)
+
+    @classmethod
+    def from_date_ranges(cls, ranges: Iterable[DateRange]) -> AvailabilityMask:
+        """Inverse of `to_date_ranges` (ranges are inclusive of `end`)."""
+        mask = EMPTY_MASK
+        for r in ranges:
+            start_ord, last_ord = to_ordinal(r["start"]), to_ordinal(r["end"])
+            if last_ord >= start_ord:
+                mask |= cls(start_ord, (1 << (last_ord - start_ord + 1)) - 1)
+        return mask
+
+    # ── Set operations ────────────────────────────────────────────────────────
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __contains__(self, day: object) -> bool:
+        if not isinstance(day, (date, str)):
+            return False
+        offset = to_ordinal(day) - self.base
+        return offset >= 0 and bool(self.bits >> offset & 1)
+
+    def __iter__(self) -> Iterator[date]:
+        bits, ordinal = self.bits, self.base
+        while bits:
+            skip = _trailing_zeros(bits)
+            bits >>= skip + 1
+            ordinal += skip
+            yield date.fromordinal(ordinal)
+            ordinal += 1
+
+    def __or__(self, other: AvailabilityMask) -> AvailabilityMask:
+        if not self.bits:
+            return other
+        if not other.bits:
+            return self
+        base, a, b = self._aligned(other)
+        return _normalised(base, a | b)
+
+    def __and__(self, other: AvailabilityMask) -> AvailabilityMask:
+        if not self.bits or not other.bits:
+            return EMPTY_MASK
+        base, a, b = self._aligned(other)
+        return _normalised(base, a & b)
+
+    def __sub__(self, other: AvailabilityMask) -> AvailabilityMask:
+        if not self.bits or not other.bits:
+            return self
+        base, a, b = self._aligned(other)
+        return _normalised(base, a & ~b)
+
+    def _aligned(self, other: AvailabilityMask) -> tuple[int, int, int]:
+        base = min(self.base, other.base)
+        return (
+            base,
+            self.bits << (self.base - base),
+            other.bits << (other.base - base),
+        )
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+    def clip(self, start: date | str, end: date | str) -> AvailabilityMask:
+        """Only the nights within [start, end)."""
+        return self & AvailabilityMask.from_range(start, end)
+
+    def covers(self, start: date | str, end: date | str) -> bool:
+        """True if every night in [start, end) is free."""
+        required = AvailabilityMask.from_range(start, end)
+        return (self & required) == required
+
+    def consecutive(self, nights: int) -> AvailabilityMask:
+        """Start dates from which at least `nights` consecutive nights are free."""
+        if nights <= 1 or not self.bits:
+            return self
+        bits = self.bits
+        for shift in range(1, nights):
+            bits &= self.bits >> shift
+        return _normalised(self.base, bits)
+
+    def ranges(self) -> list[tuple[date, date]]:
+        """Free nights grouped into inclusive (first, last) runs, in date order."""
+        runs: list[tuple[date, date]] = []
+        bits, ordinal = self.bits, self.base
+        while bits:
+            skip = _trailing_zeros(bits)
+            bits >>= skip
+            ordinal += skip
+            run = _trailing_ones(bits)
+            runs.append(
+                (date.fromordinal(ordinal), date.fromordinal(ordinal + run - 1))
+            )
+            bits >>= run
+            ordinal += run
+        return runs
+
+    # ── Boundary conversions ──────────────────────────────────────────────────
+    def to_date_strings(self) -> set[str]:
+        return {d.isoformat() for d in self}
+
+    def to_date_ranges(self) -> list[DateRange]:
+        return [
+            {"start": first.isoformat(), "end": last.isoformat()}
+            for first, last in self.ranges()
+        ]
+
+
+EMPTY_MASK = AvailabilityMask()
+
+
+def _normalised(base: int, bits: int) -> AvailabilityMask:
+    if not bits:
+        return EMPTY_MASK
+    skip = _trailing_zeros(bits)
+    return AvailabilityMask(base + skip, bits >> skip)
+
+
+def _trailing_zeros(bits: int) -> int:
+    return (bits & -bits).bit_length() - 1
+
+
+def _trailing_ones(bits: int) -> int:
+    return (bits ^ (bits + 1)).bit_length() - 1
@@ -0,0 +1,39 @@
+from collections.abc import Sequence
+
+from langchain_core.messages import AnyMessage, HumanMessage
+
+
+def unsummarized_messages(
+    messages: Sequence[AnyMessage], summarized_until: str | None
+) -> list[AnyMessage]:
+    """Messages after the one with id `summarized_until` (all of them if unset or gone)."""
+    if summarized_until is not None:
+        for i, message in enumerate(messages):
+            if message.id == summarized_until:
+                return list(messages[i + 1 :])
+    return list(messages)
+
+
+def split_turns(messages: Sequence[AnyMessage]) -> list[list[AnyMessage]]:
+    """Group messages into turns, each starting at a guest message.
+
+    An AI tool call and its ToolMessage results always sit in the same turn,
+    so cutting history at a turn boundary never orphans either side.
+    """
+    turns: list[list[AnyMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def turns_to_summarize(
+    turns: list[list[AnyMessage]], keep_turns: int, batch_turns: int
+) -> list[AnyMessage]:
+    """Messages of the turns older than the last `keep_turns`, once there are at
+    least `batch_turns` of them (so the summary is not rewritten every turn)."""
+    older = turns[: max(len(turns) - keep_turns, 0)]
+    if not older or len(older) < batch_turns:
+        return []
+    return [message for turn in older for message in turn]
@@ -20,12 +20,14 @@ EXCLUDE_TABLES = {
     "checkpoints",
     "checkpoint_writes",
     "checkpoint_migrations",
+    "shared_cache",
 }
 
 
 def include_object(object, name, type_, reflected, compare_to):
     if type_ == "table":
         # Ignore tables managed by external libraries (e.g. LangGraph checkpoints)
+        # or by raw SQL migrations (the UNLOGGED shared cache)
         if name in EXCLUDE_TABLES:
             return False
     return True
@@ -0,0 +1,44 @@
+"""add shared_cache
+
+Revision ID: 7c1e5a9d3b42
+Revises: 2306cf1eb24c
+Create Date: 2026-10-16 10:12:37.418205
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1e5a9d3b42"
+down_revision: Union[str, Sequence[str], None] = "2306cf1eb24c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # UNLOGGED: no WAL for cache writes; the table is emptied after a crash
+    op.execute(
+        """
+        CREATE UNLOGGED TABLE tatoh.shared_cache (
+            key text PRIMARY KEY,
+            value bytea NOT NULL,
+            expires_at timestamptz NOT NULL
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_tatoh_shared_cache_expires_at"
+        " ON tatoh.shared_cache (expires_at)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_tatoh_shared_cache_expires_at", table_name="shared_cache", schema="tatoh"
+    )
+    op.drop_table("shared_cache", schema="tatoh")
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+from api.dependencies import require_auth
+from api.main import app
+
+
+class TestMetrics:
+    # Scenario 1: Upstream guard internals are not served to anonymous callers
+    def test_requires_auth(self):
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 401
+
+    # Scenario 2: A signed-in admin gets the per-worker metrics
+    def test_served_to_admin(self):
+        app.dependency_overrides[require_auth] = lambda: "admin"
+        try:
+            response = TestClient(app).get("/metrics")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert "pms" in response.json()
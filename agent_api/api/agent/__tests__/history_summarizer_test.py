@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, cast
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+
+from api.agent import history_summarizer as module
+from api.agent.history_summarizer import SUMMARY_AS_NODE, HistorySummarizer
+from api.agent.run_coordinator import ThreadClaim, ThreadRunCoordinator
+from core.config import settings
+
+
+def _messages(turns: int) -> list[AnyMessage]:
+    messages: list[AnyMessage] = []
+    for n in range(turns):
+        messages.append(HumanMessage(content=f"question {n}", id=f"h{n}"))
+        messages.append(AIMessage(content=f"answer {n}", id=f"a{n}"))
+    return messages
+
+
+def _graph(turns: int) -> Any:
+    snapshot = SimpleNamespace(values={"messages": _messages(turns)})
+    return SimpleNamespace(
+        aget_state=AsyncMock(return_value=snapshot), aupdate_state=AsyncMock()
+    )
+
+
+def _coordinator(free: bool = True) -> Any:
+    return SimpleNamespace(
+        try_acquire=AsyncMock(return_value=ThreadClaim("t1") if free else None),
+        release=AsyncMock(),
+    )
+
+
+def _summarizer(coordinator: Any) -> HistorySummarizer:
+    return HistorySummarizer(cast(ThreadRunCoordinator, coordinator))
+
+
+@pytest.fixture
+def summary_model(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    model = MagicMock()
+    model.ainvoke = AsyncMock(return_value=AIMessage(content="Guest wants S1"))
+    monkeypatch.setattr(module, "get_summary_model", lambda: model)
+    monkeypatch.setattr(settings, "agent_history_keep_turns", 2)
+    monkeypatch.setattr(settings, "agent_history_summary_batch_turns", 2)
+    return model
+
+
+class TestHistorySummarizer:
+    # Scenario 1: Turns out of the window are folded and written under a claim
+    @pytest.mark.asyncio
+    async def test_writes_summary_while_thread_is_free(self, summary_model):
+        graph, coordinator = _graph(turns=4), _coordinator()
+
+        assert await _summarizer(coordinator).summarize(graph, "t1")
+
+        graph.aupdate_state.assert_awaited_once_with(
+            {"configurable": {"thread_id": "t1"}},
+            {"conversation_summary": "Guest wants S1", "summarized_until": "a1"},
+            as_node=SUMMARY_AS_NODE,
+        )
+        coordinator.release.assert_awaited_once()
+
+    # Scenario 2: Fewer than a batch of old turns: no model call, no write
+    @pytest.mark.asyncio
+    async def test_nothing_to_fold(self, summary_model):
+        graph, coordinator = _graph(turns=3), _coordinator()
+
+        assert not await _summarizer(coordinator).summarize(graph, "t1")
+
+        summary_model.ainvoke.assert_not_called()
+        coordinator.try_acquire.assert_not_called()
+
+    # Scenario 3: A run holding the thread keeps it; the summary is dropped
+    @pytest.mark.asyncio
+    async def test_busy_thread_skips_the_write(self, summary_model):
+        graph, coordinator = _graph(turns=4), _coordinator(free=False)
+
+        assert not await _summarizer(coordinator).summarize(graph, "t1")
+
+        graph.aupdate_state.assert_not_called()
+        coordinator.release.assert_not_called()
+
+    # Scenario 4: A failing summary model is logged, never raised to the run
+    @pytest.mark.asyncio
+    async def test_failure_is_contained(self, summary_model, caplog):
+        summary_model.ainvoke.side_effect = RuntimeError("model down")
+        graph = _graph(turns=4)
+        summarizer = _summarizer(_coordinator())
+
+        summarizer.schedule(graph, "t1")
+        await asyncio.gather(*summarizer._tasks.values())
+
+        assert "model down" in caplog.text
+        graph.aupdate_state.assert_not_called()
+
+    # Scenario 5: One pass per thread at a time
+    @pytest.mark.asyncio
+    async def test_schedule_deduplicates_per_thread(self, summary_model):
+        release = asyncio.Event()
+
+        async def slow_summary(*args: object) -> AIMessage:
+            await release.wait()
+            return AIMessage(content="summary")
+
+        summary_model.ainvoke = slow_summary
+        graph = _graph(turns=4)
+        summarizer = _summarizer(_coordinator())
+
+        summarizer.schedule(graph, "t1")
+        summarizer.schedule(graph, "t1")
+        summarizer.schedule(graph, "t2")
+        assert set(summarizer._tasks) == {"t1", "t2"}
+
+        release.set()
+        await asyncio.gather(*summarizer._tasks.values())
+        assert graph.aupdate_state.await_count == 2
+        assert summarizer._tasks == {}
@@ -0,0 +1,167 @@
+import asyncio
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+from psycopg import AsyncConnection, OperationalError
+
+from api.agent.run_coordinator import (
+    RunConflictPolicy,
+    ThreadBusyError,
+    ThreadRunCoordinator,
+)
+
+
+@dataclass
+class FakePostgres:
+    """Postgres side of a coordinator: the advisory lock is free unless told not."""
+
+    try_lock: AsyncMock
+    unlock: AsyncMock = field(default_factory=AsyncMock)
+    notify: AsyncMock = field(default_factory=AsyncMock)
+
+
+@pytest.fixture
+def coordinator_for(monkeypatch: pytest.MonkeyPatch) -> Any:
+    def make(
+        policy: RunConflictPolicy, lock_free: bool = True
+    ) -> tuple[ThreadRunCoordinator, FakePostgres]:
+        coordinator = ThreadRunCoordinator(
+            policy, queue_timeout_seconds=1, poll_interval_seconds=0.01
+        )
+        postgres = FakePostgres(try_lock=AsyncMock(return_value=lock_free))
+        monkeypatch.setattr(coordinator, "_try_lock", postgres.try_lock)
+        monkeypatch.setattr(coordinator, "_unlock", postgres.unlock)
+        monkeypatch.setattr(coordinator, "_notify", postgres.notify)
+        return coordinator, postgres
+
+    return make
+
+
+class FakeConnection:
+    """Answers every SELECT with True until `drop()` closes it."""
+
+    def __init__(self) -> None:
+        self.closed = False
+        self.queries: list[tuple[str, tuple[object, ...]]] = []
+
+    def drop(self) -> None:
+        self.closed = True
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def execute(self, query: str, params: tuple[object, ...]) -> Any:
+        if self.closed:
+            raise OperationalError("the connection is lost")
+        self.queries.append((query, params))
+        return SimpleNamespace(fetchone=AsyncMock(return_value=(True,)))
+
+
+class TestThreadRunCoordinator:
+    # Scenario 1: Second run in the same worker is rejected even though the
+    # (re-entrant) advisory lock would be granted again
+    @pytest.mark.asyncio
+    async def test_reject_second_run_in_same_worker(self, coordinator_for):
+        coordinator, postgres = coordinator_for(RunConflictPolicy.REJECT)
+        claim = await coordinator.acquire("t1")
+
+        with pytest.raises(ThreadBusyError):
+            await coordinator.acquire("t1")
+
+        await coordinator.release(claim)
+        assert await coordinator.acquire("t1")
+        postgres.unlock.assert_awaited_once()
+
+    # Scenario 2: Another worker holds the lock — reject without waiting
+    @pytest.mark.asyncio
+    async def test_reject_when_other_worker_holds_lock(self, coordinator_for):
+        coordinator, _ = coordinator_for(RunConflictPolicy.REJECT, lock_free=False)
+
+        with pytest.raises(ThreadBusyError):
+            await coordinator.acquire("t1")
+        assert coordinator._claims == {}
+
+    # Scenario 3: Enqueue waits for the current run to release the thread
+    @pytest.mark.asyncio
+    async def test_enqueue_waits_for_release(self, coordinator_for):
+        coordinator, _ = coordinator_for(RunConflictPolicy.ENQUEUE)
+        first = await coordinator.acquire("t1")
+
+        second = asyncio.create_task(coordinator.acquire("t1"))
+        await asyncio.sleep(0.05)
+        assert not second.done()
+
+        await coordinator.release(first)
+        assert (await second).thread_id == "t1"
+
+    # Scenario 4: Interrupt cancels the run in this worker, then starts
+    @pytest.mark.asyncio
+    async def test_interrupt_cancels_previous_run(self, coordinator_for):
+        coordinator, postgres = coordinator_for(RunConflictPolicy.INTERRUPT)
+        first = await coordinator.acquire("t1")
+
+        async def run() -> None:
+            try:
+                await asyncio.sleep(10)
+            finally:
+                await coordinator.release(first)
+
+        first.task = asyncio.create_task(run())
+        await asyncio.sleep(0)
+
+        second = await coordinator.acquire("t1")
+
+        assert first.task.cancelled()
+        assert second is not first
+        # The lock was never held elsewhere, so no other worker is told
+        postgres.notify.assert_not_called()
+
+    # Scenario 5: Another worker holds the lock: NOTIFY it once, then wait
+    @pytest.mark.asyncio
+    async def test_interrupt_notifies_other_workers_once(self, coordinator_for):
+        coordinator, postgres = coordinator_for(RunConflictPolicy.INTERRUPT)
+        postgres.try_lock.side_effect = [False, False, False, True]
+
+        claim = await coordinator.acquire("t1")
+
+        assert claim.thread_id == "t1"
+        postgres.notify.assert_awaited_once()
+        assert '"thread_id": "t1"' in postgres.notify.await_args.args[0]
+
+
+class TestLockConnection:
+    @pytest.fixture
+    def connections(self, monkeypatch: pytest.MonkeyPatch) -> list[FakeConnection]:
+        """Every connection the coordinator opened, oldest first."""
+        opened: list[FakeConnection] = []
+
+        async def connect(*args: object, **kwargs: object) -> FakeConnection:
+            opened.append(FakeConnection())
+            return opened[-1]
+
+        monkeypatch.setattr(AsyncConnection, "connect", connect)
+        return opened
+
+    # Scenario 1: A lost connection is replaced and held locks are taken again
+    @pytest.mark.asyncio
+    async def test_reconnects_and_relocks_held_claims(self, connections):
+        async with ThreadRunCoordinator(
+            RunConflictPolicy.REJECT, queue_timeout_seconds=1
+        ) as coordinator:
+            held = await coordinator.acquire("t1")
+            connections[0].drop()
+
+            other = await coordinator.acquire("t2")
+            await coordinator.release(held)
+            await coordinator.release(other)
+
+        assert len(connections) == 2
+        assert [(q.split("(")[0], p[1]) for q, p in connections[1].queries] == [
+            ("SELECT pg_try_advisory_lock", "t1"),  # Re-taken after reconnecting
+            ("SELECT pg_try_advisory_lock", "t2"),
+            ("SELECT pg_advisory_unlock", "t1"),
+            ("SELECT pg_advisory_unlock", "t2"),
+        ]
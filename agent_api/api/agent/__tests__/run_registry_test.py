@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from api.agent.run_registry import RunRegistry, RunStream
+
+
+async def _collect(run: RunStream, last_event_id: int = 0) -> list[bytes]:
+    return [frame async for frame in run.follow(last_event_id)]
+
+
+async def _finish(run: RunStream) -> None:
+    assert run.task is not None
+    await run.task
+
+
+class TestRunRegistry:
+    # Scenario 1: Frames carry increasing ids; a reconnect replays after Last-Event-ID
+    @pytest.mark.asyncio
+    async def test_replay_after_last_event_id(self):
+        registry = RunRegistry(max_events=100, ttl_seconds=60)
+
+        async def execute(run: RunStream) -> None:
+            for i in range(3):
+                await run.publish("values", {"step": i})
+
+        run = registry.start("thread-1", execute)
+        assert await _collect(run) == [
+            b'id: 1\nevent: values\ndata: {"step":0}\n\n',
+            b'id: 2\nevent: values\ndata: {"step":1}\n\n',
+            b'id: 3\nevent: values\ndata: {"step":2}\n\n',
+        ]
+        replay = registry.get(run.run_id)
+        assert replay is not None
+        assert await _collect(replay, last_event_id=2) == [
+            b'id: 3\nevent: values\ndata: {"step":2}\n\n'
+        ]
+
+    # Scenario 2: The run keeps going after its first listener goes away
+    @pytest.mark.asyncio
+    async def test_run_is_detached_from_listener(self):
+        registry = RunRegistry(max_events=100, ttl_seconds=60)
+        release = asyncio.Event()
+
+        async def execute(run: RunStream) -> None:
+            await run.publish("metadata", {})
+            await release.wait()
+            await run.publish("end", None)
+
+        run = registry.start("thread-1", execute)
+        listener = run.follow()
+        assert (await anext(listener)).startswith(b"id: 1\n")
+        await listener.aclose()  # Connection dropped
+
+        release.set()
+        await _finish(run)
+        assert run.finished
+        assert len(await _collect(run, last_event_id=1)) == 1
+
+    # Scenario 3: Only the last max_events frames are kept
+    @pytest.mark.asyncio
+    async def test_buffer_is_bounded(self):
+        registry = RunRegistry(max_events=2, ttl_seconds=60)
+
+        async def execute(run: RunStream) -> None:
+            for i in range(5):
+                await run.publish("values", i)
+
+        run = registry.start("thread-1", execute)
+        await _finish(run)
+
+        frames = await _collect(run)
+        assert [f.split(b"\n")[0] for f in frames] == [b"id: 4", b"id: 5"]
+
+    # Scenario 4: Finished runs are dropped after the TTL
+    @pytest.mark.asyncio
+    async def test_finished_runs_expire(self):
+        registry = RunRegistry(max_events=10, ttl_seconds=0)
+
+        async def execute(run: RunStream) -> None:
+            await run.publish("end", None)
+
+        run = registry.start("thread-1", execute)
+        await _finish(run)
+
+        assert registry.get(run.run_id) is None
+
+    # Scenario 5: Run ids name the worker holding their frames
+    @pytest.mark.asyncio
+    async def test_run_id_names_its_worker(self):
+        here = RunRegistry(max_events=10, ttl_seconds=60, worker_id="w1")
+        elsewhere = RunRegistry(max_events=10, ttl_seconds=60, worker_id="w2")
+
+        async def execute(run: RunStream) -> None:
+            await run.publish("end", None)
+
+        run = here.start("thread-1", execute)
+        await _finish(run)
+
+        assert run.run_id.startswith("w1.")
+        assert here.owner(run.run_id) == "w1"
+        assert elsewhere.get(run.run_id) is None
+        assert elsewhere.owner(run.run_id) == "w1"
+
+    # Scenario 6: A client resuming past evicted frames gets the latest snapshot
+    # first, so values-delta frames have something to apply to
+    @pytest.mark.asyncio
+    async def test_resume_after_eviction_starts_from_snapshot(self):
+        registry = RunRegistry(max_events=3, ttl_seconds=60)
+
+        async def execute(run: RunStream) -> None:
+            await run.publish("metadata", {})  # 1
+            await run.publish("values", {"n": 0}, snapshot={"n": 0})  # 2
+            await run.publish("values-delta", {"n": 1}, snapshot={"n": 1})  # 3
+            await run.publish("values-delta", {"n": 2}, snapshot={"n": 2})  # 4
+            await run.publish("messages", "token")  # 5
+            await run.publish("end", None)  # 6
+
+        run = registry.start("thread-1", execute)
+        await _finish(run)
+
+        snapshot = b'id: 4\nevent: values\ndata: {"n":2}\n\n'
+        # Frames 2 and 3 are gone: the snapshot stands in for them and frame 4
+        for last_event_id in (0, 1, 2):
+            frames = await _collect(run, last_event_id)
+            assert frames[0] == snapshot
+            assert [f.split(b"\n")[0] for f in frames[1:]] == [b"id: 5", b"id: 6"]
+        # Nothing after Last-Event-ID was dropped: plain replay
+        resumed = await _collect(run, last_event_id=3)
+        assert [f.split(b"\n", 2)[:2] for f in resumed] == [
+            [b"id: 4", b"event: values-delta"],
+            [b"id: 5", b"event: messages"],
+            [b"id: 6", b"event: end"],
+        ]
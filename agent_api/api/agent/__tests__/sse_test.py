@@ -0,0 +1,117 @@
+import json
+from typing import Any
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+from api.agent import sse
+from api.agent.sse import SseEncoder, ValuesDelta
+
+
+def _data(event: bytes) -> Any:
+    header, data, *_ = event.decode().split("\n")
+    assert header.startswith("event: ")
+    return json.loads(data.removeprefix("data: "))
+
+
+class TestSseEncoder:
+    def test_values_event_matches_model_dump(self):
+        messages = [
+            HumanMessage(content="ห้องว่างไหม", id="h1"),
+            AIMessage("Yes", id="a1"),
+        ]
+        ui = [
+            {"type": "ui", "id": "u1", "name": "search_results", "props": {"rooms": []}}
+        ]
+
+        event = SseEncoder().event("values", {"messages": messages, "ui": ui})
+
+        assert event.startswith(b"event: values\ndata: ")
+        assert event.endswith(b"\n\n")
+        assert _data(event) == {
+            "messages": [m.model_dump(mode="json") for m in messages],
+            "ui": ui,
+        }
+
+    def test_messages_already_sent_are_not_re_encoded(self):
+        encoder = SseEncoder()
+        history = [HumanMessage(content="hi", id="h1"), AIMessage("hello", id="a1")]
+        encoder.event("values", {"messages": history})
+
+        with patch.object(sse, "_dumps", wraps=sse._dumps) as dumps:
+            reply = AIMessage("anything else?", id="a2")
+            event = encoder.event("values", {"messages": [*history, reply]})
+
+        # Only the new message and the key are encoded; history is spliced in
+        encoded = [call.args[0] for call in dumps.call_args_list]
+        assert encoded == ["messages", reply]
+        assert len(_data(event)["messages"]) == 3
+
+    def test_streaming_chunks_are_not_cached(self):
+        encoder = SseEncoder()
+        chunk = AIMessageChunk(content="Hel", id="run-1")
+
+        event = encoder.event("messages", (chunk, {"langgraph_node": "agent"}))
+
+        assert _data(event)[0]["content"] == "Hel"
+        assert _data(event)[1] == {"langgraph_node": "agent"}
+        assert encoder._items == {}
+
+    def test_end_event_with_no_data(self):
+        assert SseEncoder().event("end", None) == b"event: end\ndata: null\n\n"
+
+
+class TestValuesDelta:
+    # Scenario 1: First event is a full snapshot, then only the new reply is sent
+    def test_snapshot_then_new_messages_only(self):
+        delta = ValuesDelta(SseEncoder())
+        history = [HumanMessage(content="hi", id="h1"), AIMessage("hello", id="a1")]
+
+        first = delta.event({"messages": history, "ui": []})
+        reply = AIMessage("anything else?", id="a2")
+        second = delta.event({"messages": [*history, reply], "ui": []})
+
+        assert first == ("values", {"messages": history, "ui": []})
+        assert second == (
+            "values-delta",
+            {
+                "messages": [reply],
+                "ui": [],
+                "removed_messages_ids": [],
+                "removed_ui_ids": [],
+            },
+        )
+
+    # Scenario 2: Same id with new content (e.g. UI entry updated) is resent
+    def test_changed_entry_is_resent(self):
+        delta = ValuesDelta(SseEncoder())
+        delta.event({"messages": [], "ui": [{"type": "ui", "id": "u1", "props": {}}]})
+
+        updated = {"type": "ui", "id": "u1", "props": {"rooms": ["s1"]}}
+        result = delta.event({"messages": [], "ui": [updated]})
+
+        assert result is not None
+        event, payload = result
+
+        assert event == "values-delta"
+        assert payload["ui"] == [updated]
+
+    # Scenario 3: Nothing changed between super-steps — no event at all
+    def test_unchanged_values_send_nothing(self):
+        delta = ValuesDelta(SseEncoder())
+        values = {"messages": [HumanMessage(content="hi", id="h1")], "ui": []}
+        delta.event(values)
+
+        assert delta.event(values) is None
+
+    # Scenario 4: Removed message ids are reported
+    def test_removed_ids(self):
+        delta = ValuesDelta(SseEncoder())
+        delta.event({"messages": [HumanMessage(content="hi", id="h1")], "ui": []})
+
+        result = delta.event({"messages": [], "ui": []})
+
+        assert result is not None
+        _, payload = result
+
+        assert payload["removed_messages_ids"] == ["h1"]
@@ -0,0 +1,136 @@
+"""Rolling summary of old turns, kept up to date after each run."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Mapping
+from typing import Any
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+
+from agent.model import get_summary_model
+from agent.prompt import get_summary_input, summary_prompt
+from agent.utils.history import split_turns, turns_to_summarize, unsummarized_messages
+from api.agent.run_coordinator import ThreadRunCoordinator, run_coordinator
+from core.config import settings
+from core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# The summary is written as if by the graph's last node, so nothing runs after it
+SUMMARY_AS_NODE = "push_pending_search_results_ui"
+
+
+@traced("history.summarize")
+async def summarize_history(values: Mapping[str, Any]) -> dict[str, Any] | None:
+    """State update folding turns older than the verbatim window into the summary.
+
+    Messages stay in state (the UI renders them); `agent_node` just stops
+    sending anything up to `summarized_until` to the model. None while fewer
+    than a batch of turns has fallen out of the window.
+    """
+    turns = split_turns(
+        unsummarized_messages(
+            values.get("messages", []), values.get("summarized_until")
+        )
+    )
+    folded = turns_to_summarize(
+        turns,
+        keep_turns=settings.agent_history_keep_turns,
+        batch_turns=settings.agent_history_summary_batch_turns,
+    )
+    if not folded:
+        return None
+
+    response = await get_summary_model().ainvoke(
+        [
+            SystemMessage(content=summary_prompt),
+            HumanMessage(
+                content=get_summary_input(values.get("conversation_summary"), folded)
+            ),
+        ]
+    )
+    return {
+        "conversation_summary": response.text,
+        "summarized_until": folded[-1].id,
+    }
+
+
+class HistorySummarizer:
+    """Updates a thread's rolling summary in the background once a run ends.
+
+    The guest's reply, the run's `end` event and the thread claim never wait
+    on the summary model. It is called without holding the thread; the result
+    is then written under a claim taken only if the thread is free, so it
+    never delays, rejects or interrupts a run. If a new run got the thread
+    first, the write is skipped and the pass after that run folds the same
+    turns. Failures are logged: the next pass simply retries.
+
+    Used as an async context manager from the FastAPI lifespan, which cancels
+    passes still running at shutdown.
+    """
+
+    def __init__(self, coordinator: ThreadRunCoordinator | None = None) -> None:
+        self.coordinator = run_coordinator if coordinator is None else coordinator
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    async def __aenter__(self) -> HistorySummarizer:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def schedule(
+        self, graph: CompiledStateGraph[Any, Any, Any, Any], thread_id: str
+    ) -> None:
+        """Start a pass for `thread_id` unless one is already running."""
+        if thread_id in self._tasks:
+            return
+        task = asyncio.create_task(
+            self._run(graph, thread_id), name=f"summarize-{thread_id}"
+        )
+        self._tasks[thread_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(thread_id, None))
+
+    async def summarize(
+        self, graph: CompiledStateGraph[Any, Any, Any, Any], thread_id: str
+    ) -> bool:
+        """One pass; True if a new summary was written."""
+        config: RunnableConfig = {"configurable": {"thread_id": thread_id}}
+        snapshot = await graph.aget_state(config)
+        update = await summarize_history(snapshot.values)
+        if update is None:
+            return False
+
+        claim = await self.coordinator.try_acquire(thread_id)
+        if claim is None:
+            logger.info(
+                "Thread %s is busy, its summary waits for the next run", thread_id
+            )
+            return False
+        try:
+            await graph.aupdate_state(config, update, as_node=SUMMARY_AS_NODE)
+        finally:
+            await self.coordinator.release(claim)
+        return True
+
+    async def _run(
+        self, graph: CompiledStateGraph[Any, Any, Any, Any], thread_id: str
+    ) -> None:
+        try:
+            await self.summarize(graph, thread_id)
+        except Exception as e:
+            logger.warning("Summarizing thread %s failed: %s", thread_id, e)
+
+
+# Create the singleton instance
+history_summarizer = HistorySummarizer()
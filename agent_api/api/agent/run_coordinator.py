@@ -0,0 +1,245 @@
+"""One run at a time per thread, across every uvicorn worker."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import LiteralString
+
+from psycopg import AsyncConnection, OperationalError
+
+from core.config import settings
+from db.database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-int advisory lock, so thread locks can't collide with
+# advisory locks taken by anything else on the database
+LOCK_NAMESPACE = 7301
+INTERRUPT_CHANNEL = "tatoh_run_interrupt"
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+class RunConflictPolicy(StrEnum):
+    REJECT = "reject"  # Refuse the new run while one is going
+    ENQUEUE = "enqueue"  # Wait for the current run to finish
+    INTERRUPT = "interrupt"  # Cancel the current run, then start
+
+
+class ThreadBusyError(Exception):
+    def __init__(self, thread_id: str) -> None:
+        super().__init__(f"Thread {thread_id} already has a run in progress")
+        self.thread_id = thread_id
+
+
+@dataclass
+class ThreadClaim:
+    """Exclusive right to run the graph on one thread, until released."""
+
+    thread_id: str
+    created_at: float = field(default_factory=time.time)
+    task: asyncio.Task[None] | None = None  # Cancelled when interrupted
+
+
+class ThreadRunCoordinator:
+    """Grants at most one `ThreadClaim` per thread across all workers.
+
+    Claims are Postgres session-level advisory locks, all held on one dedicated
+    connection per worker, plus a local map since those locks are re-entrant
+    within a session. A second run on a busy thread is handled per `policy`;
+    `interrupt` cancels a run in this worker directly, and NOTIFYs
+    `INTERRUPT_CHANNEL` only when another worker holds the lock.
+
+    If the lock connection drops, Postgres releases every lock it held; the
+    next query reconnects and takes the locks of claims still held here again.
+    The LISTEN connection reconnects on its own; interrupts sent meanwhile are
+    missed, leaving the interrupting run to wait for the thread as if enqueued.
+
+    Used as an async context manager from the FastAPI lifespan.
+    """
+
+    def __init__(
+        self,
+        policy: RunConflictPolicy,
+        queue_timeout_seconds: float,
+        poll_interval_seconds: float = 0.25,
+    ) -> None:
+        self.policy = policy
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.worker_id = uuid.uuid4().hex
+        self._claims: dict[str, ThreadClaim] = {}
+        self._locked: set[str] = set()  # Claims whose advisory lock was granted
+        self._lock_conn: AsyncConnection | None = None
+        self._reconnecting = asyncio.Lock()
+        self._listen_conn: AsyncConnection | None = None
+        self._listener: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> ThreadRunCoordinator:
+        self._lock_conn = await AsyncConnection.connect(DATABASE_URL, autocommit=True)
+        if self.policy is RunConflictPolicy.INTERRUPT:
+            self._listen_conn = await self._connect_listener()
+            self._listener = asyncio.create_task(
+                self._listen(), name="run-interrupt-listener"
+            )
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        for conn in (self._listen_conn, self._lock_conn):
+            if conn is not None:
+                await conn.close()
+        self._listen_conn = self._lock_conn = None
+        self._claims.clear()
+        self._locked.clear()
+
+    async def acquire(self, thread_id: str) -> ThreadClaim:
+        """Claim `thread_id`, or raise `ThreadBusyError` per the policy."""
+        interrupt = self.policy is RunConflictPolicy.INTERRUPT
+        requested_at = time.time()
+        if interrupt:
+            self._cancel_local(thread_id, requested_at)
+
+        deadline = time.monotonic() + self.queue_timeout_seconds
+        while True:
+            claimed_here = thread_id in self._claims
+            claim = await self.try_acquire(thread_id)
+            if claim is not None:
+                return claim
+            if self.policy is RunConflictPolicy.REJECT or time.monotonic() >= deadline:
+                raise ThreadBusyError(thread_id)
+            if interrupt and not claimed_here:
+                # Another worker holds the lock; tell it once
+                await self._notify_interrupt(thread_id, requested_at)
+                interrupt = False
+            await asyncio.sleep(self.poll_interval_seconds)
+
+    async def try_acquire(self, thread_id: str) -> ThreadClaim | None:
+        """Claim `thread_id` if it is free right now, whatever the policy."""
+        if thread_id in self._claims:
+            return None
+        # Reserve locally before awaiting: the advisory lock is re-entrant, so
+        # it alone can't exclude this worker's requests
+        claim = self._claims[thread_id] = ThreadClaim(thread_id)
+        try:
+            locked = await self._try_lock(thread_id)
+        except BaseException:
+            del self._claims[thread_id]
+            raise
+        if locked:
+            self._locked.add(thread_id)
+            return claim
+        del self._claims[thread_id]
+        return None
+
+    async def release(self, claim: ThreadClaim) -> None:
+        if self._claims.get(claim.thread_id) is not claim:
+            return
+        try:
+            await self._unlock(claim.thread_id)
+        except Exception as e:
+            logger.warning("Could not unlock thread %s: %s", claim.thread_id, e)
+        finally:
+            del self._claims[claim.thread_id]
+            self._locked.discard(claim.thread_id)
+
+    async def _notify_interrupt(self, thread_id: str, sent_at: float) -> None:
+        payload = json.dumps(
+            {"thread_id": thread_id, "worker_id": self.worker_id, "sent_at": sent_at}
+        )
+        await self._notify(payload)
+
+    def _cancel_local(self, thread_id: str, before: float) -> None:
+        claim = self._claims.get(thread_id)
+        # Only runs that started before the interrupt, never the run asking for it
+        if claim is not None and claim.task is not None and claim.created_at < before:
+            claim.task.cancel()
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                if self._listen_conn is None or self._listen_conn.closed:
+                    self._listen_conn = await self._connect_listener()
+                async for notify in self._listen_conn.notifies():
+                    message = json.loads(notify.payload)
+                    if message["worker_id"] != self.worker_id:
+                        self._cancel_local(message["thread_id"], message["sent_at"])
+            except Exception as e:
+                logger.warning("Run interrupt listener failed, restarting: %s", e)
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    # ── Postgres ──────────────────────────────────────────────────────────────
+    async def _try_lock(self, thread_id: str) -> bool:
+        return await self._query(
+            "SELECT pg_try_advisory_lock(%s, hashtext(%s))",
+            (LOCK_NAMESPACE, thread_id),
+        )
+
+    async def _unlock(self, thread_id: str) -> None:
+        await self._query(
+            "SELECT pg_advisory_unlock(%s, hashtext(%s))",
+            (LOCK_NAMESPACE, thread_id),
+        )
+
+    async def _notify(self, payload: str) -> None:
+        await self._query("SELECT pg_notify(%s, %s)", (INTERRUPT_CHANNEL, payload))
+
+    async def _query(self, query: LiteralString, params: tuple[object, ...]) -> bool:
+        """First column of a one-row SELECT, retried once over a new connection."""
+        conn = await self._lock_connection()
+        try:
+            cur = await conn.execute(query, params)
+        except OperationalError:
+            if not conn.closed:
+                raise
+            conn = await self._lock_connection()
+            cur = await conn.execute(query, params)
+        row = await cur.fetchone()
+        return bool(row and row[0])
+
+    async def _lock_connection(self) -> AsyncConnection:
+        """The lock connection, replaced if it was lost.
+
+        The locks of claims still held are taken again on the new connection; a
+        thread that another worker claimed in between is logged, and its run
+        here is left to finish.
+        """
+        assert self._lock_conn is not None, "coordinator not started"
+        async with self._reconnecting:
+            if not self._lock_conn.closed:
+                return self._lock_conn
+            logger.warning("Run lock connection lost, reconnecting")
+            self._lock_conn = conn = await AsyncConnection.connect(
+                DATABASE_URL, autocommit=True
+            )
+            for thread_id in list(self._locked):
+                cur = await conn.execute(
+                    "SELECT pg_try_advisory_lock(%s, hashtext(%s))",
+                    (LOCK_NAMESPACE, thread_id),
+                )
+                row = await cur.fetchone()
+                if not (row and row[0]):
+                    logger.warning("Thread %s was claimed by another worker", thread_id)
+            return conn
+
+    async def _connect_listener(self) -> AsyncConnection:
+        conn = await AsyncConnection.connect(DATABASE_URL, autocommit=True)
+        await conn.execute(f"LISTEN {INTERRUPT_CHANNEL}")
+        return conn
+
+
+# Create the singleton instance
+run_coordinator = ThreadRunCoordinator(
+    policy=RunConflictPolicy(settings.run_conflict_policy),
+    queue_timeout_seconds=settings.run_queue_timeout_seconds,
+)
@@ -0,0 +1,172 @@
+"""Detached graph runs whose SSE events can be replayed after a reconnect.
+
+Frames are buffered in the memory of the worker running the graph, so only
+that worker can replay them. Run ids start with the id of the worker that
+owns them (`<worker_id>.<uuid>`): a reconnect reaching another worker is told
+so with a 421 carrying the owner in `X-Run-Worker`, rather than a 404 that
+would read as an unknown run. Deployments with several workers must route
+`GET .../runs/{run_id}/stream` back to that worker (e.g. sticky sessions or
+a load balancer rule on the id prefix) for reconnects to resume.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import secrets
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+
+from api.agent.sse import SseEncoder
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RunStream:
+    """Bounded buffer of one run's SSE frames, numbered for `Last-Event-ID`.
+
+    The run task appends frames as it goes; any number of connections follow
+    it, each from its own position. Only the last `max_events` frames are
+    kept. A client that falls further behind would miss the state those frames
+    carried (in `values-delta` mode, the snapshot the deltas apply to), so it
+    is first sent the latest full `values` snapshot, under the id of the frame
+    that produced it, and resumes after that frame.
+    """
+
+    def __init__(self, run_id: str, thread_id: str, max_events: int) -> None:
+        self.run_id = run_id
+        self.thread_id = thread_id
+        self.encoder = SseEncoder()
+        self.finished_at: float | None = None
+        self.task: asyncio.Task[None] | None = None
+        self._frames: deque[tuple[int, bytes]] = deque(maxlen=max_events)
+        self._last_id = 0
+        self._snapshot: tuple[int, object] | None = None  # (frame id, values)
+        self._changed = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def publish(
+        self, event: str, data: object, snapshot: object | None = None
+    ) -> None:
+        """Append a frame; `snapshot` is the full state it leaves a client with."""
+        async with self._changed:
+            self._last_id += 1
+            frame = self.encoder.event(event, data, event_id=self._last_id)
+            self._frames.append((self._last_id, frame))
+            if snapshot is not None:
+                self._snapshot = (self._last_id, snapshot)
+            self._changed.notify_all()
+
+    async def close(self) -> None:
+        async with self._changed:
+            self.finished_at = time.time()
+            self._changed.notify_all()
+
+    async def follow(self, last_event_id: int = 0) -> AsyncGenerator[bytes]:
+        """Yield frames after `last_event_id` until the run has finished."""
+        cursor = last_event_id
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self._last_id > cursor or self.finished
+                )
+                frames = self._snapshot_frames(cursor)
+                start = frames[-1][0] if frames else cursor
+                frames += [(i, f) for i, f in self._frames if i > start]
+                done = self.finished
+            for cursor, frame in frames:
+                yield frame
+            if done and cursor >= self._last_id:
+                return
+
+    def _snapshot_frames(self, cursor: int) -> list[tuple[int, bytes]]:
+        """The latest snapshot, if frames after `cursor` were dropped since it."""
+        evicted = bool(self._frames) and self._frames[0][0] > cursor + 1
+        if not evicted or self._snapshot is None or self._snapshot[0] <= cursor:
+            return []
+        snapshot_id, values = self._snapshot
+        return [(snapshot_id, self.encoder.event("values", values, snapshot_id))]
+
+
+class RunRegistry:
+    """Process-wide registry of detached runs.
+
+    A run keeps executing when its HTTP connection drops; its frames stay
+    replayable for `ttl_seconds` after it finishes. Used as an async context
+    manager from the FastAPI lifespan so shutdown cancels runs still going.
+    """
+
+    def __init__(
+        self, max_events: int, ttl_seconds: float, worker_id: str | None = None
+    ) -> None:
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self.worker_id = secrets.token_hex(4) if worker_id is None else worker_id
+        self._runs: dict[str, RunStream] = {}
+
+    async def __aenter__(self) -> RunRegistry:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        tasks = [run.task for run in self._runs.values() if run.task is not None]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._runs.clear()
+
+    def start(
+        self, thread_id: str, execute: Callable[[RunStream], Awaitable[None]]
+    ) -> RunStream:
+        """Create a run and execute it in the background, detached from the caller."""
+        self._evict_expired()
+        run_id = f"{self.worker_id}.{uuid.uuid4()}"
+        run = RunStream(run_id, thread_id, self.max_events)
+        run.task = asyncio.create_task(
+            self._execute(run, execute), name=f"run-{run.run_id}"
+        )
+        self._runs[run.run_id] = run
+        return run
+
+    def get(self, run_id: str) -> RunStream | None:
+        self._evict_expired()
+        return self._runs.get(run_id)
+
+    def owner(self, run_id: str) -> str:
+        """Id of the worker that started `run_id`, read from the id itself."""
+        return run_id.partition(".")[0]
+
+    async def _execute(
+        self, run: RunStream, execute: Callable[[RunStream], Awaitable[None]]
+    ) -> None:
+        try:
+            await execute(run)
+        except Exception:
+            logger.exception("Run %s failed", run.run_id)
+        finally:
+            await run.close()
+
+    def _evict_expired(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            run_id
+            for run_id, run in self._runs.items()
+            if run.finished_at is not None and run.finished_at < cutoff
+        ]
+        for run_id in expired:
+            del self._runs[run_id]
+
+
+# Create the singleton instance
+run_registry = RunRegistry(
+    max_events=settings.run_replay_max_events,
+    ttl_seconds=settings.run_replay_ttl_seconds,
+)
@@ -1,10 +1,9 @@
-import json
+import asyncio
 import logging
-import uuid
 from collections.abc import AsyncGenerator
 from typing import Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.responses import StreamingResponse
 from langchain_core.messages import BaseMessage
 from langgraph.graph.state import CompiledStateGraph
@@ -13,7 +12,13 @@ from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from agent.context.agent_service_provider import AgentServiceProvider
-from api.dependencies import get_db, get_graph
+from api.agent.history_summarizer import history_summarizer
+from api.agent.run_coordinator import ThreadBusyError, run_coordinator
+from api.agent.run_registry import RunStream, run_registry
+from api.agent.sse import VALUES_DELTA_MODE, ValuesDelta
+from api.dependencies import get_graph
+from core.tracing import trace_run
+from db.database import AsyncSessionLocal
 from db.models import GuestThread
 
 logger = logging.getLogger(__name__)
@@ -26,23 +31,15 @@ class RunInput(BaseModel):
     stream_mode: list[str] | str = ["values", "messages-tuple", "custom"]
     assistant_id: str = "agent"
 
-
-def _serialize(obj: object) -> object:
-    """Make LangGraph output JSON-serializable."""
-    if isinstance(obj, BaseMessage):
-        return obj.model_dump(mode="json")
-    if isinstance(obj, BaseModel):
-        return obj.model_dump(mode="json")
-    if isinstance(obj, dict):
-        return {k: _serialize(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [_serialize(item) for item in obj]
-    return obj
-
-
-def _sse_event(event: str, data: object) -> str:
-    """Format a Server-Sent Event."""
-    return f"event: {event}\ndata: {json.dumps(_serialize(data), default=str)}\n\n"
+    @property
+    def values_delta(self) -> bool:
+        """Opt-in: send a full `values` snapshot, then only `values-delta` changes."""
+        modes = (
+            [self.stream_mode]
+            if isinstance(self.stream_mode, str)
+            else self.stream_mode
+        )
+        return VALUES_DELTA_MODE in modes
 
 
 def _get_msg_type(msg: BaseMessage | dict[str, Any]) -> str:
@@ -82,74 +79,87 @@ def _has_tool_calls(msg: BaseMessage | dict[str, Any]) -> bool:
     return False
 
 
-@router.post("/{thread_id}/runs/stream")
-async def stream_run(
+async def _execute_run(
+    graph: CompiledStateGraph[Any, Any, Any, Any],
     thread_id: str,
     body: RunInput,
-    graph: CompiledStateGraph[Any, Any, Any, Any] = Depends(get_graph),
-    db: AsyncSession = Depends(get_db),
-) -> StreamingResponse:
-    """Stream a graph run, matching LangGraph Agent Server SSE format."""
-    context = AgentServiceProvider(db_session=db)
+    run: RunStream,
+) -> None:
+    """Run the graph and publish its events; owns its DB session, not the request's."""
     config = {"configurable": {"thread_id": thread_id}}
-    run_id = str(uuid.uuid4())
-
     human_text = _extract_human_text(body.input)
-
-    async def event_generator() -> AsyncGenerator[str]:
-        yield _sse_event("metadata", {"run_id": run_id})
-
-        try:
-            async for chunk in graph.astream(  # type: ignore[call-overload]
-                body.input or {},
-                config,
-                stream_mode=["messages", "values", "custom"],
-                version="v2",
-                context=context,
-            ):
-                event_type = chunk["type"]
-                data = chunk["data"]
-
-                if event_type == "messages":
-                    msg_chunk, metadata = data
-                    # Only stream text content from the agent node
-                    if not isinstance(msg_chunk, BaseMessage) or not isinstance(
-                        metadata, dict
-                    ):
-                        continue
-                    if (
-                        not msg_chunk.content
-                        or metadata.get("langgraph_node") != "agent"
-                    ):
-                        continue
-
-                elif event_type == "values":
-                    if not isinstance(data, dict):
-                        continue
-                    # Only send human + final ai messages (no tool-call ai) and ui
-                    filtered_messages = [
-                        m
-                        for m in data.get("messages", [])
-                        if _get_msg_type(m) == "human"
-                        or (_get_msg_type(m) == "ai" and not _has_tool_calls(m))
-                    ]
-                    data = {
-                        "messages": filtered_messages,
-                        "ui": data.get("ui", []),
-                    }
-
-                yield _sse_event(event_type, data)
-        except Exception as e:
-            logger.exception(f"Stream failed for thread {thread_id}")
-            yield _sse_event("error", {"message": str(e)})
-
-        yield _sse_event("end", None)
-
-        if human_text:
-            await _maybe_set_title(db, thread_id, human_text)
-
+    values_delta = ValuesDelta(run.encoder) if body.values_delta else None
+
+    with trace_run(thread_id, run.run_id):
+        async with AsyncSessionLocal() as db:
+            context = AgentServiceProvider(db_session=db)
+            await run.publish("metadata", {"run_id": run.run_id})
+
+            try:
+                async for chunk in graph.astream(  # type: ignore[call-overload]
+                    body.input or {},
+                    config,
+                    stream_mode=["messages", "values", "custom"],
+                    version="v2",
+                    context=context,
+                ):
+                    event_type = chunk["type"]
+                    data = chunk["data"]
+                    snapshot = None
+
+                    if event_type == "messages":
+                        msg_chunk, metadata = data
+                        # Only stream text content from the agent node
+                        if not isinstance(msg_chunk, BaseMessage) or not isinstance(
+                            metadata, dict
+                        ):
+                            continue
+                        if (
+                            not msg_chunk.content
+                            or metadata.get("langgraph_node") != "agent"
+                        ):
+                            continue
+
+                    elif event_type == "values":
+                        if not isinstance(data, dict):
+                            continue
+                        # Only send human + final ai messages (no tool-call ai) and ui
+                        filtered_messages = [
+                            m
+                            for m in data.get("messages", [])
+                            if _get_msg_type(m) == "human"
+                            or (_get_msg_type(m) == "ai" and not _has_tool_calls(m))
+                        ]
+                        data = snapshot = {
+                            "messages": filtered_messages,
+                            "ui": data.get("ui", []),
+                        }
+                        if values_delta is not None:
+                            delta_event = values_delta.event(data)
+                            if delta_event is None:
+                                continue
+                            event_type, data = delta_event
+
+                    await run.publish(event_type, data, snapshot=snapshot)
+            except asyncio.CancelledError:
+                await run.publish("error", {"message": "Run interrupted"})
+                await run.publish("end", None)
+                raise
+            except Exception as e:
+                logger.exception(f"Stream failed for thread {thread_id}")
+                await run.publish("error", {"message": str(e)})
+            else:
+                history_summarizer.schedule(graph, thread_id)
+
+            await run.publish("end", None)
+
+            if human_text:
+                await _maybe_set_title(db, thread_id, human_text)
+
+
+def _sse_response(events: AsyncGenerator[bytes]) -> StreamingResponse:
     return StreamingResponse(
-        event_generator(),
+        events,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -157,3 +167,59 @@ async def stream_run(
             "X-Accel-Buffering": "no",
         },
     )
+
+
+@router.post("/{thread_id}/runs/stream")
+async def stream_run(
+    thread_id: str,
+    body: RunInput,
+    graph: CompiledStateGraph[Any, Any, Any, Any] = Depends(get_graph),
+) -> StreamingResponse:
+    """Stream a graph run, matching LangGraph Agent Server SSE format.
+
+    The run is detached from this connection: if it drops, the run carries on
+    and its events can be replayed from `GET .../runs/{run_id}/stream`. A
+    thread runs one graph at a time; RUN_CONFLICT_POLICY decides whether a
+    second request gets a 409, waits, or interrupts the first run.
+    """
+    try:
+        claim = await run_coordinator.acquire(thread_id)
+    except ThreadBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from None
+
+    async def execute(run: RunStream) -> None:
+        try:
+            await _execute_run(graph, thread_id, body, run)
+        finally:
+            await run_coordinator.release(claim)
+
+    run = run_registry.start(thread_id, execute)
+    claim.task = run.task
+    return _sse_response(run.follow())
+
+
+@router.get("/{thread_id}/runs/{run_id}/stream")
+async def join_run_stream(
+    thread_id: str,
+    run_id: str,
+    last_event_id: str | None = Header(default=None),
+) -> StreamingResponse:
+    """Reconnect to a run, replaying the events after `Last-Event-ID`.
+
+    Only the worker that started the run has its events; any other answers
+    421 with that worker's id in `X-Run-Worker` (see `run_registry`).
+    """
+    run = run_registry.get(run_id)
+    if run is None and (owner := run_registry.owner(run_id)) != run_registry.worker_id:
+        raise HTTPException(
+            status_code=421,
+            detail=f"Run {run_id} is not on this worker",
+            headers={"X-Run-Worker": owner},
+        )
+    if run is None or run.thread_id != thread_id:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    try:
+        after = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID") from None
+    return _sse_response(run.follow(after))
@@ -0,0 +1,143 @@
+"""Server-Sent Event encoding for the runs stream."""
+
+import json
+from typing import Any
+
+from langchain_core.messages import BaseMessage, BaseMessageChunk
+from pydantic import BaseModel
+
+
+def _default(obj: object) -> object:
+    """`json` fallback for objects it can't encode natively (called lazily, per object)."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return str(obj)
+
+
+_encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def _dumps(obj: object) -> bytes:
+    return _encoder.encode(obj).encode()
+
+
+class SseEncoder:
+    """Encodes one stream's events to bytes, reusing the JSON of items already sent.
+
+    `values` events repeat the whole message list and `ui` list on every
+    super-step. Finished messages and UI entries are encoded once per stream,
+    keyed by object identity plus id, and spliced into later events as bytes.
+    Streaming chunks are never cached since each is only sent once.
+    """
+
+    def __init__(self) -> None:
+        # (id(obj), item id) -> (obj, encoded); holding `obj` keeps id() unique
+        self._items: dict[tuple[int, str], tuple[object, bytes]] = {}
+
+    def event(self, event: str, data: object, event_id: int | None = None) -> bytes:
+        frame = b"event: " + event.encode() + b"\ndata: " + self.encode(data) + b"\n\n"
+        if event_id is not None:
+            frame = b"id: " + str(event_id).encode() + b"\n" + frame
+        return frame
+
+    def encode(self, data: object) -> bytes:
+        """JSON-encode `data`, looking one container level deep for cacheable items."""
+        if isinstance(data, dict):
+            return self._encode_dict(data, depth=1)
+        if isinstance(data, (list, tuple)):
+            return self._encode_list(data, depth=1)
+        return self.encode_item(data)
+
+    def _encode_dict(self, data: dict[Any, Any], depth: int) -> bytes:
+        return (
+            b"{"
+            + b",".join(
+                _dumps(str(key)) + b":" + self._encode_value(value, depth)
+                for key, value in data.items()
+            )
+            + b"}"
+        )
+
+    def _encode_list(self, data: list[Any] | tuple[Any, ...], depth: int) -> bytes:
+        return b"[" + b",".join(self._encode_value(v, depth) for v in data) + b"]"
+
+    def _encode_value(self, value: object, depth: int) -> bytes:
+        if depth and isinstance(value, (list, tuple)):
+            return self._encode_list(value, depth - 1)
+        return self.encode_item(value)
+
+    def encode_item(self, item: object) -> bytes:
+        """JSON-encode a single value, from the cache when it is a finished message or UI entry."""
+        key = _cache_key(item)
+        if key is None:
+            return _dumps(item)
+        cached = self._items.get(key)
+        if cached is None:
+            cached = self._items[key] = (item, _dumps(item))
+        return cached[1]
+
+
+def _cache_key(item: object) -> tuple[int, str] | None:
+    if isinstance(item, BaseMessage):
+        if isinstance(item, BaseMessageChunk) or item.id is None:
+            return None
+        return id(item), item.id
+    if isinstance(item, dict) and item.get("type") == "ui" and "id" in item:
+        return id(item), str(item["id"])
+    return None
+
+
+VALUES_DELTA_MODE = "values-delta"
+
+
+class ValuesDelta:
+    """Turns successive `values` payloads into deltas for the `values-delta` stream mode.
+
+    The first payload is passed through as a full snapshot. After that only
+    messages and UI entries that are new or whose encoding changed since the
+    last event are sent, keyed by id, along with the ids that disappeared.
+    """
+
+    KEYS = ("messages", "ui")
+
+    def __init__(self, encoder: SseEncoder) -> None:
+        self._encoder = encoder
+        self._sent: dict[str, dict[str, bytes]] | None = None
+
+    def event(
+        self, values: dict[str, list[Any]]
+    ) -> tuple[str, dict[str, list[Any]]] | None:
+        """The (event, payload) to send for `values`, or None when nothing changed."""
+        first = self._sent is None
+        sent = self._sent or {key: {} for key in self.KEYS}
+        current: dict[str, dict[str, bytes]] = {}
+        delta: dict[str, list[Any]] = {}
+        for key in self.KEYS:
+            current[key] = {}
+            changed = []
+            for item in values.get(key, []):
+                encoded = self._encoder.encode_item(item)
+                item_id = _item_id(item)
+                if item_id is None or sent[key].get(item_id) != encoded:
+                    changed.append(item)
+                if item_id is not None:
+                    current[key][item_id] = encoded
+            delta[key] = changed
+            delta[f"removed_{key}_ids"] = [
+                i for i in sent[key] if i not in current[key]
+            ]
+        self._sent = current
+
+        if first:
+            return "values", values
+        if not any(delta.values()):
+            return None
+        return VALUES_DELTA_MODE, delta
+
+
+def _item_id(item: object) -> str | None:
+    if isinstance(item, BaseMessage):
+        return item.id
+    if isinstance(item, dict) and "id" in item:
+        return str(item["id"])
+    return None
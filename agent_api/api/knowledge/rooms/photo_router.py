@@ -10,6 +10,7 @@ from PIL import Image as PILImage
 from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from agent.services.room_catalog import room_catalog
 from api.dependencies import get_db, require_auth
 from api.knowledge.rooms.photo_schemas import PhotoReorderItem, PhotoResponse
 from api.schemas import OkResponse
@@ -133,6 +134,7 @@ async def upload_photo(
     db.add(photo)
     await db.commit()
     await db.refresh(photo)
+    await room_catalog.invalidate_everywhere()
 
     return PhotoResponse(
         id=photo.id,
@@ -180,6 +182,7 @@ async def delete_photo(
     # Delete from database
     await db.execute(delete(RoomPhoto).where(RoomPhoto.id == photo_id))
     await db.commit()
+    await room_catalog.invalidate_everywhere()
 
 
 @router.patch("/{room_id}/photos/reorder", response_model=OkResponse)
@@ -205,4 +208,5 @@ async def reorder_photos(
         )
 
     await db.commit()
+    await room_catalog.invalidate_everywhere()
     return OkResponse()
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from agent.services.room_catalog import room_catalog
 from api.dependencies import get_db, require_auth
 from api.knowledge.rooms.schemas import RoomCreate, RoomResponse, RoomUpdate
 from api.knowledge.rooms.service import RoomManagementService
@@ -29,7 +30,9 @@ async def create_room(
     _: str = Depends(require_auth),
     db: AsyncSession = Depends(get_db),
 ) -> RoomModel:
-    return await RoomManagementService(db).create_room(data)
+    room = await RoomManagementService(db).create_room(data)
+    await room_catalog.invalidate_everywhere()
+    return room
 
 
 @router.patch("/{id}", response_model=RoomResponse)
@@ -39,7 +42,9 @@ async def update_room(
     _: str = Depends(require_auth),
     db: AsyncSession = Depends(get_db),
 ) -> RoomModel:
-    return await RoomManagementService(db).update_room(id, data)
+    room = await RoomManagementService(db).update_room(id, data)
+    await room_catalog.invalidate_everywhere()
+    return room
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -47,3 +52,4 @@ async def delete_room(
     id: int, _: str = Depends(require_auth), db: AsyncSession = Depends(get_db)
 ) -> None:
     await RoomManagementService(db).delete_room(id)
+    await room_catalog.invalidate_everywhere()
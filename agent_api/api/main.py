@@ -1,29 +1,40 @@
 import uuid
 from collections.abc import AsyncGenerator, Awaitable, Callable
 from contextlib import asynccontextmanager
+from typing import Any
 
-from fastapi import FastAPI, Request, Response
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.staticfiles import StaticFiles
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from psycopg import AsyncConnection
 from psycopg.rows import DictRow, dict_row
 from psycopg_pool import AsyncConnectionPool
 
 from agent.clients.pms_client import pms_client
 from agent.graph import graph
+from agent.services.availability_prefetcher import availability_prefetcher
+from agent.services.availability_snapshot import availability_snapshotter
+from api.agent.history_summarizer import history_summarizer
+from api.agent.run_coordinator import run_coordinator
+from api.agent.run_registry import run_registry
 from api.agent.runs import router as runs_router
 from api.agent.threads import router as threads_router
 from api.auth.router import router as auth_router
+from api.dependencies import require_auth
 from api.knowledge.conversations.router import router as conversations_router
 from api.knowledge.rooms.photo_router import router as photo_router
 from api.knowledge.rooms.router import router as rooms_router
+from core.cache_backend import cache_backend
 from core.config import STATIC_DIR
+from core.tracing import tracer
+from db.checkpoint_compaction import checkpoint_compactor
+from db.checkpointer import TracedPostgresSaver
 from db.database import DATABASE_URL, engine
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     async with (
+        tracer,
         AsyncConnectionPool[AsyncConnection[DictRow]](
             conninfo=DATABASE_URL,
             max_size=20,
@@ -33,9 +44,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
                 "row_factory": dict_row,
             },
         ) as pool,
+        cache_backend,
         pms_client,
+        availability_snapshotter,
+        availability_prefetcher,
+        checkpoint_compactor,
+        run_registry,
+        run_coordinator,
+        history_summarizer,
     ):
-        checkpointer = AsyncPostgresSaver(pool)
+        checkpointer = TracedPostgresSaver(pool)
         await checkpointer.setup()
         app.state.graph = graph.compile(checkpointer=checkpointer)
         yield
@@ -66,6 +84,12 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics(_: str = Depends(require_auth)) -> dict[str, Any]:
+    """Per-worker state of the guards around upstream services (admin only)."""
+    return {"pms": pms_client.metrics()}
+
+
 app.include_router(auth_router)
 app.include_router(conversations_router)
 app.include_router(threads_router)
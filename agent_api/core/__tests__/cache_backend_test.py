@@ -0,0 +1,126 @@
+import asyncio
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import psycopg
+import pytest
+
+from core.cache_backend import InProcessCacheBackend, PostgresCacheBackend
+
+
+class FakeListenConnection:
+    """Yields queued NOTIFY payloads; None in the queue drops the connection."""
+
+    def __init__(self) -> None:
+        self.closed = False
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue()
+
+    async def notifies(self) -> AsyncIterator[SimpleNamespace]:
+        while (payload := await self.queue.get()) is not None:
+            yield SimpleNamespace(payload=payload)
+        self.closed = True
+        raise psycopg.OperationalError("server closed the connection")
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class TestInProcessCacheBackend:
+    # Scenario 1: A value set with a TTL is readable until it expires
+    @pytest.mark.asyncio
+    async def test_get_until_expiry(self):
+        backend = InProcessCacheBackend()
+        await backend.set("a", b"1", ttl_seconds=60)
+        await backend.set("b", b"2", ttl_seconds=0)
+
+        assert await backend.get("a") == b"1"
+        assert await backend.get("b") is None
+        assert await backend.get("missing") is None
+
+    # Scenario 2: invalidate deletes the key and notifies prefix subscribers only
+    @pytest.mark.asyncio
+    async def test_invalidate_notifies_matching_subscribers(self):
+        backend = InProcessCacheBackend()
+        rooms, windows = MagicMock(), MagicMock()
+        backend.subscribe("room_catalog", rooms)
+        backend.subscribe("pms:window:", windows)
+        await backend.set("room_catalog", b"x", ttl_seconds=60)
+
+        await backend.invalidate("room_catalog")
+
+        assert await backend.get("room_catalog") is None
+        rooms.assert_called_once_with("room_catalog")
+        windows.assert_not_called()
+
+    # Scenario 3: A failing subscriber doesn't stop the others
+    @pytest.mark.asyncio
+    async def test_failing_subscriber_is_isolated(self):
+        backend = InProcessCacheBackend()
+        healthy = MagicMock()
+        backend.subscribe("k", MagicMock(side_effect=RuntimeError("boom")))
+        backend.subscribe("k", healthy)
+
+        await backend.invalidate("k")
+
+        healthy.assert_called_once_with("k")
+
+    # Scenario 4: Past max_entries the least recently used key is evicted
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        backend = InProcessCacheBackend(max_entries=2)
+        await backend.set("a", b"1", ttl_seconds=60)
+        await backend.set("b", b"2", ttl_seconds=60)
+        assert await backend.get("a") == b"1"
+
+        await backend.set("c", b"3", ttl_seconds=60)
+
+        assert await backend.get("b") is None
+        assert await backend.get("a") == b"1"
+        assert await backend.get("c") == b"3"
+
+    # Scenario 5: Expired keys are purged without being read
+    @pytest.mark.asyncio
+    async def test_purge_expired(self):
+        backend = InProcessCacheBackend()
+        await backend.set("live", b"1", ttl_seconds=60)
+        await backend.set("dead", b"2", ttl_seconds=0)
+
+        assert await backend.purge_expired() == 1
+        assert list(backend._entries) == ["live"]
+
+
+class TestPostgresCacheBackendListener:
+    # Scenario 1: A dropped LISTEN connection is reopened and NOTIFYs flow again
+    @pytest.mark.asyncio
+    async def test_reconnects_after_connection_loss(self):
+        backend = PostgresCacheBackend("postgresql://unused", reconnect_delay_seconds=0)
+        first, second = FakeListenConnection(), FakeListenConnection()
+        backend._listen_conn = first  # as opened by __aenter__
+
+        async def connect_listener():
+            return second
+
+        backend._connect_listener = connect_listener
+        rooms = MagicMock()
+        backend.subscribe("room_catalog", rooms)
+
+        listener = asyncio.create_task(backend._listen())
+        try:
+            await first.queue.put("room_catalog")
+            await first.queue.put(None)
+            await second.queue.put("room_catalog:v2")
+            for _ in range(100):
+                if rooms.call_count == 3:
+                    break
+                await asyncio.sleep(0)
+        finally:
+            listener.cancel()
+
+        assert backend._listen_conn is second
+        # Missed NOTIFYs are covered by invalidating the whole prefix on reconnect
+        assert [c.args[0] for c in rooms.call_args_list] == [
+            "room_catalog",
+            "room_catalog",
+            "room_catalog:v2",
+        ]
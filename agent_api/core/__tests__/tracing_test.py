@@ -0,0 +1,155 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from core.tracing import (
+    JsonExporter,
+    OtlpHttpExporter,
+    Span,
+    SpanExporter,
+    trace_run,
+    traced,
+    tracer,
+)
+
+
+class RecordingExporter(SpanExporter):
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exported(monkeypatch: pytest.MonkeyPatch) -> list[Span]:
+    exporter = RecordingExporter()
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    return exporter.spans
+
+
+class TestTracer:
+    # Scenario 1: Nested spans share the run's trace and point at their parent
+    @pytest.mark.asyncio
+    async def test_spans_nest_under_the_run(self, exported):
+        @traced("node.agent")
+        async def node() -> str:
+            with tracer.span("http.request", **{"http.method": "GET"}):
+                await asyncio.sleep(0)
+            return "done"
+
+        with trace_run("thread-1", "run-1"):
+            assert await node() == "done"
+
+        request, agent, run = exported
+        assert [s.name for s in exported] == ["http.request", "node.agent", "run"]
+        assert run.parent_id is None
+        assert agent.parent_id == run.span_id
+        assert request.parent_id == agent.span_id
+        assert {s.trace_id for s in exported} == {run.trace_id}
+        for s in exported:
+            assert s.attributes["thread_id"] == "thread-1"
+            assert s.attributes["run_id"] == "run-1"
+            assert s.end_ns is not None and s.end_ns >= s.start_ns
+        assert request.attributes["http.method"] == "GET"
+
+    # Scenario 2: Spans started in tasks of the run stay in it; later runs don't
+    @pytest.mark.asyncio
+    async def test_tasks_inherit_the_run(self, exported):
+        async def tool() -> None:
+            with tracer.span("tool.search"):
+                await asyncio.sleep(0)
+
+        with trace_run("thread-1", "run-1"):
+            await asyncio.gather(tool(), tool())
+        with tracer.span("outside"):
+            pass
+
+        *tools, run, outside = exported
+        assert all(t.parent_id == run.span_id for t in tools)
+        assert outside.trace_id != run.trace_id
+        assert "run_id" not in outside.attributes
+
+    # Scenario 3: An exception is recorded on the span and still raised
+    def test_error_is_recorded(self, exported):
+        @traced("node.ui")
+        def node() -> None:
+            raise ValueError("bad state")
+
+        with pytest.raises(ValueError):
+            node()
+
+        assert exported[0].error == "ValueError: bad state"
+
+    # Scenario 4: Without an exporter nothing is created
+    def test_disabled_tracer_is_a_no_op(self, monkeypatch):
+        monkeypatch.setattr(tracer, "exporter", None)
+
+        with trace_run("thread-1", "run-1") as run, tracer.span("x") as span:
+            assert run is None
+            assert span is None
+
+
+class TestExporters:
+    def _span(self, **overrides) -> Span:
+        fields = {
+            "name": "db.query",
+            "trace_id": "a" * 32,
+            "span_id": "b" * 16,
+            "parent_id": "c" * 16,
+            "start_ns": 1_000_000,
+            "end_ns": 3_000_000,
+            "attributes": {"db.statement": "SELECT", "db.rows": 2, "ok": True},
+        }
+        return Span(**(fields | overrides))
+
+    # Scenario 1: The JSON exporter writes one object per line
+    def test_json_lines(self):
+        stream = io.StringIO()
+        exporter = JsonExporter(stream)
+
+        exporter.export(self._span())
+        exporter.export(self._span(name="checkpoint.put"))
+
+        lines = stream.getvalue().splitlines()
+        assert [json.loads(line)["name"] for line in lines] == [
+            "db.query",
+            "checkpoint.put",
+        ]
+        assert json.loads(lines[0])["duration_ms"] == 2.0
+
+    # Scenario 2: OTLP payload follows the OTLP/HTTP JSON encoding
+    def test_otlp_payload(self):
+        exporter = OtlpHttpExporter("http://collector/v1/traces", "tatoh-agent-api")
+
+        payload = exporter.payload(
+            [self._span(), self._span(parent_id=None, error="boom")]
+        )
+
+        resource_spans = payload["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"] == [
+            {"key": "service.name", "value": {"stringValue": "tatoh-agent-api"}}
+        ]
+        child, root = resource_spans["scopeSpans"][0]["spans"]
+        assert child["traceId"] == "a" * 32
+        assert child["parentSpanId"] == "c" * 16
+        assert child["startTimeUnixNano"] == "1000000"
+        assert child["status"] == {"code": 1}
+        assert child["attributes"] == [
+            {"key": "db.statement", "value": {"stringValue": "SELECT"}},
+            {"key": "db.rows", "value": {"intValue": "2"}},
+            {"key": "ok", "value": {"boolValue": True}},
+        ]
+        assert "parentSpanId" not in root
+        assert root["status"] == {"code": 2, "message": "boom"}
+
+    # Scenario 3: Queued spans beyond the limit drop the oldest
+    def test_otlp_queue_is_bounded(self):
+        exporter = OtlpHttpExporter("http://collector", "svc", max_queue=2)
+
+        for name in ("a", "b", "c"):
+            exporter.export(self._span(name=name))
+
+        assert [s.name for s in exporter._queue] == ["b", "c"]
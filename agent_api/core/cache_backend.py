@@ -0,0 +1,304 @@
+"""Key/value cache shared by every uvicorn worker, with cross-worker invalidation."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_CHANNEL = "tatoh_cache_invalidate"
+
+type InvalidationCallback = Callable[[str], None]
+
+
+class CacheBackend(ABC):
+    """Byte values under string keys, each with its own TTL.
+
+    The process-local caches (availability windows, room catalog, PMS token)
+    stay in front as L1; a backend is the L2 they read through on a miss and
+    write back to, so a value fetched by one worker is reused by the others.
+    `invalidate` deletes a key and tells every worker's subscribers about it.
+
+    Used as an async context manager from the FastAPI lifespan.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: list[tuple[str, InvalidationCallback]] = []
+
+    async def __aenter__(self) -> CacheBackend:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """The value stored under `key`, or None if missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    async def invalidate(self, key: str) -> None:
+        """Delete `key` and notify subscribers to it in every worker, this one included."""
+
+    def subscribe(self, prefix: str, callback: InvalidationCallback) -> None:
+        """Call `callback(key)` whenever a key starting with `prefix` is invalidated."""
+        self._subscribers.append((prefix, callback))
+
+    def _dispatch(self, key: str) -> None:
+        for prefix, callback in self._subscribers:
+            if key.startswith(prefix):
+                self._call(callback, key)
+
+    def _dispatch_all(self) -> None:
+        """Invalidate every subscriber's prefix, when invalidations may have been missed."""
+        for prefix, callback in self._subscribers:
+            self._call(callback, prefix)
+
+    def _call(self, callback: InvalidationCallback, key: str) -> None:
+        try:
+            callback(key)
+        except Exception:
+            logger.exception("Invalidation callback failed for %s", key)
+
+
+class InProcessCacheBackend(CacheBackend):
+    """Single-worker backend: a dict, so L2 reads only ever hit this process.
+
+    Holds at most `max_entries` keys, evicting the least recently used, and
+    drops expired keys every `purge_interval_seconds` while started.
+    """
+
+    def __init__(
+        self, max_entries: int = 256, purge_interval_seconds: float = 3600
+    ) -> None:
+        super().__init__()
+        self.max_entries = max_entries
+        self.purge_interval_seconds = purge_interval_seconds
+        # key -> (value, expires), least recently used first
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._purge_task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> InProcessCacheBackend:
+        self._purge_task = asyncio.create_task(self._purge_loop(), name="cache-purge")
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._purge_task
+            self._purge_task = None
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._entries[key] = (value, time.time() + ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def invalidate(self, key: str) -> None:
+        await self.delete(key)
+        self._dispatch(key)
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        expired = [
+            k for k, (_, expires_at) in self._entries.items() if now >= expires_at
+        ]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+    async def _purge_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval_seconds)
+            purged = await self.purge_expired()
+            if purged:
+                logger.info("Purged %d expired cache entries", purged)
+
+
+class PostgresCacheBackend(CacheBackend):
+    """Backend on the UNLOGGED `tatoh.shared_cache` table, shared by every worker.
+
+    UNLOGGED skips the WAL, so writes are cheap and the table is emptied after
+    a crash, which is fine for a cache. Invalidations go out with NOTIFY on
+    `INVALIDATE_CHANNEL` and are received on a dedicated LISTEN connection.
+    Expired rows are filtered on read and purged every `purge_interval_seconds`.
+
+    If the LISTEN connection is lost it is reopened, backing off from
+    `reconnect_delay_seconds` up to `max_reconnect_delay_seconds`. NOTIFYs sent
+    meanwhile are missed, so once listening again every subscriber is called
+    with its prefix, as if everything it watches had been invalidated.
+    """
+
+    def __init__(
+        self,
+        conninfo: str,
+        max_connections: int = 4,
+        purge_interval_seconds: float = 3600,
+        reconnect_delay_seconds: float = 1,
+        max_reconnect_delay_seconds: float = 60,
+    ) -> None:
+        super().__init__()
+        self.conninfo = conninfo
+        self.max_connections = max_connections
+        self.purge_interval_seconds = purge_interval_seconds
+        self.reconnect_delay_seconds = reconnect_delay_seconds
+        self.max_reconnect_delay_seconds = max_reconnect_delay_seconds
+        self._pool: AsyncConnectionPool | None = None
+        self._listen_conn: AsyncConnection | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def __aenter__(self) -> PostgresCacheBackend:
+        self._pool = AsyncConnectionPool(
+            self.conninfo,
+            min_size=1,
+            max_size=self.max_connections,
+            kwargs={"autocommit": True, "prepare_threshold": 0},
+            open=False,
+        )
+        await self._pool.open()
+        self._listen_conn = await self._connect_listener()
+        self._tasks = [
+            asyncio.create_task(self._listen(), name="cache-invalidate-listener"),
+            asyncio.create_task(self._purge_loop(), name="cache-purge"),
+        ]
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        await self._close_listener()
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def get(self, key: str) -> bytes | None:
+        async with self._connection() as conn:
+            cur = await conn.execute(
+                "SELECT value FROM tatoh.shared_cache"
+                " WHERE key = %s AND expires_at > now()",
+                (key,),
+            )
+            row = await cur.fetchone()
+        return bytes(row[0]) if row else None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        async with self._connection() as conn:
+            await conn.execute(
+                "INSERT INTO tatoh.shared_cache (key, value, expires_at)"
+                " VALUES (%s, %s, now() + make_interval(secs => %s))"
+                " ON CONFLICT (key) DO UPDATE"
+                " SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at",
+                (key, value, ttl_seconds),
+            )
+
+    async def delete(self, key: str) -> None:
+        async with self._connection() as conn:
+            await conn.execute("DELETE FROM tatoh.shared_cache WHERE key = %s", (key,))
+
+    async def invalidate(self, key: str) -> None:
+        # This worker's subscribers hear it back through LISTEN like the others
+        async with self._connection() as conn:
+            await conn.execute("DELETE FROM tatoh.shared_cache WHERE key = %s", (key,))
+            await conn.execute("SELECT pg_notify(%s, %s)", (INVALIDATE_CHANNEL, key))
+
+    async def purge_expired(self) -> int:
+        async with self._connection() as conn:
+            cur = await conn.execute(
+                "DELETE FROM tatoh.shared_cache WHERE expires_at <= now()"
+            )
+            return cur.rowcount
+
+    @contextlib.asynccontextmanager
+    async def _connection(self) -> AsyncIterator[AsyncConnection]:
+        assert self._pool is not None, "cache backend not started"
+        async with self._pool.connection() as conn:
+            yield conn
+
+    async def _listen(self) -> None:
+        delay = self.reconnect_delay_seconds
+        while True:
+            try:
+                if self._listen_conn is None or self._listen_conn.closed:
+                    self._listen_conn = await self._connect_listener()
+                    self._dispatch_all()
+                    delay = self.reconnect_delay_seconds
+                async for notify in self._listen_conn.notifies():
+                    self._dispatch(notify.payload)
+            except Exception as e:
+                logger.warning(
+                    "Cache invalidation listener failed, retrying in %.0fs: %s",
+                    delay,
+                    e,
+                )
+                await self._close_listener()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay_seconds)
+
+    async def _connect_listener(self) -> AsyncConnection:
+        conn = await AsyncConnection.connect(self.conninfo, autocommit=True)
+        await conn.execute(f"LISTEN {INVALIDATE_CHANNEL}")
+        return conn
+
+    async def _close_listener(self) -> None:
+        if self._listen_conn is not None:
+            with contextlib.suppress(Exception):
+                await self._listen_conn.close()
+            self._listen_conn = None
+
+    async def _purge_loop(self) -> None:
+        while True:
+            try:
+                purged = await self.purge_expired()
+                if purged:
+                    logger.info("Purged %d expired shared cache entries", purged)
+            except Exception as e:
+                logger.warning("Shared cache purge failed: %s", e)
+            await asyncio.sleep(self.purge_interval_seconds)
+
+
+def create_cache_backend(kind: str) -> CacheBackend:
+    if kind == "postgres":
+        return PostgresCacheBackend(settings.database_url)
+    # Mostly availability windows, which the L1 already caps at this many
+    return InProcessCacheBackend(
+        max_entries=settings.pms_availability_cache_max_entries
+    )
+
+
+# Create the singleton instance
+cache_backend = create_cache_backend(settings.cache_backend)
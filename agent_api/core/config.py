@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -18,6 +19,140 @@ class Settings(BaseSettings):
     pms_username: str = Field(alias="PMS_USERNAME")
     pms_password: str = Field(alias="PMS_PASSWORD")
 
+    # PMS access token: lifetime when it has no JWT `exp`, and how long before
+    # expiry it is renewed in the background
+    pms_token_default_ttl_seconds: float = Field(
+        default=3600, alias="PMS_TOKEN_DEFAULT_TTL_SECONDS"
+    )
+    pms_token_refresh_margin_seconds: float = Field(
+        default=300, alias="PMS_TOKEN_REFRESH_MARGIN_SECONDS"
+    )
+
+    # Circuit breaker: consecutive PMS failures that open it, seconds before a probe
+    pms_breaker_failure_threshold: int = Field(
+        default=5, alias="PMS_BREAKER_FAILURE_THRESHOLD"
+    )
+    pms_breaker_reset_seconds: float = Field(
+        default=30, alias="PMS_BREAKER_RESET_SECONDS"
+    )
+    # AIMD concurrency limit on PMS requests: halved when responses are slower
+    # than the threshold or fail; callers queue at most QUEUE_TIMEOUT for a slot
+    pms_concurrency_initial_limit: int = Field(
+        default=8, alias="PMS_CONCURRENCY_INITIAL_LIMIT"
+    )
+    pms_concurrency_latency_threshold_seconds: float = Field(
+        default=5, alias="PMS_CONCURRENCY_LATENCY_THRESHOLD_SECONDS"
+    )
+    pms_concurrency_queue_timeout_seconds: float = Field(
+        default=5, alias="PMS_CONCURRENCY_QUEUE_TIMEOUT_SECONDS"
+    )
+
+    # Hedging: a window fetch slower than the recent p95 (at least MIN_DELAY) gets
+    # a backup request; hedges are capped at BUDGET_PERCENT of fetches
+    pms_hedge_enabled: bool = Field(default=False, alias="PMS_HEDGE_ENABLED")
+    pms_hedge_budget_percent: float = Field(default=5, alias="PMS_HEDGE_BUDGET_PERCENT")
+    pms_hedge_min_delay_seconds: float = Field(
+        default=0.5, alias="PMS_HEDGE_MIN_DELAY_SECONDS"
+    )
+
+    # Process-wide cache of PMS availability windows shared across turns
+    pms_availability_cache_ttl_seconds: float = Field(
+        default=120, alias="PMS_AVAILABILITY_CACHE_TTL_SECONDS"
+    )
+    pms_availability_cache_max_entries: int = Field(
+        default=64, alias="PMS_AVAILABILITY_CACHE_MAX_ENTRIES"
+    )
+    # Searches may use a window past the TTL, up to this age, while it is refreshed
+    pms_availability_cache_stale_ttl_seconds: float = Field(
+        default=600, alias="PMS_AVAILABILITY_CACHE_STALE_TTL_SECONDS"
+    )
+    # Availability cache snapshot file, reloaded on startup (unset: disabled)
+    pms_availability_snapshot_path: Path | None = Field(
+        default=None, alias="PMS_AVAILABILITY_SNAPSHOT_PATH"
+    )
+    pms_availability_snapshot_interval_seconds: float = Field(
+        default=300, alias="PMS_AVAILABILITY_SNAPSHOT_INTERVAL_SECONDS"
+    )
+    # Max age (seconds) of a window select_rooms may trust without rechecking the PMS
+    pms_availability_recheck_seconds: float = Field(
+        default=10, alias="PMS_AVAILABILITY_RECHECK_SECONDS"
+    )
+    # Upper bound on PMS window requests in flight for a single search
+    pms_max_concurrent_fetches: int = Field(
+        default=4, alias="PMS_MAX_CONCURRENT_FETCHES"
+    )
+    # Background task keeping the next N windows warm in the shared cache
+    pms_prefetch_enabled: bool = Field(default=False, alias="PMS_PREFETCH_ENABLED")
+    pms_prefetch_windows: int = Field(default=5, alias="PMS_PREFETCH_WINDOWS")
+    pms_prefetch_interval_seconds: float = Field(
+        default=90, alias="PMS_PREFETCH_INTERVAL_SECONDS"
+    )
+    pms_prefetch_jitter_seconds: float = Field(
+        default=15, alias="PMS_PREFETCH_JITTER_SECONDS"
+    )
+    pms_prefetch_max_backoff_seconds: float = Field(
+        default=600, alias="PMS_PREFETCH_MAX_BACKOFF_SECONDS"
+    )
+
+    # Cache shared by all workers behind the per-process ones: memory | postgres
+    cache_backend: Literal["memory", "postgres"] = Field(
+        default="memory", alias="CACHE_BACKEND"
+    )
+
+    # Safety net should a cross-worker invalidation be missed
+    room_catalog_ttl_seconds: float = Field(
+        default=300, alias="ROOM_CATALOG_TTL_SECONDS"
+    )
+
+    # Pruning of LangGraph checkpoint tables (also: `db_manager compact`)
+    checkpoint_compaction_enabled: bool = Field(
+        default=False, alias="CHECKPOINT_COMPACTION_ENABLED"
+    )
+    checkpoint_compaction_interval_seconds: float = Field(
+        default=6 * 3600, alias="CHECKPOINT_COMPACTION_INTERVAL_SECONDS"
+    )
+    checkpoint_keep_latest: int = Field(default=3, alias="CHECKPOINT_KEEP_LATEST")
+    # Matches the guest_id cookie lifetime: older threads are unreachable anyway
+    checkpoint_retention_days: float = Field(
+        default=30, alias="CHECKPOINT_RETENTION_DAYS"
+    )
+    # Also delete the tatoh.guest_threads rows of expired threads (app data)
+    checkpoint_drop_guest_threads: bool = Field(
+        default=False, alias="CHECKPOINT_DROP_GUEST_THREADS"
+    )
+
+    # Conversation history sent to the model: the last N turns verbatim, older
+    # turns folded into a rolling summary once BATCH of them have accumulated
+    agent_history_keep_turns: int = Field(default=6, alias="AGENT_HISTORY_KEEP_TURNS")
+    agent_history_summary_batch_turns: int = Field(
+        default=4, alias="AGENT_HISTORY_SUMMARY_BATCH_TURNS"
+    )
+
+    # Detached runs: events kept per run for reconnects via Last-Event-ID
+    run_replay_max_events: int = Field(default=5000, alias="RUN_REPLAY_MAX_EVENTS")
+    run_replay_ttl_seconds: float = Field(default=300, alias="RUN_REPLAY_TTL_SECONDS")
+
+    # What a second run on a busy thread does: reject (409), enqueue or interrupt
+    run_conflict_policy: Literal["reject", "enqueue", "interrupt"] = Field(
+        default="reject", alias="RUN_CONFLICT_POLICY"
+    )
+    # Longest an enqueued/interrupting run waits for the thread before a 409
+    run_queue_timeout_seconds: float = Field(
+        default=60, alias="RUN_QUEUE_TIMEOUT_SECONDS"
+    )
+
+    # Where spans of graph nodes, tools, PMS requests and DB queries go:
+    # none | console (log lines) | json (JSON lines on stderr) | otlp (collector)
+    tracing_exporter: Literal["none", "console", "json", "otlp"] = Field(
+        default="none", alias="TRACING_EXPORTER"
+    )
+    tracing_otlp_endpoint: str = Field(
+        default="http://localhost:4318/v1/traces", alias="TRACING_OTLP_ENDPOINT"
+    )
+    tracing_service_name: str = Field(
+        default="tatoh-agent-api", alias="TRACING_SERVICE_NAME"
+    )
+
     openai_api_key: str = Field(alias="OPENAI_API_KEY")
     openai_base_url: str | None = Field(default=None, alias="OPENAI_BASE_URL")
 
@@ -0,0 +1,377 @@
+"""Lightweight spans for finding where a turn spends its time.
+
+Spans nest through a contextvar, so a PMS request made by a tool made by the
+tools node is recorded as a child of both, and every span inherits the
+`thread_id`/`run_id` bound by `trace_run`. Finished spans go to the exporter
+picked by TRACING_EXPORTER: human-readable log lines, JSON lines, or OTLP/HTTP
+JSON batches for any OpenTelemetry collector. With no exporter, `tracer.span` does
+nothing beyond a contextvar lookup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import secrets
+import sys
+import time
+from abc import ABC
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import IO, Any, cast
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExceptionContext
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str  # 32 hex chars, shared by every span of a run
+    span_id: str  # 16 hex chars
+    parent_id: str | None
+    start_ns: int  # Wall clock, Unix nanoseconds
+    attributes: dict[str, Any] = field(default_factory=dict)
+    end_ns: int | None = None
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = time.time_ns() if self.end_ns is None else self.end_ns
+        return (end - self.start_ns) / 1e6
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# ── Exporters ─────────────────────────────────────────────────────────────────
+class SpanExporter(ABC):
+    """Receives every finished span; `export` must not block."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        return None
+
+    async def shutdown(self) -> None:
+        return None
+
+
+class ConsoleExporter(SpanExporter):
+    """One readable log line per span."""
+
+    def export(self, span: Span) -> None:
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        status = f" error={span.error!r}" if span.error else ""
+        logger.info(
+            "span %s %.1fms %s%s", span.name, span.duration_ms, attributes, status
+        )
+
+
+class JsonExporter(SpanExporter):
+    """One JSON object per line, for log shippers."""
+
+    def __init__(self, stream: IO[str] | None = None) -> None:
+        self.stream = sys.stderr if stream is None else stream
+
+    def export(self, span: Span) -> None:
+        self.stream.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OtlpHttpExporter(SpanExporter):
+    """Batches spans and POSTs them as OTLP/HTTP JSON (`/v1/traces`).
+
+    Spans are queued by `export` and sent every `interval_seconds` from a
+    background task; when the collector can't keep up, the oldest queued
+    spans are dropped rather than holding memory.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str,
+        interval_seconds: float = 5,
+        max_queue: int = 10_000,
+        batch_size: int = 512,
+    ) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._queue: deque[Span] = deque(maxlen=max_queue)
+        self._client: httpx.AsyncClient | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def export(self, span: Span) -> None:
+        self._queue.append(span)
+
+    async def start(self) -> None:
+        self._client = httpx.AsyncClient(timeout=10)
+        self._task = asyncio.create_task(self._run(), name="otlp-span-export")
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def flush(self) -> None:
+        while self._queue and self._client is not None:
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(self.batch_size, len(self._queue)))
+            ]
+            try:
+                response = await self._client.post(
+                    self.endpoint, json=self.payload(batch)
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.warning(
+                    "Dropped %d spans, OTLP export failed: %s", len(batch), e
+                )
+                return
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.flush()
+
+    def payload(self, spans: list[Span]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(
+                            {"service.name": self.service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [_otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    otlp: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        otlp["parentSpanId"] = span.parent_id
+    return otlp
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    def value(v: Any) -> dict[str, Any]:
+        match v:
+            case bool():
+                return {"boolValue": v}
+            case int():
+                return {"intValue": str(v)}
+            case float():
+                return {"doubleValue": v}
+            case _:
+                return {"stringValue": str(v)}
+
+    return [{"key": k, "value": value(v)} for k, v in attributes.items()]
+
+
+# ── Tracer ────────────────────────────────────────────────────────────────────
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_run_attributes: ContextVar[dict[str, str]] = ContextVar("run_attributes", default={})
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter.
+
+    Used as an async context manager from the FastAPI lifespan, which starts
+    and flushes exporters that send in the background.
+    """
+
+    def __init__(self, exporter: SpanExporter | None) -> None:
+        self.exporter = exporter
+
+    async def __aenter__(self) -> Tracer:
+        if self.exporter is not None:
+            await self.exporter.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        if self.exporter is not None:
+            await self.exporter.shutdown()
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """Time the enclosed block as a child of the current span."""
+        if self.exporter is None:
+            yield None
+            return
+        parent = _current_span.get()
+        current = self.start_span(name, parent, attributes)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(current)
+
+    def start_span(
+        self, name: str, parent: Span | None, attributes: dict[str, Any]
+    ) -> Span:
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes={**_run_attributes.get(), **attributes},
+        )
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        assert self.exporter is not None
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.warning("Span export failed: %s", e)
+
+
+def create_exporter(kind: str) -> SpanExporter | None:
+    match kind:
+        case "console":
+            return ConsoleExporter()
+        case "json":
+            return JsonExporter()
+        case "otlp":
+            return OtlpHttpExporter(
+                settings.tracing_otlp_endpoint, settings.tracing_service_name
+            )
+    return None
+
+
+# Create the singleton instance
+tracer = Tracer(create_exporter(settings.tracing_exporter))
+
+
+@contextlib.contextmanager
+def trace_run(thread_id: str, run_id: str) -> Iterator[Span | None]:
+    """Root span of one graph run; every span inside is tagged with both ids."""
+    token = _run_attributes.set({"thread_id": thread_id, "run_id": run_id})
+    try:
+        with tracer.span("run") as root:
+            yield root
+    finally:
+        _run_attributes.reset(token)
+
+
+def traced[**P, R](name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator recording each call of a function, sync or async, as a span."""
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+
+            return cast(Callable[P, R], async_wrapper)
+
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_sqlalchemy(engine: Engine) -> None:
+    """Record a span per SQL statement run through `engine` (the sync engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        if tracer.exporter is None or context is None:
+            return
+        span = tracer.start_span(
+            "db.query",
+            _current_span.get(),
+            {"db.statement": statement.split(None, 1)[0].upper()},
+        )
+        # Carried on the execution context to the matching after/error hook
+        setattr(context, "_tracing_span", span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        current = getattr(context, "_tracing_span", None)
+        if current is not None:
+            current.set("db.rows", cursor.rowcount)
+            tracer.end_span(current)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context: ExceptionContext) -> None:
+        context = exception_context.execution_context
+        current = getattr(context, "_tracing_span", None) if context else None
+        if current is not None:
+            current.error = str(exception_context.original_exception)
+            tracer.end_span(current)
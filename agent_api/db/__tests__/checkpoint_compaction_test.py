@@ -0,0 +1,406 @@
+"""Compaction runs destructive SQL, so most of these tests run it against Postgres.
+
+Set TEST_DATABASE_URL to a scratch database to run them, never a real one;
+a throwaway `docker run -e POSTGRES_HOST_AUTH_METHOD=trust -p 5433:5432
+postgres:16` will do (`postgresql://postgres@localhost:5433/postgres`). Each
+test works in its own schema, plus uniquely named rows in
+`tatoh.guest_threads`. Without it only `TestCompactionStatements` runs,
+checking which statements are sent and with which parameters.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import uuid
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, cast
+
+import psycopg
+import pytest
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from sqlalchemy import TextClause, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from db.checkpoint_compaction import CheckpointCompactor, compact_checkpoints
+from db.models import GuestThread
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set"
+)
+
+NOW = datetime.now(UTC)
+
+
+def _engine(schema: str) -> AsyncEngine:
+    assert TEST_DATABASE_URL is not None
+    # No pool: setup and teardown run in event loops other than the test's
+    return create_async_engine(
+        TEST_DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1),
+        connect_args={"options": f"-c search_path={schema}"},
+        poolclass=NullPool,
+    )
+
+
+async def _create_schema(schema: str) -> None:
+    assert TEST_DATABASE_URL is not None
+    async with await psycopg.AsyncConnection.connect(
+        TEST_DATABASE_URL, autocommit=True, options=f"-c search_path={schema}"
+    ) as conn:
+        await conn.execute(f"CREATE SCHEMA {schema}")
+        await AsyncPostgresSaver(conn).setup()  # type: ignore[arg-type]
+    engine = _engine(schema)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE SCHEMA IF NOT EXISTS tatoh"))
+        await conn.run_sync(
+            lambda sync: GuestThread.__table__.create(sync, checkfirst=True)
+        )
+    await engine.dispose()
+
+
+async def _drop_schema(schema: str, thread_ids: list[str]) -> None:
+    engine = _engine(schema)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await conn.execute(
+            text("DELETE FROM tatoh.guest_threads WHERE thread_id = ANY(:ids)"),
+            {"ids": thread_ids},
+        )
+    await engine.dispose()
+
+
+class Seeder:
+    """Writes checkpoints, writes and blobs straight into the saver's tables."""
+
+    def __init__(self) -> None:
+        self.thread_ids: list[str] = []
+
+    def thread(self) -> str:
+        thread_id = str(uuid.uuid4())
+        self.thread_ids.append(thread_id)
+        return thread_id
+
+    async def seed(
+        self, engine: AsyncEngine, thread_id: str, checkpoints: int, age: timedelta
+    ) -> None:
+        """`checkpoints` checkpoints, the last one `age` old.
+
+        Checkpoint N has a pending write and points `messages` at blob `vN`;
+        every checkpoint points `rooms` at the same blob `r1`, so that blob
+        stays referenced whichever checkpoints survive.
+        """
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO tatoh.guest_threads (guest_id, thread_id) "
+                    "VALUES ('guest', :thread_id)"
+                ),
+                {"thread_id": thread_id},
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO checkpoint_blobs "
+                    "(thread_id, checkpoint_ns, channel, version, type, blob) "
+                    "VALUES (:thread_id, '', 'rooms', 'r1', 'msgpack', '\\x00')"
+                ),
+                {"thread_id": thread_id},
+            )
+            for n in range(1, checkpoints + 1):
+                ts = NOW - age - timedelta(minutes=checkpoints - n)
+                checkpoint = {
+                    "v": 1,
+                    "id": f"{n:04}",
+                    "ts": ts.isoformat(),
+                    "channel_values": {},
+                    "channel_versions": {"messages": f"v{n}", "rooms": "r1"},
+                    "versions_seen": {},
+                }
+                params = {"thread_id": thread_id, "id": f"{n:04}", "n": f"v{n}"}
+                await conn.execute(
+                    text(
+                        "INSERT INTO checkpoints "
+                        "(thread_id, checkpoint_ns, checkpoint_id, checkpoint) "
+                        "VALUES (:thread_id, '', :id, CAST(:checkpoint AS jsonb))"
+                    ),
+                    params | {"checkpoint": json.dumps(checkpoint)},
+                )
+                await conn.execute(
+                    text(
+                        "INSERT INTO checkpoint_blobs "
+                        "(thread_id, checkpoint_ns, channel, version, type, blob) "
+                        "VALUES (:thread_id, '', 'messages', :n, 'msgpack', '\\x00')"
+                    ),
+                    params,
+                )
+                await conn.execute(
+                    text(
+                        "INSERT INTO checkpoint_writes (thread_id, checkpoint_ns, "
+                        "checkpoint_id, task_id, idx, channel, type, blob) "
+                        "VALUES (:thread_id, '', :id, 'task', 0, 'messages', "
+                        "'msgpack', '\\x00')"
+                    ),
+                    params,
+                )
+
+
+async def _rows(engine: AsyncEngine, thread_id: str) -> dict[str, list[str]]:
+    """What is left of a thread, table by table."""
+    queries = {
+        "checkpoints": "SELECT checkpoint_id FROM checkpoints",
+        "writes": "SELECT checkpoint_id FROM checkpoint_writes",
+        "blobs": "SELECT version FROM checkpoint_blobs",
+        "guest_threads": "SELECT thread_id FROM tatoh.guest_threads",
+    }
+    async with engine.connect() as conn:
+        return {
+            name: sorted(
+                (
+                    await conn.execute(
+                        text(f"{query} WHERE thread_id = :thread_id"),
+                        {"thread_id": thread_id},
+                    )
+                ).scalars()
+            )
+            for name, query in queries.items()
+        }
+
+
+@pytest.fixture
+def schema() -> str:
+    return f"compaction_test_{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def seeder() -> Seeder:
+    return Seeder()
+
+
+@pytest.fixture
+def engine(schema: str, seeder: Seeder) -> Iterator[AsyncEngine]:
+    asyncio.run(_create_schema(schema))
+    try:
+        yield _engine(schema)
+    finally:
+        asyncio.run(_drop_schema(schema, seeder.thread_ids))
+
+
+@requires_postgres
+class TestCompactCheckpoints:
+    # Scenario 1: An expired thread loses every checkpointer row; app rows stay
+    @pytest.mark.asyncio
+    async def test_expired_thread_is_dropped(self, engine, seeder):
+        expired = seeder.thread()
+        await seeder.seed(engine, expired, checkpoints=2, age=timedelta(days=40))
+
+        async with engine.begin() as conn:
+            report = await compact_checkpoints(conn, keep_latest=3, retention_days=30)
+
+        assert await _rows(engine, expired) == {
+            "checkpoints": [],
+            "writes": [],
+            "blobs": [],
+            "guest_threads": [expired],
+        }
+        assert report.threads_expired == 1
+        assert report.checkpoints_deleted == 2
+        assert report.writes_deleted == 2
+        assert report.blobs_deleted == 3
+        assert report.bytes_reclaimed > 0
+
+    # Scenario 2: A live thread keeps its latest N checkpoints and all they reference
+    @pytest.mark.asyncio
+    async def test_live_thread_keeps_latest(self, engine, seeder):
+        live = seeder.thread()
+        await seeder.seed(engine, live, checkpoints=5, age=timedelta(hours=1))
+
+        async with engine.begin() as conn:
+            report = await compact_checkpoints(conn, keep_latest=2, retention_days=30)
+
+        assert await _rows(engine, live) == {
+            "checkpoints": ["0004", "0005"],
+            "writes": ["0004", "0005"],
+            # r1 predates the kept checkpoints but they still reference it
+            "blobs": ["r1", "v4", "v5"],
+            "guest_threads": [live],
+        }
+        assert report.threads_expired == 0
+        assert report.checkpoints_deleted == 3
+        assert report.writes_deleted == 3
+        assert report.blobs_deleted == 3
+
+    # Scenario 3: Threads active within min_idle_seconds are left alone
+    @pytest.mark.asyncio
+    async def test_recently_active_thread_is_untouched(self, engine, seeder):
+        active = seeder.thread()
+        await seeder.seed(engine, active, checkpoints=5, age=timedelta(minutes=1))
+        before = await _rows(engine, active)
+
+        async with engine.begin() as conn:
+            report = await compact_checkpoints(conn, keep_latest=1, retention_days=30)
+
+        assert await _rows(engine, active) == before
+        assert report.checkpoints_deleted == 0
+
+    # Scenario 4: The background compactor's pass covers every thread at once
+    @pytest.mark.asyncio
+    async def test_compact_once(self, engine, seeder):
+        expired, live = seeder.thread(), seeder.thread()
+        await seeder.seed(engine, expired, checkpoints=2, age=timedelta(days=40))
+        await seeder.seed(engine, live, checkpoints=3, age=timedelta(hours=1))
+        compactor = CheckpointCompactor(
+            enabled=False,
+            keep_latest=1,
+            retention_days=30,
+            interval_seconds=3600,
+            db_engine=engine,
+        )
+
+        report = await compactor.compact_once()
+
+        assert (await _rows(engine, expired))["checkpoints"] == []
+        assert (await _rows(engine, live))["checkpoints"] == ["0003"]
+        assert (report.threads_expired, report.checkpoints_deleted) == (1, 2 + 2)
+
+    # Scenario 5: guest_threads rows of expired threads go only when asked to
+    @pytest.mark.asyncio
+    async def test_drop_guest_threads_opt_in(self, engine, seeder):
+        expired, live = seeder.thread(), seeder.thread()
+        await seeder.seed(engine, expired, checkpoints=1, age=timedelta(days=40))
+        await seeder.seed(engine, live, checkpoints=1, age=timedelta(hours=1))
+
+        async with engine.begin() as conn:
+            await compact_checkpoints(
+                conn, keep_latest=1, retention_days=30, drop_guest_threads=True
+            )
+
+        assert (await _rows(engine, expired))["guest_threads"] == []
+        assert (await _rows(engine, live))["guest_threads"] == [live]
+
+    # Scenario 6: keep_latest below 1 would wipe live threads, so it is refused
+    @pytest.mark.asyncio
+    async def test_keep_latest_must_be_positive(self, engine):
+        async with engine.begin() as conn:
+            with pytest.raises(ValueError):
+                await compact_checkpoints(conn, keep_latest=0, retention_days=30)
+
+
+@requires_postgres
+class TestDbManagerCompact:
+    # Scenario 1: `db_manager compact` runs one pass with the configured settings
+    @pytest.mark.parametrize("drop_guest_threads", [False, True])
+    def test_compact_command(
+        self, engine, schema, seeder, monkeypatch, capsys, drop_guest_threads
+    ):
+        from core.config import settings
+        from scripts import db_manager
+
+        expired, live = seeder.thread(), seeder.thread()
+
+        async def seed() -> None:
+            await seeder.seed(engine, expired, checkpoints=1, age=timedelta(days=40))
+            await seeder.seed(engine, live, checkpoints=4, age=timedelta(hours=1))
+
+        asyncio.run(seed())
+        # compact() disposes the engine it is given, so it gets its own
+        monkeypatch.setattr(db_manager, "engine", _engine(schema))
+        monkeypatch.setattr(settings, "checkpoint_keep_latest", 2)
+        monkeypatch.setattr(settings, "checkpoint_retention_days", 30)
+        options = ["--drop-guest-threads"] if drop_guest_threads else []
+        monkeypatch.setattr(sys, "argv", ["db_manager", "compact", *options])
+
+        db_manager.main()
+
+        async def remaining() -> tuple[dict[str, list[str]], dict[str, list[str]]]:
+            return await _rows(engine, expired), await _rows(engine, live)
+
+        expired_rows, live_rows = asyncio.run(remaining())
+        assert expired_rows["checkpoints"] == []
+        assert expired_rows["guest_threads"] == (
+            [] if drop_guest_threads else [expired]
+        )
+        assert live_rows["checkpoints"] == ["0003", "0004"]
+        output = capsys.readouterr().out
+        assert "Checkpoint compaction complete: expired 1 thread(s)" in output
+        assert "deleted 3 checkpoint(s)" in output
+
+
+class RecordingConnection:
+    """Stands in for the connection; records statements, matches no rows."""
+
+    def __init__(self) -> None:
+        self.executed: list[tuple[str, dict[str, object]]] = []
+
+    async def execute(
+        self, statement: TextClause, params: dict[str, object] | None = None
+    ) -> Any:
+        params = params or {}
+        # Every bind parameter of the statement is supplied, and nothing else
+        assert set(statement._bindparams) == set(params), statement.text
+        self.executed.append((" ".join(statement.text.split()), params))
+        return SimpleNamespace(scalar_one=lambda: 0, one=lambda: (0, 0))
+
+    def as_connection(self) -> AsyncConnection:
+        return cast(AsyncConnection, self)
+
+    def deleted_tables(self) -> list[str]:
+        return [
+            sql.split("DELETE FROM ", 1)[1].split()[0]
+            for sql, _ in self.executed
+            if "DELETE FROM " in sql
+        ]
+
+
+class TestCompactionStatements:
+    # Scenario 1: By default only the checkpointer's tables are deleted from
+    @pytest.mark.asyncio
+    async def test_only_checkpointer_tables_by_default(self):
+        conn = RecordingConnection()
+
+        await compact_checkpoints(
+            conn.as_connection(), keep_latest=2, retention_days=30
+        )
+
+        assert conn.deleted_tables() == [
+            "checkpoint_writes",  # Expired threads, children first
+            "checkpoint_blobs",
+            "checkpoints",
+            "checkpoints",  # Live threads beyond keep_latest
+            "checkpoint_writes",
+            "checkpoint_blobs",
+        ]
+
+    # Scenario 2: guest_threads rows go only with drop_guest_threads
+    @pytest.mark.asyncio
+    async def test_guest_threads_opt_in(self):
+        conn = RecordingConnection()
+
+        await compact_checkpoints(
+            conn.as_connection(),
+            keep_latest=2,
+            retention_days=30,
+            drop_guest_threads=True,
+        )
+
+        tables = conn.deleted_tables()
+        assert tables.count("tatoh.guest_threads") == 1
+        assert tables.index("tatoh.guest_threads") == tables.index("checkpoints") + 1
+
+    # Scenario 3: Retention and keep_latest reach the SQL as given
+    @pytest.mark.asyncio
+    async def test_parameters(self):
+        conn = RecordingConnection()
+
+        await compact_checkpoints(
+            conn.as_connection(), keep_latest=2, retention_days=30, min_idle_seconds=60
+        )
+
+        params = [p for _, p in conn.executed if p]
+        assert params == [
+            {"retention_seconds": 30 * 24 * 3600, "min_idle_seconds": 60},
+            {"keep_latest": 2},
+        ]
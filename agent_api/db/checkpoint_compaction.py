@@ -0,0 +1,286 @@
+"""Pruning of the LangGraph Postgres checkpointer tables.
+
+`AsyncPostgresSaver` writes a checkpoint per super-step and never deletes one,
+so `checkpoints`, `checkpoint_blobs` and `checkpoint_writes` (public schema)
+grow with every turn of every guest thread. Compaction:
+
+- drops every row of threads idle longer than the retention window;
+- keeps only the latest N checkpoints of the remaining threads, plus the
+  pending writes and channel blobs those checkpoints still reference.
+
+Application tables are left alone unless `drop_guest_threads` is set, which
+also deletes the `tatoh.guest_threads` entries of expired threads (their
+conversations are gone, so they would only list empty threads).
+
+Threads with a checkpoint in the last `min_idle_seconds` are left alone, so a
+run that is writing blobs and writes ahead of its checkpoint is never touched.
+Reported bytes are the on-disk size of the deleted rows; Postgres reuses that
+space once autovacuum has processed the tables.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import TextClause, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from core.config import settings
+from db.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Threads touched more recently than this are skipped until the next pass
+MIN_IDLE_SECONDS = 15 * 60
+
+_SELECT_CANDIDATES = text("""
+    CREATE TEMP TABLE compaction_threads ON COMMIT DROP AS
+    SELECT thread_id,
+           max((checkpoint ->> 'ts')::timestamptz)
+               < now() - make_interval(secs => :retention_seconds) AS expired
+    FROM checkpoints
+    GROUP BY thread_id
+    HAVING max((checkpoint ->> 'ts')::timestamptz)
+        < now() - make_interval(secs => :min_idle_seconds)
+""")
+
+_DELETE_EXPIRED_WRITES = text("""
+    WITH deleted AS (
+        DELETE FROM checkpoint_writes t
+        USING compaction_threads ct
+        WHERE t.thread_id = ct.thread_id AND ct.expired
+        RETURNING pg_column_size(t.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+_DELETE_EXPIRED_BLOBS = text("""
+    WITH deleted AS (
+        DELETE FROM checkpoint_blobs t
+        USING compaction_threads ct
+        WHERE t.thread_id = ct.thread_id AND ct.expired
+        RETURNING pg_column_size(t.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+_DELETE_EXPIRED_CHECKPOINTS = text("""
+    WITH deleted AS (
+        DELETE FROM checkpoints t
+        USING compaction_threads ct
+        WHERE t.thread_id = ct.thread_id AND ct.expired
+        RETURNING pg_column_size(t.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+_DELETE_EXPIRED_GUEST_THREADS = text("""
+    DELETE FROM tatoh.guest_threads g
+    USING compaction_threads ct
+    WHERE g.thread_id = ct.thread_id AND ct.expired
+""")
+
+_DELETE_OLD_CHECKPOINTS = text("""
+    WITH ranked AS (
+        SELECT c.thread_id, c.checkpoint_ns, c.checkpoint_id,
+               row_number() OVER (
+                   PARTITION BY c.thread_id, c.checkpoint_ns
+                   ORDER BY c.checkpoint_id DESC
+               ) AS rank
+        FROM checkpoints c
+        JOIN compaction_threads ct ON ct.thread_id = c.thread_id AND NOT ct.expired
+    ),
+    deleted AS (
+        DELETE FROM checkpoints t
+        USING ranked r
+        WHERE t.thread_id = r.thread_id
+          AND t.checkpoint_ns = r.checkpoint_ns
+          AND t.checkpoint_id = r.checkpoint_id
+          AND r.rank > :keep_latest
+        RETURNING pg_column_size(t.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+_DELETE_ORPHANED_WRITES = text("""
+    WITH deleted AS (
+        DELETE FROM checkpoint_writes t
+        USING compaction_threads ct
+        WHERE t.thread_id = ct.thread_id AND NOT ct.expired
+          AND NOT EXISTS (
+              SELECT 1 FROM checkpoints c
+              WHERE c.thread_id = t.thread_id
+                AND c.checkpoint_ns = t.checkpoint_ns
+                AND c.checkpoint_id = t.checkpoint_id
+          )
+        RETURNING pg_column_size(t.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+# A blob is live while some checkpoint maps its channel to its version
+_DELETE_UNREFERENCED_BLOBS = text("""
+    WITH deleted AS (
+        DELETE FROM checkpoint_blobs t
+        USING compaction_threads ct
+        WHERE t.thread_id = ct.thread_id AND NOT ct.expired
+          AND NOT EXISTS (
+              SELECT 1 FROM checkpoints c
+              WHERE c.thread_id = t.thread_id
+                AND c.checkpoint_ns = t.checkpoint_ns
+                AND c.checkpoint -> 'channel_versions' ->> t.channel = t.version
+          )
+        RETURNING pg_column_size(t.*) AS size
+    )
+    SELECT count(*), coalesce(sum(size), 0) FROM deleted
+""")
+
+
+@dataclass
+class CompactionReport:
+    threads_expired: int = 0
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    blobs_deleted: int = 0
+    bytes_reclaimed: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"expired {self.threads_expired} thread(s); deleted "
+            f"{self.checkpoints_deleted} checkpoint(s), {self.writes_deleted} "
+            f"write(s), {self.blobs_deleted} blob(s); reclaimed "
+            f"{self.bytes_reclaimed / 1024 / 1024:.2f} MiB"
+        )
+
+
+async def compact_checkpoints(
+    conn: AsyncConnection,
+    keep_latest: int,
+    retention_days: float,
+    min_idle_seconds: float = MIN_IDLE_SECONDS,
+    drop_guest_threads: bool = False,
+) -> CompactionReport:
+    """Run one compaction pass inside the caller's transaction."""
+    if keep_latest < 1:
+        raise ValueError("keep_latest must be at least 1")
+
+    await conn.execute(
+        _SELECT_CANDIDATES,
+        {
+            "retention_seconds": retention_days * 24 * 3600,
+            "min_idle_seconds": min_idle_seconds,
+        },
+    )
+    report = CompactionReport(
+        threads_expired=(
+            await conn.execute(
+                text("SELECT count(*) FROM compaction_threads WHERE expired")
+            )
+        ).scalar_one()
+    )
+
+    # Expired threads: drop everything, children first
+    report.writes_deleted += await _delete(conn, report, _DELETE_EXPIRED_WRITES)
+    report.blobs_deleted += await _delete(conn, report, _DELETE_EXPIRED_BLOBS)
+    report.checkpoints_deleted += await _delete(
+        conn, report, _DELETE_EXPIRED_CHECKPOINTS
+    )
+    if drop_guest_threads:
+        await conn.execute(_DELETE_EXPIRED_GUEST_THREADS)
+
+    # Live threads: keep the latest N checkpoints and what they reference
+    report.checkpoints_deleted += await _delete(
+        conn, report, _DELETE_OLD_CHECKPOINTS, {"keep_latest": keep_latest}
+    )
+    report.writes_deleted += await _delete(conn, report, _DELETE_ORPHANED_WRITES)
+    report.blobs_deleted += await _delete(conn, report, _DELETE_UNREFERENCED_BLOBS)
+    return report
+
+
+async def _delete(
+    conn: AsyncConnection,
+    report: CompactionReport,
+    statement: TextClause,
+    params: dict[str, object] | None = None,
+) -> int:
+    """Run a `WITH deleted AS (...)` statement, count its bytes, return its rows."""
+    rows, size = (await conn.execute(statement, params or {})).one()
+    report.bytes_reclaimed += int(size)
+    return int(rows)
+
+
+class CheckpointCompactor:
+    """Background task that runs `compact_checkpoints` every `interval_seconds`.
+
+    Used as an async context manager from the FastAPI lifespan; does nothing
+    unless `enabled`. The same pass is available on demand through
+    `python -m scripts.db_manager compact`.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        keep_latest: int,
+        retention_days: float,
+        interval_seconds: float,
+        drop_guest_threads: bool = False,
+        db_engine: AsyncEngine | None = None,
+    ) -> None:
+        self.enabled = enabled
+        self.keep_latest = keep_latest
+        self.retention_days = retention_days
+        self.drop_guest_threads = drop_guest_threads
+        self.interval_seconds = interval_seconds
+        self.engine = engine if db_engine is None else db_engine
+        self._task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> CheckpointCompactor:
+        if self.enabled:
+            self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="checkpoint-compaction")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def compact_once(self) -> CompactionReport:
+        async with self.engine.begin() as conn:
+            return await compact_checkpoints(
+                conn,
+                self.keep_latest,
+                self.retention_days,
+                drop_guest_threads=self.drop_guest_threads,
+            )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                report = await self.compact_once()
+                logger.info("Checkpoint compaction: %s", report)
+            except Exception as e:
+                logger.warning("Checkpoint compaction failed: %s", e)
+
+
+# Create the singleton instance
+checkpoint_compactor = CheckpointCompactor(
+    enabled=settings.checkpoint_compaction_enabled,
+    keep_latest=settings.checkpoint_keep_latest,
+    retention_days=settings.checkpoint_retention_days,
+    interval_seconds=settings.checkpoint_compaction_interval_seconds,
+    drop_guest_threads=settings.checkpoint_drop_guest_threads,
+)
@@ -0,0 +1,50 @@
+from collections.abc import Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+from core.tracing import tracer
+
+
+class TracedPostgresSaver(AsyncPostgresSaver):
+    """`AsyncPostgresSaver` recording a span per checkpoint read and write.
+
+    The checkpointer runs on its own psycopg pool, outside SQLAlchemy, so the
+    engine's query spans don't cover it.
+    """
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        with tracer.span("checkpoint.get") as span:
+            result = await super().aget_tuple(config)
+            if span is not None:
+                span.set("checkpoint.found", result is not None)
+            return result
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        with tracer.span(
+            "checkpoint.put", **{"checkpoint.step": metadata.get("step", -1)}
+        ):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with tracer.span("checkpoint.put_writes", **{"checkpoint.writes": len(writes)}):
+            await super().aput_writes(config, writes, task_id, task_path)
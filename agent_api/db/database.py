@@ -2,11 +2,13 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.orm import DeclarativeBase
 
 from core.config import settings
+from core.tracing import instrument_sqlalchemy
 
 DATABASE_URL = settings.database_url
 SQLALCHEMY_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
 
 engine = create_async_engine(SQLALCHEMY_URL, pool_pre_ping=True)
+instrument_sqlalchemy(engine.sync_engine)
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
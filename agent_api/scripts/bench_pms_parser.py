@@ -0,0 +1,125 @@
+"""Micro-benchmark for PmsClient._parse_response on a busy synthetic calendar.
+
+Usage: python -m scripts.bench_pms_parser [rooms] [reservations]
+
+Compares the current parser against the previous strptime/strftime-per-night
+implementation (kept below as the reference) and checks both agree.
+"""
+
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from agent.clients.pms_client import pms_client
+
+WINDOW_START = date(2026, 12, 20)
+WINDOW_DAYS = 14
+ROOM_TYPES = 8
+
+
+def build_payload(n_rooms: int, n_reservations: int) -> dict[str, Any]:
+    """Synthetic /calendar/detail response shaped like the real PMS payload."""
+    rng = random.Random(42)
+    room_types = [{"id": f"rt{i}", "name": f"Type {i}"} for i in range(ROOM_TYPES)]
+    rooms = [
+        {"id": f"r{i}", "roomNo": f"S{i}", "roomTypeId": f"rt{i % ROOM_TYPES}"}
+        for i in range(n_rooms)
+    ]
+
+    reservation_room_list: dict[str, dict[str, dict[str, list[dict[str, str]]]]] = {}
+    for _ in range(n_reservations):
+        room = rng.choice(rooms)
+        check_in = WINDOW_START + timedelta(days=rng.randint(-5, WINDOW_DAYS))
+        check_out = check_in + timedelta(days=rng.randint(1, 7))
+        reservation = {
+            "checkIn": check_in.isoformat(),
+            "checkOut": check_out.isoformat(),
+        }
+        dates_dict = reservation_room_list.setdefault(
+            room["roomTypeId"], {}
+        ).setdefault(room["id"], {})
+        # The PMS repeats a reservation under every date key it spans
+        night = check_in
+        while night < check_out:
+            dates_dict.setdefault(night.isoformat(), []).append(reservation)
+            night += timedelta(days=1)
+
+    return {
+        "startDate": WINDOW_START.isoformat(),
+        "endDate": (WINDOW_START + timedelta(days=WINDOW_DAYS - 1)).isoformat(),
+        "roomList": rooms,
+        "roomTypeList": room_types,
+        "reservationRoomList": reservation_room_list,
+        "version": "1.62",
+    }
+
+
+def reference_parse(response: dict[str, Any]) -> dict[str, list[str]]:
+    """Previous parser: one strptime/strftime per reserved night, O(types x rooms) scan."""
+    start_dt = datetime.strptime(response["startDate"], "%Y-%m-%d")
+    end_dt = datetime.strptime(response["endDate"], "%Y-%m-%d")
+    all_dates = []
+    current_date = start_dt
+    while current_date <= end_dt:
+        all_dates.append(current_date.strftime("%Y-%m-%d"))
+        current_date += timedelta(days=1)
+
+    room_id_to_number = {room["id"]: room["roomNo"] for room in response["roomList"]}
+    rooms_availability: dict[str, set[str]] = {}
+    for room_type in response["roomTypeList"]:
+        for room in response["roomList"]:
+            if room["roomTypeId"] == room_type["id"]:
+                rooms_availability[room["roomNo"].lower()] = set(all_dates)
+
+    for rooms_dict in response["reservationRoomList"].values():
+        for room_id, dates_dict in rooms_dict.items():
+            room_number = room_id_to_number[room_id].lower()
+            for reservations in dates_dict.values():
+                for reservation in reservations:
+                    current = datetime.strptime(reservation["checkIn"], "%Y-%m-%d")
+                    check_out = datetime.strptime(reservation["checkOut"], "%Y-%m-%d")
+                    while current < check_out:
+                        rooms_availability[room_number].discard(
+                            current.strftime("%Y-%m-%d")
+                        )
+                        current += timedelta(days=1)
+
+    return {room_no: sorted(dates) for room_no, dates in rooms_availability.items()}
+
+
+def current_parse(response: dict[str, Any]) -> dict[str, list[str]]:
+    parsed = pms_client._parse_response(response)
+    return {
+        room_no: sorted(room["dates"].to_date_strings())
+        for room_no, room in parsed["rooms"].items()
+    }
+
+
+def main() -> None:
+    n_rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    n_reservations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    payload = build_payload(n_rooms, n_reservations)
+
+    if current_parse(payload) != reference_parse(payload):
+        print("MISMATCH: current parser disagrees with the reference implementation")
+        sys.exit(1)
+
+    runs = 20
+    reference = min(
+        timeit.repeat(lambda: reference_parse(payload), number=runs, repeat=3)
+    )
+    current = min(
+        timeit.repeat(
+            lambda: pms_client._parse_response(payload), number=runs, repeat=3
+        )
+    )
+    print(f"{n_rooms} rooms, {n_reservations} reservations, {runs} runs each")
+    print(f"reference: {reference / runs * 1000:8.2f} ms/parse")
+    print(f"current:   {current / runs * 1000:8.2f} ms/parse")
+    print(f"speedup:   {reference / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from alembic.config import Config
 from sqlalchemy import text
 
 from alembic import command
+from core.config import settings
+from db.checkpoint_compaction import compact_checkpoints
 
 # Import the pre-configured async engine from your architecture
 from db.database import engine
@@ -39,6 +41,26 @@ def check_status():
     command.heads(alembic_cfg, verbose=True)
 
 
+async def compact(drop_guest_threads: bool = False):
+    """Prune LangGraph checkpoints: keep the latest N per thread, drop expired threads.
+
+    With `drop_guest_threads`, expired threads are also removed from
+    tatoh.guest_threads; otherwise only the checkpointer's tables are touched.
+    """
+    print("Compacting checkpoint tables...")
+    if drop_guest_threads:
+        print("Also deleting tatoh.guest_threads rows of expired threads.")
+    async with engine.begin() as conn:
+        report = await compact_checkpoints(
+            conn,
+            keep_latest=settings.checkpoint_keep_latest,
+            retention_days=settings.checkpoint_retention_days,
+            drop_guest_threads=drop_guest_threads,
+        )
+    print(f"Checkpoint compaction complete: {report}")
+    await engine.dispose()
+
+
 def migrate():
     """Run full migration sequence."""
     asyncio.run(setup_schema())
@@ -47,7 +69,10 @@ def migrate():
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python -m scripts.db_manager [migrate|status]")
+        print(
+            "Usage: python -m scripts.db_manager "
+            "[migrate|status|compact [--drop-guest-threads]]"
+        )
         sys.exit(1)
 
     cmd = sys.argv[1].strip().lower()
@@ -56,9 +81,16 @@ def main():
         migrate()
     elif cmd == "status":
         check_status()
+    elif cmd == "compact":
+        options = sys.argv[2:]
+        unknown = [o for o in options if o != "--drop-guest-threads"]
+        if unknown:
+            print(f"Unknown option for compact: {' '.join(unknown)}")
+            sys.exit(1)
+        asyncio.run(compact(drop_guest_threads="--drop-guest-threads" in options))
     else:
         print(f"Unknown command: {cmd}")
-        print("Available commands: migrate, status")
+        print("Available commands: migrate, status, compact")
         sys.exit(1)
 
 